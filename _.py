@@ -1,4 +1,5 @@
 from tortoise import Tortoise, run_async
+from config import get_tortoise_config
 from db.models import *
 from tortoise.query_utils import Q
 from functools import reduce
@@ -8,7 +9,7 @@ from tortoise.query_utils import Prefetch
 
 
 async def init_db():
-    await Tortoise.init(db_url="sqlite://db.sqlite3", modules={"models": ["db.models"]})
+    await Tortoise.init(config=get_tortoise_config())
     await Tortoise.generate_schemas()
 
 
@@ -0,0 +1,124 @@
+""" Brython 模組包效能比較: 完整的 brython_stdlib.min.js + 逐一下載 pysrc 與精簡模組包
+
+比較項目:
+1. 文件大小 (原始、gzip、brotli) 與模組數量
+2. 請求數量 (pysrc 模組於 import 時以同步 XHR 逐一下載，每個請求至少一次往返)
+3. 於行動網路的估計下載時間 (brotli 大小 / 頻寬 + 請求數量 × 往返時間)
+4. JavaScript 解析時間 (以 node 的 vm.Script 編譯，未安裝 node 則略過)
+
+使用方法:
+    python benchmark/brython_bundle_size.py
+"""
+from pathlib import Path  # nopep8
+import sys  # nopep8
+sys.path.append(str(Path(__file__).resolve().parent.parent))  # nopep8
+import gzip
+import json
+import shutil
+import subprocess
+from typing import Dict, List, Optional
+
+import brotli
+
+from brython_bundle import BUNDLE_PATH, PYSRC_DIR, ROOT_DIR, build_bundle, load_stdlib_vfs
+from static_files import BROTLI_QUALITY
+
+STDLIB_MIN_PATH = ROOT_DIR / 'static/js/dependent/brython_stdlib.min.js'
+# 網路環境: (名稱, 頻寬 Mbps, 往返時間毫秒)
+NETWORK_LIST = [
+    ('3G (1.6 Mbps, RTT 300 ms)', 1.6, 300),
+    ('4G (9 Mbps, RTT 170 ms)', 9, 170),
+]
+
+NODE_PARSE_SCRIPT = '''
+const fs = require('fs'), vm = require('vm');
+const result = {};
+for (const path of process.argv.slice(1)) {
+    const source = fs.readFileSync(path, 'utf8');
+    const start = process.hrtime.bigint();
+    new vm.Script(source);
+    result[path] = Number(process.hrtime.bigint() - start) / 1e6;
+}
+console.log(JSON.stringify(result));
+'''
+
+
+def get_size_dict(body: bytes) -> Dict[str, int]:
+    """ 獲取原始與壓縮後的大小 (壓縮參數同 static_files)
+    """
+    return {
+        'raw': len(body),
+        'gzip': len(gzip.compress(body, compresslevel=9, mtime=0)),
+        'br': len(brotli.compress(body, quality=BROTLI_QUALITY)),
+    }
+
+
+def get_parse_ms_dict(path_list: List[Path]) -> Optional[Dict[str, float]]:
+    """ 以 node 量測 JavaScript 的首次解析時間 (同一程序內重複編譯會命中 V8 的快取，故僅量測一次)，未安裝 node 則回傳 None
+    """
+    node_path = shutil.which('node')
+    if node_path is None:
+        return None
+    output = subprocess.run(
+        [node_path, '-e', NODE_PARSE_SCRIPT, *map(str, path_list)],
+        capture_output=True, check=True, text=True,
+    ).stdout
+    return json.loads(output)
+
+
+def main():
+    build_bundle()
+    pysrc_path_list = sorted(PYSRC_DIR.glob('*.py'))
+    stdlib_vfs = load_stdlib_vfs()
+
+    full_size_dict = get_size_dict(STDLIB_MIN_PATH.read_bytes())
+    pysrc_size_dict_list = [get_size_dict(path.read_bytes()) for path in pysrc_path_list]
+    bundle_text = BUNDLE_PATH.read_text(encoding='utf-8')
+    bundle_size_dict = get_size_dict(bundle_text.encode())
+    # 模組包的第一個 update_VFS 為標準庫 (扣除 $timestamp)
+    stdlib_line = next(
+        line for line in bundle_text.splitlines() if line.startswith('__BRYTHON__.update_VFS('))
+    bundle_module_n = len(json.loads(stdlib_line[len('__BRYTHON__.update_VFS('):-len(');')]))-1
+
+    # (名稱, 大小, 標準庫模組數量, 請求數量, 解析的文件)
+    row_list = [
+        (
+            '完整 brython_stdlib.min.js + pysrc',
+            {
+                key: full_size_dict[key]+sum(size_dict[key] for size_dict in pysrc_size_dict_list)
+                for key in full_size_dict
+            },
+            len(stdlib_vfs)-1,
+            1+len(pysrc_path_list),
+            STDLIB_MIN_PATH,
+        ),
+        (
+            '精簡模組包 (含 pysrc)',
+            bundle_size_dict,
+            bundle_module_n,
+            1,
+            BUNDLE_PATH,
+        ),
+    ]
+    parse_ms_dict = get_parse_ms_dict([row[-1] for row in row_list])
+
+    print('| 方式 | 原始 (KB) | gzip (KB) | brotli (KB) | 標準庫模組數 | 請求數 | '
+          + ' | '.join(f'{name} 下載 (ms)' for name, _, _ in NETWORK_LIST)
+          + ' | 解析 (ms) |')
+    print('|---|' + '---:|'*(6+len(NETWORK_LIST)))
+    for name, size_dict, module_n, request_n, path in row_list:
+        transfer_ms_list = [
+            size_dict['br']*8/(mbps*1000)+request_n*rtt_ms
+            for _, mbps, rtt_ms in NETWORK_LIST
+        ]
+        parse_ms = f'{parse_ms_dict[str(path)]:.1f}' if parse_ms_dict else '-'
+        print(
+            f'| {name} | {size_dict["raw"]/1024:.0f} | {size_dict["gzip"]/1024:.0f} '
+            f'| {size_dict["br"]/1024:.0f} | {module_n} | {request_n} | '
+            + ' | '.join(f'{transfer_ms:.0f}' for transfer_ms in transfer_ms_list)
+            + f' | {parse_ms} |'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+""" 資料庫並行效能測試: 比較各資料庫效能設定檔在批量寫入期間的查詢吞吐量
+
+每個設定檔各建立一個暫存資料庫，先寫入初始表符，再分別量測:
+1. 僅有查詢時的吞吐量
+2. 同時有批量寫入 (每個交易寫入 WRITE_BATCH_N 個表符及其標籤) 時的吞吐量與延遲
+
+使用方法:
+    python benchmark/db_concurrency.py [每階段秒數]
+"""
+from pathlib import Path  # nopep8
+import sys  # nopep8
+sys.path.append(str(Path(__file__).resolve().parent.parent))  # nopep8
+import asyncio
+import random
+import tempfile
+import time
+from typing import List, Tuple
+from uuid import UUID
+
+from tortoise import Tortoise
+from tortoise.transactions import in_transaction
+
+from config import DB_PROFILE_DICT, WRITE_CONNECTION_NAME, get_tortoise_config
+from db.models import Emoji, Tag
+
+SEED_EMOJI_N = 20000
+TAG_N = 500
+TAG_PER_EMOJI_N = 3
+WRITE_BATCH_N = 500
+READER_N = 4
+PAGE_SIZE_N = 30
+
+
+async def write_emoji_batch(tag_list: List[Tag], emoji_n: int):
+    """ 於單一交易中寫入表符及其標籤 (同批量匯入)
+    """
+    emoji_list = [
+        Emoji(
+            url=f'https://emos.plurk.com/{random.getrandbits(128):032x}_w48_h48.gif',
+            average_hash_str=f'{random.getrandbits(64):016x}',
+        )
+        for _ in range(emoji_n)
+    ]
+    async with in_transaction(WRITE_CONNECTION_NAME) as connection:
+        await Emoji.bulk_create(emoji_list, using_db=connection)
+        await Emoji.bulk_add_tags(
+            [(emoji, random.sample(tag_list, TAG_PER_EMOJI_N)) for emoji in emoji_list],
+            using_db=connection,
+        )
+
+
+async def read_loop(
+        emoji_id_list: List[UUID],
+        stop_time: float,
+        latency_ms_list: List[float]):
+    """ 持續查詢一頁表符及其標籤 (同 GET /api/emoji)，直到指定時間
+    """
+    while time.perf_counter() < stop_time:
+        start_time = time.perf_counter()
+        await Emoji.get_emoji_list_by_id_list(
+            random.sample(emoji_id_list, PAGE_SIZE_N))
+        latency_ms_list.append((time.perf_counter()-start_time)*1000)
+
+
+async def write_loop(tag_list: List[Tag], stop_time: float) -> int:
+    """ 持續批量寫入表符，直到指定時間
+
+    Returns:
+        int: 寫入的表符數量
+    """
+    written_emoji_n = 0
+    while time.perf_counter() < stop_time:
+        await write_emoji_batch(tag_list, WRITE_BATCH_N)
+        written_emoji_n += WRITE_BATCH_N
+    return written_emoji_n
+
+
+async def measure(
+        emoji_id_list: List[UUID],
+        tag_list: List[Tag],
+        duration_s: float,
+        is_writing: bool) -> Tuple[float, float, float, float]:
+    """ 量測查詢吞吐量
+
+    Returns:
+        Tuple[float, float, float, float]: (查詢/秒, p50 毫秒, p99 毫秒, 寫入表符/秒)
+    """
+    latency_ms_list: List[float] = []
+    stop_time = time.perf_counter()+duration_s
+    task_list = [
+        read_loop(emoji_id_list, stop_time, latency_ms_list)
+        for _ in range(READER_N)
+    ]
+    if is_writing:
+        task_list.append(write_loop(tag_list, stop_time))
+    result_list = await asyncio.gather(*task_list)
+
+    latency_ms_list.sort()
+    return (
+        len(latency_ms_list)/duration_s,
+        latency_ms_list[len(latency_ms_list)//2],
+        latency_ms_list[int(len(latency_ms_list)*0.99)],
+        (result_list[-1]/duration_s) if is_writing else 0.0,
+    )
+
+
+async def benchmark_profile(db_profile: str, duration_s: float) -> List[tuple]:
+    """ 以暫存資料庫量測單一設定檔
+    """
+    random.seed(0)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        await Tortoise.init(config=get_tortoise_config(
+            db_url=f'sqlite://{Path(temp_dir) / "db.sqlite3"}',
+            db_profile=db_profile,
+        ))
+        await Tortoise.generate_schemas()
+        await Emoji.create_tag_relation_index()
+        try:
+            tag_list = await Tag.get_tag_list_by_str_list(
+                [f'標籤{tag_i}' for tag_i in range(TAG_N)])
+            for _ in range(0, SEED_EMOJI_N, WRITE_BATCH_N):
+                await write_emoji_batch(tag_list, WRITE_BATCH_N)
+            emoji_id_list = await Emoji.all().values_list('id', flat=True)
+
+            return [
+                await measure(emoji_id_list, tag_list, duration_s, is_writing)
+                for is_writing in (False, True)
+            ]
+        finally:
+            await Tortoise.close_connections()
+
+
+async def main(duration_s: float):
+    print(f'初始表符 {SEED_EMOJI_N} 個，{READER_N} 個並行查詢，每個寫入交易 {WRITE_BATCH_N} 個表符\n')
+    print('| 設定檔 | 寫入 | 查詢/秒 | p50 (ms) | p99 (ms) | 寫入表符/秒 |')
+    print('|---|---|---:|---:|---:|---:|')
+    for db_profile in DB_PROFILE_DICT:
+        for is_writing, (read_per_s, p50_ms, p99_ms, write_per_s) in zip(
+                (False, True), await benchmark_profile(db_profile, duration_s)):
+            print(
+                f'| {db_profile} | {"批量寫入中" if is_writing else "無"} '
+                f'| {read_per_s:.0f} | {p50_ms:.1f} | {p99_ms:.1f} | '
+                f'{write_per_s:.0f} |'
+            )
+
+
+if __name__ == '__main__':
+    asyncio.run(main(float(sys.argv[1]) if len(sys.argv) > 1 else 5))
@@ -0,0 +1,98 @@
+""" 表符列表緊湊格式測試: 比較一般格式與緊湊格式 (format=compact) 的回應大小與編碼/解碼時間
+
+標籤的出現次數呈長尾分布 (少數熱門標籤出現在大多數表符上)，同一頁中的熱門標籤因此會重複出現
+
+使用方法:
+    python benchmark/emoji_compact_format.py [每頁表符數量 ...]
+"""
+from pathlib import Path  # nopep8
+import sys  # nopep8
+sys.path.append(str(Path(__file__).resolve().parent.parent))  # nopep8
+import datetime
+import gzip
+import random
+import time
+import uuid
+from types import SimpleNamespace
+from typing import Callable, List
+
+import brotli
+import orjson
+
+from pysrc.common_utils import compact_2_emoji_dict_list
+from serializer import dumps_emoji_list, dumps_emoji_list_compact
+
+REPEAT_N = 200
+TAG_N = 12_000
+TAG_PER_EMOJI_N = 5
+# 標籤熱門程度的 Zipf 分布參數
+ZIPF_S = 1.1
+
+
+def timeit_ms(func: Callable, arg) -> float:
+    """ 計算每次執行的平均毫秒數
+    """
+    start_time = time.perf_counter()
+    for _ in range(REPEAT_N):
+        func(arg)
+    return (time.perf_counter()-start_time)*1000/REPEAT_N
+
+
+def make_emoji_list(emoji_n: int) -> list:
+    """ 建立模擬的表符列表 (標籤依 Zipf 分布抽樣，並依名稱排序，如同資料庫查詢的結果)
+    """
+    tag_list = [
+        SimpleNamespace(id=uuid.uuid4(), name=f'標籤{tag_i}')
+        for tag_i in range(TAG_N)
+    ]
+    weight_list = [1/(tag_i+1)**ZIPF_S for tag_i in range(TAG_N)]
+    now = datetime.datetime.now(datetime.timezone.utc)
+    return [
+        SimpleNamespace(
+            url=f'https://emos.plurk.com/{uuid.uuid4().hex}_w48_h48.gif',
+            id=uuid.uuid4(),
+            created_at=now-datetime.timedelta(seconds=emoji_i, microseconds=emoji_i),
+            average_hash_str=f'{random.getrandbits(64):016x}',
+            tag_list=sorted(
+                {
+                    tag.id: tag
+                    for tag in random.choices(tag_list, weight_list, k=TAG_PER_EMOJI_N)
+                }.values(),
+                key=lambda tag: tag.name),
+        )
+        for emoji_i in range(emoji_n)
+    ]
+
+
+def get_size_str(body: bytes) -> str:
+    """ 原始 / gzip / brotli 大小 (KB)
+    """
+    return ' / '.join(
+        f'{len(data)/1024:.1f}'
+        for data in (body, gzip.compress(body, compresslevel=6), brotli.compress(body, quality=5))
+    )
+
+
+def main(emoji_n_list: List[int]):
+    random.seed(0)
+    print('| 每頁表符數量 | 一般格式 KB (原始 / gzip / br) | 緊湊格式 KB (原始 / gzip / br) '
+          '| 編碼 ms (一般 / 緊湊) | 解碼 ms (一般 / 緊湊) |')
+    print('|---:|---:|---:|---:|---:|')
+    for emoji_n in emoji_n_list:
+        emoji_list = make_emoji_list(emoji_n)
+        body = dumps_emoji_list(emoji_list)
+        compact_body = dumps_emoji_list_compact(emoji_list)
+        # 緊湊格式還原後的內容須與一般格式一致
+        assert compact_2_emoji_dict_list(orjson.loads(compact_body)) == orjson.loads(body)
+
+        print(
+            f'| {emoji_n:,} | {get_size_str(body)} | {get_size_str(compact_body)} '
+            f'| {timeit_ms(dumps_emoji_list, emoji_list):.3f} / '
+            f'{timeit_ms(dumps_emoji_list_compact, emoji_list):.3f} '
+            f'| {timeit_ms(orjson.loads, body):.3f} / '
+            f'{timeit_ms(lambda data: compact_2_emoji_dict_list(orjson.loads(data)), compact_body):.3f} |'
+        )
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [30, 100, 1000])
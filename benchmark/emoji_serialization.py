@@ -0,0 +1,89 @@
+""" 表符列表序列化效能測試: 比較原本的 EmojiOut.from_orm + json.loads + JSONResponse 與 orjson 直接序列化
+
+使用方法:
+    python benchmark/emoji_serialization.py [每頁表符數量 ...]
+"""
+from pathlib import Path  # nopep8
+import sys  # nopep8
+sys.path.append(str(Path(__file__).resolve().parent.parent))  # nopep8
+import datetime
+import json
+import random
+import time
+import uuid
+from types import SimpleNamespace
+from typing import Callable, List
+
+from fastapi.responses import JSONResponse
+
+from schema import EmojiOut
+from serializer import dumps_emoji_list, json_response
+
+REPEAT_N = 200
+TAG_N = 12_000
+TAG_PER_EMOJI_N = 5
+
+
+def legacy_body(emoji_list: list) -> bytes:
+    """ 原本 emoji_list_response 的序列化方式 (表符的標籤不輸出 emoji_n)
+    """
+    return JSONResponse(
+        content=[
+            json.loads(EmojiOut.from_orm(emoji).json(exclude_none=True))
+            for emoji in emoji_list
+        ],
+    ).body
+
+
+def fast_body(emoji_list: list) -> bytes:
+    """ orjson 直接序列化
+    """
+    return json_response(dumps_emoji_list(emoji_list)).body
+
+
+def timeit_ms(func: Callable, emoji_list: list) -> float:
+    """ 計算每次序列化的平均毫秒數
+    """
+    start_time = time.perf_counter()
+    for _ in range(REPEAT_N):
+        func(emoji_list)
+    return (time.perf_counter()-start_time)*1000/REPEAT_N
+
+
+def make_emoji_list(emoji_n: int) -> list:
+    """ 建立模擬的表符列表 (標籤已依名稱排序，如同資料庫查詢的結果)
+    """
+    tag_list = [
+        SimpleNamespace(id=uuid.uuid4(), name=f'標籤{tag_i}')
+        for tag_i in range(TAG_N)
+    ]
+    now = datetime.datetime.now(datetime.timezone.utc)
+    return [
+        SimpleNamespace(
+            url=f'https://emos.plurk.com/{uuid.uuid4().hex}_w48_h48.gif',
+            id=uuid.uuid4(),
+            created_at=now-datetime.timedelta(seconds=emoji_i, microseconds=emoji_i),
+            average_hash_str=f'{random.getrandbits(64):016x}',
+            tag_list=sorted(
+                random.sample(tag_list, TAG_PER_EMOJI_N), key=lambda tag: tag.name),
+        )
+        for emoji_i in range(emoji_n)
+    ]
+
+
+def main(emoji_n_list: List[int]):
+    random.seed(0)
+    print('| 每頁表符數量 | 原實作 (ms) | orjson (ms) | 加速倍數 |')
+    print('|---:|---:|---:|---:|')
+    for emoji_n in emoji_n_list:
+        emoji_list = make_emoji_list(emoji_n)
+        # 兩者輸出的內容須一致
+        assert json.loads(legacy_body(emoji_list)) == json.loads(fast_body(emoji_list))
+
+        legacy_ms = timeit_ms(legacy_body, emoji_list)
+        fast_ms = timeit_ms(fast_body, emoji_list)
+        print(f'| {emoji_n:,} | {legacy_ms:.2f} | {fast_ms:.3f} | {legacy_ms/fast_ms:.1f}x |')
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [30, 100, 1000])
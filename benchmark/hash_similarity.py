@@ -0,0 +1,83 @@
+""" 相似表符搜尋效能測試: 比較原本的 DataFrame 實作與 HashMatrix
+
+使用方法:
+    python benchmark/hash_similarity.py [表符數量 ...]
+"""
+from pathlib import Path  # nopep8
+import sys  # nopep8
+sys.path.append(str(Path(__file__).resolve().parent.parent))  # nopep8
+import random
+import time
+import uuid
+from typing import Callable, List
+
+import imagehash
+import pandas as pd
+
+from db.hash_index import HashMatrix
+
+OUTPUT_N = 20
+QUERY_N = 20
+BATCH_QUERY_N = 64
+
+
+def legacy_top_k(emoji_dict_list: List[dict], average_hash_str: str) -> list:
+    """ 原本 Emoji.get_similar_emoji_list 的排序方式 (不含資料庫查詢)
+    """
+    emoji_df = pd.DataFrame(emoji_dict_list)
+    emoji_df['average_hash'] = emoji_df['average_hash_str'].apply(
+        lambda x: imagehash.hex_to_hash(x))
+    emoji_df['average_hash_diff_int'] = emoji_df['average_hash'] - \
+        imagehash.hex_to_hash(average_hash_str)
+    return list(emoji_df.sort_values(by=['average_hash_diff_int']).head(OUTPUT_N)['id'])
+
+
+def timeit_ms(func: Callable, query_list: List[str]) -> float:
+    """ 計算每次查詢的平均毫秒數
+    """
+    start_time = time.perf_counter()
+    for query in query_list:
+        func(query)
+    return (time.perf_counter()-start_time)*1000/len(query_list)
+
+
+def main(emoji_n_list: List[int]):
+    random.seed(0)
+    print(f'| 表符數量 | 原實作 (ms) | HashMatrix (ms) | HashMatrix 批量 {BATCH_QUERY_N} 筆 (ms/筆) |')
+    print('|---:|---:|---:|---:|')
+    for emoji_n in emoji_n_list:
+        emoji_dict_list = [
+            dict(id=uuid.uuid4(), average_hash_str=f'{random.getrandbits(64):016x}')
+            for _ in range(emoji_n)
+        ]
+        emoji_id_hash_str_tuple_list = [
+            (emoji_dict['id'], emoji_dict['average_hash_str'])
+            for emoji_dict in emoji_dict_list
+        ]
+        query_list = [
+            emoji_dict['average_hash_str']
+            for emoji_dict in random.sample(emoji_dict_list, QUERY_N)
+        ]
+
+        # 原實作每次查詢皆須重建 DataFrame，僅取少量查詢以免耗時過久
+        legacy_ms = timeit_ms(
+            lambda query: legacy_top_k(emoji_dict_list, query), query_list[:3])
+
+        hashMatrix = HashMatrix()
+        hashMatrix.load(emoji_id_hash_str_tuple_list)
+        hashMatrix_ms = timeit_ms(
+            lambda query: hashMatrix.search_top_k(query, OUTPUT_N), query_list)
+
+        batch_query_list = (query_list*BATCH_QUERY_N)[:BATCH_QUERY_N]
+        batch_ms = timeit_ms(
+            lambda query_list: hashMatrix.search_top_k_batch(
+                query_list, OUTPUT_N),
+            [batch_query_list],
+        )/BATCH_QUERY_N
+
+        print(
+            f'| {emoji_n:,} | {legacy_ms:.1f} | {hashMatrix_ms:.2f} | {batch_ms:.2f} |')
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 1_000_000])
@@ -0,0 +1,293 @@
+""" 產生精簡的 Brython 模組包 (僅含 pysrc 用到的標準庫模組，以及 pysrc 模組本身)
+
+brython_stdlib.js 含有整個標準庫 (約 4 MB)，但前端只用到其中少數模組。
+自 pysrc 的 import 出發，沿著標準庫虛擬文件系統 (VFS) 中每個模組的 import (含函式內延遲載入的模組) 求遞移閉包，
+只輸出用到的模組 (瀏覽器中無法使用的模組除外)；pysrc 模組亦一併放入 VFS，瀏覽器不必再逐一同步下載 /pysrc/*.py，
+且與標準庫模組相同，編譯結果會由 Brython 快取於 indexedDB
+
+模組包記錄 pysrc 與標準庫的內容哈希值，內容未異動時不重新產生
+
+使用方法:
+    python brython_bundle.py
+"""
+import ast
+import hashlib
+import json
+import warnings
+from pathlib import Path
+from typing import Dict, Iterable, List, Set
+
+from loguru import logger
+
+from config import BRYTHON_BUNDLE_DIR
+
+
+ROOT_DIR = Path(__file__).resolve().parent
+PYSRC_DIR = ROOT_DIR / 'pysrc'
+STDLIB_PATH = ROOT_DIR / 'static/js/dependent/brython_stdlib.js'
+# Brython 的 import 機制以名稱動態載入的模組 (原始碼分析無法得知，例如 importlib._bootstrap_external 的 marshal)
+RUNTIME_MODULE_LIST = ['marshal']
+# 瀏覽器中無法使用的模組 (程序、網路、檔案系統、終端機等)，及僅供開發/測試使用的模組:
+# 僅於函式內延遲載入 (例如 uuid 取得 MAC 位址時的 subprocess)，不放入模組包，其子模組亦同
+BROWSER_UNSUPPORTED_MODULE_LIST = [
+    'subprocess', '_posixsubprocess', 'socket', '_socket', 'select', 'selectors', 'signal',
+    'pwd', 'tempfile', 'shutil', 'glob', 'fnmatch', 'pathlib', 'ntpath',
+    'tarfile', 'zipfile', 'zipimport', 'py_compile', 'sysconfig', 'pkgutil',
+    'importlib.util', 'importlib.abc', 'atexit', 'gc', 'threading', '_threading_local',
+    'pdb', 'bdb', 'pydoc', 'pydoc_data', 'unittest', 'doctest', 'code', 'codeop', 'cmd',
+    'argparse', 'optparse', 'getopt', 'webbrowser', 'email', 'http', 'uu', 'quopri',
+    'difflib', 'gettext', 'shlex',
+]
+# 產生的模組包 (輸出目錄由伺服器掛載於 /dist)
+BUNDLE_DIR = Path(BRYTHON_BUNDLE_DIR) if BRYTHON_BUNDLE_DIR else ROOT_DIR / 'static/js/dist'
+BUNDLE_NAME = 'brython_modules.js'
+BUNDLE_PATH = BUNDLE_DIR / BUNDLE_NAME
+
+
+def load_stdlib_vfs(stdlib_path: Path = STDLIB_PATH) -> dict:
+    """ 讀取 brython_stdlib.js 的虛擬文件系統
+
+    Python 模組為 [副檔名, 原始碼, import 列表] (套件另有第四個元素 1)，
+    JavaScript 模組為 [副檔名, 原始碼]，另有 $timestamp
+
+    Args:
+        stdlib_path (Path, optional): 未壓縮的 brython_stdlib.js (內容為 JSON). Defaults to STDLIB_PATH.
+
+    Returns:
+        dict
+    """
+    text = stdlib_path.read_text(encoding='utf-8')
+    start_i = text.index('var scripts = ')+len('var scripts = ')
+    end_i = text.rindex('__BRYTHON__.update_VFS')
+    return json.loads(text[start_i:end_i])
+
+
+def get_parent_module_list(module_name: str) -> List[str]:
+    """ 獲取模組的所有上層套件 (例如 a.b.c → [a, a.b])
+    """
+    part_list = module_name.split('.')
+    return ['.'.join(part_list[:i]) for i in range(1, len(part_list))]
+
+
+def resolve_relative_module(module_name: str, is_package: bool, level: int, target: str) -> str:
+    """ 將相對 import 轉為完整模組名稱 (例如 json 中的 from .decoder → json.decoder)
+    """
+    part_list = module_name.split('.')
+    package_part_list = part_list if is_package else part_list[:-1]
+    base_part_list = package_part_list[:len(package_part_list)-(level-1)]
+    return '.'.join(base_part_list+([target] if target else []))
+
+
+def is_browser_unsupported_module(module_name: str) -> bool:
+    """ 是否為瀏覽器中無法使用的模組 (或其子模組)
+    """
+    return any(
+        module_name == name or module_name.startswith(f'{name}.')
+        for name in BROWSER_UNSUPPORTED_MODULE_LIST
+    )
+
+
+def get_imported_module_set(
+        source: str,
+        module_name_set: Set[str],
+        module_name: str = '',
+        is_package: bool = False) -> Set[str]:
+    """ 獲取原始碼 import 的模組
+
+    除模組層級 (含 if/try/with 與類別內) 的 import 外，函式內延遲載入的模組亦計入:
+    模組包使用 VFS 時 Brython 不會再向伺服器下載缺少的模組，漏列的模組於執行到該函式時才會 ImportError。
+    if __name__ == '__main__' 區塊不計入。from X import Y 時，若 X.Y 為模組則一併計入
+
+    Args:
+        source (str): Python 原始碼
+        module_name_set (Set[str]): 所有已知的模組名稱
+        module_name (str, optional): 模組名稱 (解析相對 import 用). Defaults to ''.
+        is_package (bool, optional): 是否為套件. Defaults to False.
+
+    Returns:
+        Set[str]
+    """
+    imported_module_set = set()
+    with warnings.catch_warnings():
+        # 標準庫原始碼中的無效跳脫序列 (例如 '\?') 僅產生警告，與 import 分析無關
+        warnings.simplefilter('ignore')
+        pending_node_list = list(ast.parse(source).body)
+    while pending_node_list:
+        node = pending_node_list.pop()
+        if isinstance(node, ast.If) and ast.dump(node.test) == ast.dump(
+                ast.parse("__name__ == '__main__'", mode='eval').body):
+            continue
+        if isinstance(node, ast.Import):
+            imported_module_set.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            from_module_name = resolve_relative_module(
+                module_name, is_package, node.level, node.module) \
+                if node.level else node.module
+            imported_module_set.add(from_module_name)
+            imported_module_set.update(
+                f'{from_module_name}.{alias.name}' for alias in node.names
+                if f'{from_module_name}.{alias.name}' in module_name_set
+            )
+        pending_node_list.extend(
+            child for child in ast.iter_child_nodes(node)
+            if isinstance(child, (ast.stmt, ast.excepthandler))
+        )
+    return imported_module_set
+
+
+def get_pysrc_module_dict(pysrc_dir: Path = PYSRC_DIR) -> Dict[str, str]:
+    """ 獲取 pysrc 套件的所有模組原始碼
+
+    Returns:
+        Dict[str, str]: 模組名稱 → 原始碼
+    """
+    return {
+        (pysrc_dir.name if path.stem == '__init__' else f'{pysrc_dir.name}.{path.stem}'):
+            path.read_text(encoding='utf-8')
+        for path in sorted(pysrc_dir.glob('*.py'))
+    }
+
+
+def get_stdlib_import_list(module_name: str, stdlib_vfs: dict) -> List[str]:
+    """ 獲取標準庫模組 import 的模組
+
+    Python 模組以原始碼重新分析 (可解析相對 import，並略過 if __name__ == '__main__' 區塊)，
+    無法解析時改用 VFS 記錄的 import 列表
+
+    Args:
+        module_name (str): 模組名稱
+        stdlib_vfs (dict): 標準庫虛擬文件系統
+
+    Returns:
+        List[str]
+    """
+    ext, source, *rest = stdlib_vfs[module_name]
+    # JavaScript 模組 ([副檔名, 原始碼]) 不記錄 import 列表
+    if ext != '.py':
+        return []
+    try:
+        return sorted(get_imported_module_set(
+            source, set(stdlib_vfs), module_name, is_package=len(rest) > 1))
+    except SyntaxError:
+        return rest[0]
+
+
+def get_required_stdlib_module_list(
+        root_module_iter: Iterable[str],
+        stdlib_vfs: dict) -> List[str]:
+    """ 自指定的模組出發，求標準庫中所有需要的模組 (遞移閉包，含上層套件)
+
+    不在 VFS 中的模組 (例如 brython.js 內建的 sys、_thread) 及瀏覽器中無法使用的模組則略過
+
+    Args:
+        root_module_iter (Iterable[str]): 起始模組
+        stdlib_vfs (dict): 標準庫虛擬文件系統
+
+    Returns:
+        List[str]
+    """
+    required_module_set: Set[str] = set()
+    pending_module_list = list(root_module_iter)
+    while pending_module_list:
+        module_name = pending_module_list.pop()
+        for name in get_parent_module_list(module_name)+[module_name]:
+            if name in required_module_set or name not in stdlib_vfs \
+                    or is_browser_unsupported_module(name):
+                continue
+            required_module_set.add(name)
+            pending_module_list.extend(get_stdlib_import_list(name, stdlib_vfs))
+    return sorted(required_module_set)
+
+
+def get_source_hash(stdlib_path: Path = STDLIB_PATH, pysrc_dir: Path = PYSRC_DIR) -> str:
+    """ 獲取標準庫與 pysrc 的內容哈希值 (用以判斷模組包是否需要重新產生)
+    """
+    sha256 = hashlib.sha256(stdlib_path.read_bytes())
+    for module_name, source in get_pysrc_module_dict(pysrc_dir).items():
+        sha256.update(module_name.encode())
+        sha256.update(source.encode())
+    return sha256.hexdigest()[:16]
+
+
+def get_bundle_source_hash(bundle_path: Path = BUNDLE_PATH) -> str:
+    """ 獲取既有模組包記錄的內容哈希值 (記錄於第一行)，不存在則回傳空字串
+    """
+    if not bundle_path.exists():
+        return ''
+    with open(bundle_path, encoding='utf-8') as f:
+        return f.readline().strip().lstrip('/ ')
+
+
+def build_bundle_text(stdlib_vfs: dict, pysrc_module_dict: Dict[str, str], source_hash: str) -> str:
+    """ 產生模組包內容
+
+    標準庫沿用原本的 $timestamp，pysrc 則以內容哈希值作為 $timestamp:
+    Brython 以此判斷 indexedDB 中的編譯結果是否過期，pysrc 異動時不必重新編譯標準庫
+
+    Args:
+        stdlib_vfs (dict): 標準庫虛擬文件系統
+        pysrc_module_dict (Dict[str, str]): pysrc 模組名稱 → 原始碼
+        source_hash (str): 標準庫與 pysrc 的內容哈希值
+
+    Returns:
+        str
+    """
+    module_name_set = set(stdlib_vfs) | set(pysrc_module_dict)
+    pysrc_import_dict = {
+        module_name: sorted(get_imported_module_set(
+            source, module_name_set, module_name, is_package='.' not in module_name))
+        for module_name, source in pysrc_module_dict.items()
+    }
+    stdlib_module_list = get_required_stdlib_module_list(
+        {name for import_list in pysrc_import_dict.values() for name in import_list}
+        | set(RUNTIME_MODULE_LIST),
+        stdlib_vfs,
+    )
+
+    stdlib_scripts = {'$timestamp': stdlib_vfs['$timestamp']}
+    stdlib_scripts.update(
+        (module_name, stdlib_vfs[module_name]) for module_name in stdlib_module_list)
+    pysrc_scripts = {'$timestamp': int(source_hash[:12], 16)}
+    for module_name, source in pysrc_module_dict.items():
+        pysrc_scripts[module_name] = ['.py', source, pysrc_import_dict[module_name]]
+        if '.' not in module_name:
+            # 套件
+            pysrc_scripts[module_name].append(1)
+
+    return '\n'.join([
+        f'// {source_hash}',
+        '__BRYTHON__.use_VFS = true;',
+        f'__BRYTHON__.update_VFS({json.dumps(stdlib_scripts, ensure_ascii=False, separators=(",", ":"))});',
+        f'__BRYTHON__.update_VFS({json.dumps(pysrc_scripts, ensure_ascii=False, separators=(",", ":"))});',
+        '',
+    ])
+
+
+def build_bundle(is_forced: bool = False) -> bool:
+    """ 產生模組包 (內容未異動時略過)
+
+    Args:
+        is_forced (bool, optional): 是否強制重新產生. Defaults to False.
+
+    Returns:
+        bool: 是否有重新產生
+    """
+    source_hash = get_source_hash()
+    if not is_forced and get_bundle_source_hash() == source_hash:
+        return False
+
+    stdlib_vfs = load_stdlib_vfs()
+    bundle_text = build_bundle_text(stdlib_vfs, get_pysrc_module_dict(), source_hash)
+    BUNDLE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    # 先寫入暫存文件再取代，避免同時啟動的程序讀到寫入一半的模組包
+    temp_path = BUNDLE_PATH.with_suffix('.tmp')
+    temp_path.write_text(bundle_text, encoding='utf-8')
+    temp_path.replace(BUNDLE_PATH)
+    logger.info(
+        f'Brython 模組包產生完成: {BUNDLE_PATH} '
+        f'({len(bundle_text.encode())/1024:.0f} KB)')
+    return True
+
+
+if __name__ == '__main__':
+    build_bundle(is_forced=True)
@@ -0,0 +1,259 @@
+""" API 回應快取 (LRU + TTL)，並依寫入操作精確失效
+
+另維護資料版本 (每次寫入操作遞增)，作為 API 回應的 ETag: 版本未變即表示資料未變，
+條件式請求不需執行查詢即可回傳 304
+"""
+from collections import OrderedDict
+from dataclasses import dataclass
+import secrets
+import time
+from typing import Dict, FrozenSet, Hashable, Iterable, Optional
+from uuid import UUID
+
+
+# 快取項目種類
+KIND_ALL = 'all'  # 不指定標籤的表符列表
+KIND_TAG = 'tag'  # 以標籤搜尋的表符列表
+KIND_SIMILAR = 'similar'  # 相似表符列表
+KIND_TAG_SEARCH = 'tag_search'  # 標籤模糊搜尋結果 (/api/tag)
+
+
+@dataclass
+class CacheEntry:
+    """ 快取項目
+
+    Args:
+        body (bytes): 回應內容
+        headers (Dict[str, str]): 自訂回應標頭 (例如 emoji_n)
+        kind (str): 快取項目種類
+        expire_time (float): 過期時間 (time.monotonic)
+        tag_name_frozenset (FrozenSet[str]): 以標籤搜尋時的標籤組合；標籤模糊搜尋時的搜尋字串
+        emoji_id_frozenset (FrozenSet[UUID]): 回應中包含的表符 ID
+        gzip_body (Optional[bytes]): gzip 壓縮後的回應內容 (首次以 gzip 回應時才壓縮)
+    """
+    body: bytes
+    headers: Dict[str, str]
+    kind: str
+    expire_time: float
+    tag_name_frozenset: FrozenSet[str] = frozenset()
+    emoji_id_frozenset: FrozenSet[UUID] = frozenset()
+    gzip_body: Optional[bytes] = None
+
+
+@dataclass
+class CacheStats:
+    """ 快取統計
+    """
+    hit_n: int = 0
+    miss_n: int = 0
+    expiration_n: int = 0
+    eviction_n: int = 0
+    invalidation_n: int = 0
+    # 查詢期間有寫入而未保留的回應數量
+    stale_n: int = 0
+
+
+class ResponseCache:
+    """ API 回應快取
+
+    以正規化後的查詢參數為鍵，保留已序列化的回應內容。容量以 LRU 淘汰，並設有存活時間；
+    寫入操作 (新增/刪除表符、追加/移除標籤) 僅使受影響的項目失效，並遞增資料版本
+    """
+
+    def __init__(self, max_size_n: int = 1024, ttl_s: float = 300):
+        self.max_size_n = max_size_n
+        self.ttl_s = ttl_s
+        self._entry_dict: Dict[Hashable, CacheEntry] = OrderedDict()
+        self.stats = CacheStats()
+        # 資料版本 (每次寫入操作遞增)；資料版本僅存於記憶體，因此另以程序識別碼區分，
+        # 使程序重新啟動 (版本歸零) 後，舊的 ETag 不會誤判為相符
+        self.data_version = 0
+        self.process_id = secrets.token_hex(4)
+
+    @property
+    def data_etag(self) -> str:
+        """ 目前資料版本的 ETag (不含引號)
+        """
+        return f'{self.process_id}.{self.data_version}'
+
+    def __len__(self) -> int:
+        return len(self._entry_dict)
+
+    def get(self, key: Hashable) -> Optional[CacheEntry]:
+        """ 獲取快取項目
+
+        Args:
+            key (Hashable): 快取鍵
+
+        Returns:
+            Optional[CacheEntry]: 若未命中或已過期則回傳 None
+        """
+        entry = self._entry_dict.get(key)
+        if entry is None:
+            self.stats.miss_n += 1
+            return None
+        if entry.expire_time <= time.monotonic():
+            del self._entry_dict[key]
+            self.stats.expiration_n += 1
+            self.stats.miss_n += 1
+            return None
+        self._entry_dict.move_to_end(key)
+        self.stats.hit_n += 1
+        return entry
+
+    def set(
+            self,
+            key: Hashable,
+            body: bytes,
+            headers: Dict[str, str],
+            kind: str,
+            data_version: int,
+            tag_name_iter: Iterable[str] = (),
+            emoji_id_iter: Iterable[UUID] = ()) -> Optional[CacheEntry]:
+        """ 新增快取項目 (超過容量時淘汰最久未使用的項目)
+
+        查詢期間若有寫入，該寫入的失效處理發生於此項目存在之前，回應內容可能已過時，
+        因此資料版本與查詢前不同時不保留
+
+        Args:
+            key (Hashable): 快取鍵
+            body (bytes): 回應內容
+            headers (Dict[str, str]): 自訂回應標頭
+            kind (str): 快取項目種類
+            data_version (int): 查詢前讀取的資料版本
+            tag_name_iter (Iterable[str], optional): 標籤組合或搜尋字串. Defaults to ().
+            emoji_id_iter (Iterable[UUID], optional): 回應中包含的表符 ID. Defaults to ().
+
+        Returns:
+            Optional[CacheEntry]: 若查詢期間資料版本已改變則回傳 None
+        """
+        if data_version != self.data_version:
+            self.stats.stale_n += 1
+            return None
+        entry = self._entry_dict[key] = CacheEntry(
+            body=body,
+            headers=headers,
+            kind=kind,
+            expire_time=time.monotonic()+self.ttl_s,
+            tag_name_frozenset=frozenset(tag_name_iter),
+            emoji_id_frozenset=frozenset(emoji_id_iter),
+        )
+        self._entry_dict.move_to_end(key)
+        while len(self._entry_dict) > self.max_size_n:
+            self._entry_dict.popitem(last=False)
+            self.stats.eviction_n += 1
+        return entry
+
+    def _invalidate_where(self, predicate) -> int:
+        """ 使符合條件的快取項目失效
+
+        Returns:
+            int: 失效的項目數量
+        """
+        key_list = [
+            key for key, entry in self._entry_dict.items() if predicate(entry)
+        ]
+        for key in key_list:
+            del self._entry_dict[key]
+        self.stats.invalidation_n += len(key_list)
+        return len(key_list)
+
+    def invalidate_emoji(
+            self,
+            emoji_id: UUID,
+            tag_name_iter: Iterable[str],
+            changed_tag_name_iter: Iterable[str],
+            is_created: bool = False,
+            is_deleted: bool = False) -> int:
+        """ 表符有所異動時，使受影響的表符列表失效 (並遞增資料版本)
+
+        1. 回應中含有此表符的項目 (表符內容已改變)
+        2. 新增或刪除表符時: 不指定標籤的表符列表 (分頁位移)；新增表符時另含所有相似表符列表
+        3. 標籤組合包含於表符的標籤，且與異動的標籤有交集的標籤搜尋 (符合的表符已改變)
+        4. 可能搜尋到異動標籤的標籤模糊搜尋結果 (標籤的表符數量已改變)
+
+        Args:
+            emoji_id (UUID): 表符 ID
+            tag_name_iter (Iterable[str]): 表符的標籤 (追加標籤時為追加後；移除標籤或刪除表符時為異動前)
+            changed_tag_name_iter (Iterable[str]): 異動的標籤 (新增或刪除表符時即為表符的所有標籤)
+            is_created (bool, optional): 是否為新增表符. Defaults to False.
+            is_deleted (bool, optional): 是否為刪除表符. Defaults to False.
+
+        Returns:
+            int: 失效的項目數量
+        """
+        self.data_version += 1
+        tag_name_frozenset = frozenset(tag_name_iter)
+        changed_tag_name_frozenset = frozenset(changed_tag_name_iter)
+
+        def is_affected(entry: CacheEntry) -> bool:
+            if emoji_id in entry.emoji_id_frozenset:
+                return True
+            if entry.kind == KIND_ALL:
+                return is_created or is_deleted
+            if entry.kind == KIND_SIMILAR:
+                return is_created
+            if entry.kind == KIND_TAG:
+                return entry.tag_name_frozenset <= tag_name_frozenset and \
+                    not entry.tag_name_frozenset.isdisjoint(changed_tag_name_frozenset)
+            return False
+        return self._invalidate_where(is_affected) + \
+            self.invalidate_tag_search(changed_tag_name_frozenset)
+
+    def invalidate_tag_search(self, tag_name_iter: Iterable[str]) -> int:
+        """ 標籤有所異動時，使可能搜尋到這些標籤的標籤模糊搜尋結果失效 (並遞增資料版本)
+
+        Args:
+            tag_name_iter (Iterable[str]): 異動的標籤名稱
+
+        Returns:
+            int: 失效的項目數量
+        """
+        self.data_version += 1
+        lower_tag_name_list = [tag_name.lower() for tag_name in tag_name_iter]
+        # 未指定搜尋字串的項目 (例如最熱門的標籤) 涵蓋所有標籤，任何標籤異動皆須失效
+        return self._invalidate_where(
+            lambda entry: entry.kind == KIND_TAG_SEARCH and bool(lower_tag_name_list) and (
+                not entry.tag_name_frozenset or any(
+                    tag_str.lower() in lower_tag_name
+                    for tag_str in entry.tag_name_frozenset
+                    for lower_tag_name in lower_tag_name_list
+                )
+            )
+        )
+
+    def clear(self) -> int:
+        """ 資料於程序外異動 (例如以 csv2db 離線匯入) 時，使所有快取項目失效 (並遞增資料版本)
+
+        遞增資料版本使舊的 ETag 不再相符，且查詢期間發生的重新載入不會保留查詢結果
+
+        Returns:
+            int: 失效的項目數量
+        """
+        self.data_version += 1
+        return self._invalidate_where(lambda entry: True)
+
+    def get_stats_dict(self) -> dict:
+        """ 獲取快取統計字典
+
+        Returns:
+            dict
+        """
+        request_n = self.stats.hit_n + self.stats.miss_n
+        return dict(
+            size_n=len(self._entry_dict),
+            max_size_n=self.max_size_n,
+            ttl_s=self.ttl_s,
+            hit_n=self.stats.hit_n,
+            miss_n=self.stats.miss_n,
+            hit_rate=(self.stats.hit_n / request_n) if request_n else 0.0,
+            expiration_n=self.stats.expiration_n,
+            eviction_n=self.stats.eviction_n,
+            invalidation_n=self.stats.invalidation_n,
+            stale_n=self.stats.stale_n,
+            data_version=self.data_version,
+        )
+
+
+# 程序共用的 API 回應快取
+response_cache = ResponseCache()
@@ -0,0 +1,111 @@
+""" 程序設定 (皆可由環境變數覆寫)
+
+    PLURKEMOJI_DB_URL: 資料庫連線網址. Defaults to sqlite://db.sqlite3
+    PLURKEMOJI_DB_PROFILE: 資料庫效能設定檔 (見 DB_PROFILE_DICT). Defaults to performance
+    PLURKEMOJI_FIREBASE_PROJECT_ID: Firebase 專案 ID (驗證 ID token 的 aud). Defaults to nidojs-project
+    PLURKEMOJI_FIREBASE_CREDENTIALS: Firebase 服務帳戶金鑰 JSON 路徑，未設定則使用 Application Default Credentials
+    PLURKEMOJI_BRYTHON_BUNDLE_DIR: Brython 模組包的輸出目錄. Defaults to static/js/dist
+"""
+import os
+from typing import Dict, List
+
+from tortoise.backends.base.config_generator import expand_db_url
+
+
+# 資料庫連線網址
+DB_URL = os.environ.get('PLURKEMOJI_DB_URL', 'sqlite://db.sqlite3')
+# 資料庫效能設定檔
+DB_PROFILE = os.environ.get('PLURKEMOJI_DB_PROFILE', 'performance')
+
+# Firebase 專案 ID 與服務帳戶金鑰路徑 (驗證前端送出的 ID token)
+FIREBASE_PROJECT_ID = os.environ.get('PLURKEMOJI_FIREBASE_PROJECT_ID', 'nidojs-project')
+FIREBASE_CREDENTIALS_PATH = os.environ.get('PLURKEMOJI_FIREBASE_CREDENTIALS')
+
+# Brython 模組包的輸出目錄 (於程序啟動時產生，未設定則為 static/js/dist)
+BRYTHON_BUNDLE_DIR = os.environ.get('PLURKEMOJI_BRYTHON_BUNDLE_DIR')
+
+# 寫入連線與唯讀連線的名稱
+WRITE_CONNECTION_NAME = 'default'
+READ_CONNECTION_NAME = 'read'
+
+# 資料庫效能設定檔: SQLite PRAGMA 及是否使用獨立的唯讀連線
+DB_PROFILE_DICT: Dict[str, dict] = {
+    # Tortoise 預設值 (WAL、外鍵約束)，所有查詢共用單一連線
+    'default': dict(
+        pragma_dict={},
+        is_read_connection=False,
+    ),
+    # 讀寫分離: 查詢不需等待寫入連線的鎖 (包含批量寫入的整個交易)，
+    # WAL 模式下唯讀連線讀取最近一次提交的快照
+    'performance': dict(
+        pragma_dict=dict(
+            # PRAGMA 依序執行: 須先切換日誌模式
+            journal_mode='WAL',
+            # WAL 模式下僅於檢查點時 fsync，斷電時至多遺失最後幾筆交易，不會損毀資料庫
+            synchronous='NORMAL',
+            # 以記憶體映射讀取資料庫檔案 (256 MiB)
+            mmap_size=256*1024*1024,
+            # 頁面快取 (負值單位為 KiB: 64 MiB)
+            cache_size=-64*1024,
+            # 資料庫被鎖定時的等待毫秒數 (而非立即拋出 database is locked)
+            busy_timeout=5000,
+            temp_store='MEMORY',
+        ),
+        is_read_connection=True,
+    ),
+}
+
+
+def get_tortoise_config(
+        db_url: str = DB_URL,
+        db_profile: str = DB_PROFILE,
+        is_read_connection: bool = None,
+        model_module_list: List[str] = ["db.models"]) -> dict:
+    """ 獲取 Tortoise ORM 設定
+
+    Args:
+        db_url (str, optional): 資料庫連線網址. Defaults to DB_URL.
+        db_profile (str, optional): 資料庫效能設定檔. Defaults to DB_PROFILE.
+        is_read_connection (bool, optional): 是否使用獨立的唯讀連線，None 表示依設定檔.
+            單一寫入者的批量腳本可設為 False，使交易中的查詢不必逐一指定連線. Defaults to None.
+        model_module_list (List[str], optional): 模型模組列表. Defaults to ["db.models"].
+
+    Raises:
+        ValueError: 設定檔不存在
+
+    Returns:
+        dict
+    """
+    if db_profile not in DB_PROFILE_DICT:
+        raise ValueError(
+            f'資料庫效能設定檔 [{db_profile}] 不存在，可用的設定檔: {list(DB_PROFILE_DICT)}')
+    profile_dict = DB_PROFILE_DICT[db_profile]
+    if is_read_connection is None:
+        is_read_connection = profile_dict['is_read_connection']
+
+    # PRAGMA 與唯讀連線僅適用於 SQLite 檔案 (記憶體資料庫的每個連線各自獨立)
+    write_connection_dict = expand_db_url(db_url)
+    is_sqlite = write_connection_dict['engine'] == 'tortoise.backends.sqlite'
+    if not is_sqlite or write_connection_dict['credentials']['file_path'] == ':memory:':
+        is_read_connection = False
+    if is_sqlite:
+        write_connection_dict['credentials'].update(profile_dict['pragma_dict'])
+
+    connection_dict = {WRITE_CONNECTION_NAME: write_connection_dict}
+    if is_read_connection:
+        read_connection_dict = expand_db_url(db_url)
+        read_connection_dict['credentials'].update(
+            profile_dict['pragma_dict'],
+            # 防止誤用唯讀連線寫入
+            query_only='ON',
+        )
+        connection_dict[READ_CONNECTION_NAME] = read_connection_dict
+
+    return dict(
+        connections=connection_dict,
+        apps=dict(models=dict(
+            models=model_module_list,
+            default_connection=WRITE_CONNECTION_NAME,
+        )),
+        routers=['db.router.ReadWriteRouter'] if is_read_connection else [],
+    )
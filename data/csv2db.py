@@ -1,107 +1,529 @@
 from pathlib import Path  # nopep8
 import sys  # nopep8
 sys.path.append(str(Path(__file__).resolve().parent.parent))  # nopep8
+import argparse
+import datetime
+import json
+import sqlite3
+import time
+from typing import Dict, Iterable, List, Tuple
 from tortoise import Tortoise, run_async
+from tortoise.transactions import in_transaction
+from config import get_tortoise_config
 from db.models import *
 import pandas as pd
-import sqlite3
 from tqdm import trange
 from loguru import logger
 
+from utils import tags_str_2_tag_str_list
+
+# 每個交易寫入的表符數量
+TRANSACTION_EMOJI_N = 5000
+# 每次 INSERT 寫入的資料列數量
+BATCH_SIZE = 500
+# taggit_taggeditem 中表符的 content_type_id
+EMOJI_CONTENT_TYPE_ID = 9
+# 串流匯入: 每次讀取的 CSV 資料列數量
+STREAM_CHUNK_SIZE = 5000
+# 串流匯入: 暫存資料表 → (CSV 檔名, 欄位)
+STAGING_TABLE_DICT = {
+    'myapp_emoji': ('myapp_emoji.csv', ['id', 'url', 'imagehash_str']),
+    'taggit_tag': ('taggit_tag.csv', ['id', 'name']),
+    'taggit_taggeditem': ('taggit_taggeditem.csv', ['object_id', 'content_type_id', 'tag_id']),
+}
+# 串流匯入: 暫存資料庫 (CSV 未異動時沿用，續傳、--reset 與重新同步皆不必重新暫存)
+STAGING_DB_PATH = Path(__file__).parent / 'csv_staging.sqlite3'
+# 串流匯入: 暫存資料庫的來源資料表 (CSV 的大小與修改時間；暫存完成時才寫入)
+STAGING_SOURCE_TABLE_NAME = 'staging_source'
+# 串流匯入: 匯入進度資料表 (與表符在同一交易中寫入)
+CHECKPOINT_TABLE_NAME = 'csv_import_checkpoint'
+
 myapp_emoji_df = None
 taggit_tag_df = None
 taggit_taggeditem_df = None
 myapp_combindemoji_df = None
 
 
-def prepare_dfs():
+def prepare_dfs(import_data_n: int = None):
     """ 獲取 DF 資料表
+
+    Args:
+        import_data_n (int, optional): 各個資料表獲取數量，None 表示全部. Defaults to None.
     """
     global myapp_emoji_df
     global taggit_tag_df
     global taggit_taggeditem_df
     global myapp_combindemoji_df
 
-    # 設定各個資料表獲取數量
-    # IMPORT_DATA_N = -1
-    IMPORT_DATA_N = 200
-
     # 新增表符: 先獲取 CSV 中的表符資料
     logger.info(f'載入 myapp_emoji_df ...')
     myapp_emoji_df = pd.read_csv(
-        Path(__file__).parent / '../data/myapp_emoji.csv'
-    ).head(IMPORT_DATA_N)
+        Path(__file__).parent / '../data/myapp_emoji.csv',
+        nrows=import_data_n,
+    )
 
-    # 新增標籤: 先獲取 CSV 中的標籤資料
+    # 新增標籤: 先獲取 CSV 中的標籤資料 (標籤關聯皆須能對應到標籤，故不限制數量)
     logger.info(f'載入 taggit_tag_df ...')
     taggit_tag_df = pd.read_csv(
         Path(__file__).parent / '../data/taggit_tag.csv'
-    ).head(IMPORT_DATA_N)
+    )
 
     logger.info(f'載入 taggit_taggeditem_df ...')
     taggit_taggeditem_df = pd.read_csv(
         Path(__file__).parent / '../data/taggit_taggeditem.csv'
-    ).head(IMPORT_DATA_N)
+    )
 
     logger.info(f'載入 myapp_combindemoji_df ...')
     myapp_combindemoji_df = pd.read_csv(
-        Path(__file__).parent / '../data/myapp_combindemoji.csv'
-    ).head(IMPORT_DATA_N)
+        Path(__file__).parent / '../data/myapp_combindemoji.csv',
+        nrows=import_data_n,
+    )
 
 
 async def init_db():
     """ 初始化資料庫
     """
-    await Tortoise.init(db_url="sqlite://db.sqlite3", modules={"models": ["db.models"]})
+    # 單一寫入者的批量匯入: 不使用唯讀連線，交易中的查詢與寫入共用同一連線
+    await Tortoise.init(config=get_tortoise_config(is_read_connection=False))
     await Tortoise.generate_schemas()
+    await Emoji.create_tag_relation_index()
+
+
+def get_emoji_tag_df() -> pd.DataFrame:
+    """ 以單一 merge 獲取表符與標籤名稱的對照表
+
+    標籤名稱以與 EmojiAddTagsIn 相同的方式正規化 (以逗號分隔、去除前後空白)
+
+    Returns:
+        pd.DataFrame: 欄位為 object_id (CSV 中的表符 ID), tag_str (標籤名稱)
+    """
+    emoji_tag_df = taggit_taggeditem_df.loc[
+        taggit_taggeditem_df['content_type_id'] == EMOJI_CONTENT_TYPE_ID,
+        ['object_id', 'tag_id'],
+    ].merge(
+        taggit_tag_df[['id', 'name']].rename(columns={'id': 'tag_id'}),
+        on='tag_id',
+    )
+    emoji_tag_df = emoji_tag_df[emoji_tag_df['name'].map(
+        lambda name: isinstance(name, str))]
+    emoji_tag_df = emoji_tag_df.assign(
+        tag_str=emoji_tag_df['name'].map(tags_str_2_tag_str_list)
+    ).explode('tag_str').dropna(subset=['tag_str'])
+    return emoji_tag_df[['object_id', 'tag_str']].drop_duplicates()
+
+
+async def get_tag_dict(tag_str_list: List[str]) -> Dict[str, Tag]:
+    """ 一次獲取所有標籤 (若資料庫無此標籤則以 bulk_create 新增)
+
+    Args:
+        tag_str_list (List[str]): 標籤名稱列表
+
+    Returns:
+        Dict[str, Tag]: 標籤名稱 → 標籤
+    """
+    tag_dict = {tag.name: tag for tag in await Tag.all()}
+    new_tag_list = [
+        Tag(name=tag_str)
+        for tag_str in sorted(set(tag_str_list) - set(tag_dict))
+    ]
+    async with in_transaction() as connection:
+        await Tag.bulk_create(new_tag_list, batch_size=BATCH_SIZE, using_db=connection)
+    logger.info(f'新增 {len(new_tag_list)} 個標籤')
+    tag_dict.update({tag.name: tag for tag in new_tag_list})
+    return tag_dict
 
 
 async def import_emoji_data():
     """ 自 CSV 匯入表符資料
+
+    1. 以網址去除重複，並略過資料庫中已存在的表符 (可重複執行)
+    2. 以單一 merge/groupby 獲取各表符的標籤名稱列表
+    3. 一次獲取所有標籤
+    4. 每 TRANSACTION_EMOJI_N 個表符為一個交易，以 bulk insert 寫入表符與標籤的關聯
+    """
+    start_time = time.perf_counter()
+
+    # 以網址去除重複，並略過資料庫中已存在的表符
+    emoji_df = myapp_emoji_df.drop_duplicates('url')
+    existing_url_set = set(await Emoji.all().values_list('url', flat=True))
+    emoji_df = emoji_df[~emoji_df['url'].isin(existing_url_set)]
+    logger.info(f'待匯入 {len(emoji_df)} 個表符 (略過 {len(existing_url_set)} 個已存在的網址)')
+
+    # 獲取各表符的標籤名稱列表
+    emoji_tag_df = get_emoji_tag_df()
+    emoji_tag_df = emoji_tag_df[emoji_tag_df['object_id'].isin(emoji_df['id'])]
+    tag_str_list_dict: Dict[int, List[str]] = emoji_tag_df\
+        .groupby('object_id')['tag_str']\
+        .agg(list)\
+        .to_dict()
+
+    # 一次獲取所有標籤
+    tag_dict = await get_tag_dict(emoji_tag_df['tag_str'].unique().tolist())
+
+    # 依 CSV 順序給予遞增的建立時間，使分頁排序與逐筆匯入時相同
+    base_created_at = datetime.datetime.now(datetime.timezone.utc)
+    relation_n = 0
+    emoji_tuple_list = list(emoji_df[['id', 'url', 'imagehash_str']].itertuples(index=False))
+    for emoji_i in trange(0, len(emoji_tuple_list), TRANSACTION_EMOJI_N):
+        emoji_tag_list_tuple_list = []
+        for emoji_j, (emoji_int_id, url, average_hash_str) in enumerate(
+                emoji_tuple_list[emoji_i:emoji_i+TRANSACTION_EMOJI_N], start=emoji_i):
+            emoji = Emoji(
+                url=url,
+                average_hash_str=average_hash_str,
+                created_at=base_created_at+datetime.timedelta(microseconds=emoji_j),
+            )
+            tag_list = [
+                tag_dict[tag_str]
+                for tag_str in tag_str_list_dict.get(emoji_int_id, [])
+            ]
+            emoji_tag_list_tuple_list.append((emoji, tag_list))
+            relation_n += len(tag_list)
+
+        async with in_transaction() as connection:
+            await Emoji.bulk_create(
+                [emoji for emoji, _ in emoji_tag_list_tuple_list],
+                batch_size=BATCH_SIZE,
+                using_db=connection,
+            )
+            await Emoji.bulk_add_tags(
+                emoji_tag_list_tuple_list,
+                using_db=connection,
+                batch_size=BATCH_SIZE,
+            )
+
+    elapsed_s = time.perf_counter()-start_time
+    logger.info(
+        f'匯入 {len(emoji_tuple_list)} 個表符、{relation_n} 個標籤關聯，耗時 {elapsed_s:.1f} 秒 '
+        f'({len(emoji_tuple_list)/elapsed_s:.0f} 表符/秒, {relation_n/elapsed_s:.0f} 關聯/秒)'
+    )
+
+
+async def import_combind_emoji_data(combindemoji_df_iter: Iterable[pd.DataFrame]):
+    """ 自 CSV 匯入組合表符 (須先匯入表符，才能將每一格連結至表符)
+
+    略過資料庫中已存在的組合表符字串 (可重複執行)，每批在同一交易中寫入
+
+    Args:
+        combindemoji_df_iter (Iterable[pd.DataFrame]): 組合表符資料表 (可分批)
+    """
+    start_time = time.perf_counter()
+    base_created_at = datetime.datetime.now(datetime.timezone.utc)
+    combind_n = 0
+    for combindemoji_df in combindemoji_df_iter:
+        combindemoji_df = combindemoji_df\
+            .dropna(subset=['combind_url'])\
+            .drop_duplicates('combind_url')
+        existing_combind_url_set = set(await CombindEmoji.filter(
+            combind_url__in=combindemoji_df['combind_url'].tolist()
+        ).values_list('combind_url', flat=True))
+        combindemoji_df = combindemoji_df[
+            ~combindemoji_df['combind_url'].isin(existing_combind_url_set)
+        ].sort_values('id')
+
+        # 依來源 ID 給予遞增的建立時間，使分頁排序與來源順序相同
+        async with in_transaction() as connection:
+            await CombindEmoji.bulk_add(
+                combindemoji_df['combind_url'].tolist(),
+                created_at_list=[
+                    base_created_at+datetime.timedelta(microseconds=int(source_id))
+                    for source_id in combindemoji_df['id']
+                ],
+                using_db=connection,
+                batch_size=BATCH_SIZE,
+            )
+        combind_n += len(combindemoji_df)
+
+    elapsed_s = time.perf_counter()-start_time
+    logger.info(
+        f'匯入 {combind_n} 個組合表符，耗時 {elapsed_s:.1f} 秒 '
+        f'({combind_n/elapsed_s:.0f} 組合表符/秒)'
+    )
+
+
+def get_csv_signature() -> str:
+    """ 獲取各 CSV 的大小與修改時間 (用以判斷暫存資料庫是否可沿用)
+
+    Returns:
+        str
+    """
+    signature_dict = {}
+    for csv_name, _ in STAGING_TABLE_DICT.values():
+        stat = (Path(__file__).parent / csv_name).stat()
+        signature_dict[csv_name] = [stat.st_size, stat.st_mtime_ns]
+    return json.dumps(signature_dict, sort_keys=True)
+
+
+def stage_csv(staging_db: sqlite3.Connection, chunk_size: int):
+    """ 將 CSV 分批寫入暫存資料庫 (記憶體用量與 CSV 大小無關)，並建立以來源 ID 查詢的索引
+
+    Args:
+        staging_db (sqlite3.Connection): 暫存資料庫
+        chunk_size (int): 每次讀取的資料列數量
     """
-    # 批量新增表符
-    for emoji_i in trange(len(myapp_emoji_df)):
-
-        # 新增表符
-        emoji = await Emoji.create(
-            url=myapp_emoji_df.iloc[emoji_i]["url"],
-            average_hash_str=myapp_emoji_df.iloc[emoji_i]["imagehash_str"],
-        )
-
-        # 獲取表符的標籤
-        emoji_int_id = myapp_emoji_df.iloc[emoji_i]['id']
-        tag_id_list = taggit_taggeditem_df[
-            (taggit_taggeditem_df['object_id'] == emoji_int_id) &
-            (taggit_taggeditem_df['content_type_id'] == 9)
-        ]['tag_id']
-        tag_str_list = taggit_tag_df[taggit_tag_df['id'].isin(
-            tag_id_list)]['name']
-        tags_str = ','.join(
-            [tag_str for tag_str in tag_str_list if isinstance(tag_str, str)])
-
-        # 新增表符的標籤
-        await emoji.add_tags(
-            EmojiAddTagsIn(tags_str=tags_str)
-        )
-
-    # sql.close()
-
-
-async def main():
+    for table_name, (csv_name, column_list) in STAGING_TABLE_DICT.items():
+        logger.info(f'暫存 {csv_name} ...')
+        for chunk_df in pd.read_csv(
+                Path(__file__).parent / csv_name,
+                usecols=column_list,
+                chunksize=chunk_size):
+            chunk_df.to_sql(table_name, staging_db, if_exists='append', index=False)
+    staging_db.executescript(
+        'CREATE INDEX "idx_myapp_emoji_id" ON "myapp_emoji" ("id");'
+        'CREATE INDEX "idx_taggit_tag_id" ON "taggit_tag" ("id");'
+        'CREATE INDEX "idx_taggit_taggeditem_object_id" ON "taggit_taggeditem" ("object_id");'
+    )
+
+
+def open_staging_db(
+        chunk_size: int,
+        staging_db_path: Path = STAGING_DB_PATH) -> sqlite3.Connection:
+    """ 開啟暫存資料庫
+
+    暫存 CSV 的完整內容 (與匯入進度無關)，因此 CSV 未異動 (大小與修改時間相同) 時，
+    不論匯入進度或是否 --reset 皆沿用；否則 (含上次暫存中斷) 重新暫存。
+    來源資料表於暫存完成時才寫入，因此暫存一半的資料庫不會被沿用
+
+    Args:
+        chunk_size (int): 每次讀取的資料列數量
+        staging_db_path (Path, optional): 暫存資料庫路徑. Defaults to STAGING_DB_PATH.
+
+    Returns:
+        sqlite3.Connection
+    """
+    csv_signature = get_csv_signature()
+    if staging_db_path.exists():
+        staging_db = sqlite3.connect(staging_db_path)
+        try:
+            source_row = staging_db.execute(
+                f'SELECT "csv_signature" FROM "{STAGING_SOURCE_TABLE_NAME}"'
+            ).fetchone()
+        except sqlite3.DatabaseError:
+            source_row = None
+        if source_row and source_row[0] == csv_signature:
+            logger.info(f'CSV 未異動，沿用暫存資料庫 {staging_db_path.name}')
+            return staging_db
+        staging_db.close()
+        staging_db_path.unlink()
+
+    staging_db = sqlite3.connect(staging_db_path)
+    stage_csv(staging_db, chunk_size)
+    with staging_db:
+        staging_db.execute(
+            f'CREATE TABLE "{STAGING_SOURCE_TABLE_NAME}" ("csv_signature" TEXT NOT NULL)')
+        staging_db.execute(
+            f'INSERT INTO "{STAGING_SOURCE_TABLE_NAME}" VALUES (?)', (csv_signature,))
+    return staging_db
+
+
+def iter_staged_emoji_chunk(
+        staging_db: sqlite3.Connection,
+        after_source_id: int,
+        chunk_size: int) -> Iterable[Tuple[List[tuple], Dict[int, List[str]]]]:
+    """ 依來源 ID 遞增順序，分批讀取暫存的表符與其標籤名稱列表
+
+    Args:
+        staging_db (sqlite3.Connection): 暫存資料庫
+        after_source_id (int): 自此來源 ID 之後開始讀取
+        chunk_size (int): 每批表符數量
+
+    Yields:
+        Tuple[List[tuple], Dict[int, List[str]]]: ((來源 ID, 網址, 平均哈希值) 列表, 來源 ID → 標籤名稱列表)
+    """
+    while True:
+        emoji_row_list = staging_db.execute(
+            'SELECT "id", "url", "imagehash_str" FROM "myapp_emoji" '
+            'WHERE "id" > ? ORDER BY "id" LIMIT ?',
+            (after_source_id, chunk_size),
+        ).fetchall()
+        if not emoji_row_list:
+            return
+        after_source_id = emoji_row_list[-1][0]
+
+        # 獲取此批表符的標籤名稱 (與 EmojiAddTagsIn 相同的正規化)
+        tag_str_list_dict: Dict[int, List[str]] = {}
+        for object_id, tag_name in staging_db.execute(
+                'SELECT "i"."object_id", "t"."name" FROM "taggit_taggeditem" "i" '
+                'JOIN "taggit_tag" "t" ON "t"."id" = "i"."tag_id" '
+                'WHERE "i"."content_type_id" = ? AND "i"."object_id" BETWEEN ? AND ?',
+                (EMOJI_CONTENT_TYPE_ID, emoji_row_list[0][0], after_source_id)):
+            if isinstance(tag_name, str):
+                tag_str_list_dict.setdefault(object_id, []).extend(
+                    tags_str_2_tag_str_list(tag_name))
+        yield emoji_row_list, {
+            object_id: list(dict.fromkeys(tag_str_list))
+            for object_id, tag_str_list in tag_str_list_dict.items()
+        }
+
+
+async def get_checkpoint() -> int:
+    """ 獲取串流匯入進度 (最後匯入的來源表符 ID)
+
+    Returns:
+        int: 若尚未匯入則為 0
+    """
+    connection = Tortoise.get_connection('default')
+    await connection.execute_script(
+        f'CREATE TABLE IF NOT EXISTS "{CHECKPOINT_TABLE_NAME}" '
+        '("name" VARCHAR(50) NOT NULL PRIMARY KEY, "last_source_id" INT NOT NULL)'
+    )
+    _, row_list = await connection.execute_query(
+        f'SELECT "last_source_id" FROM "{CHECKPOINT_TABLE_NAME}" WHERE "name" = ?',
+        ['myapp_emoji'],
+    )
+    return row_list[0]['last_source_id'] if row_list else 0
+
+
+async def set_checkpoint(last_source_id: int, using_db):
+    """ 記錄串流匯入進度
+
+    Args:
+        last_source_id (int): 最後匯入的來源表符 ID
+        using_db: 資料庫連線 (與此批表符同一交易)
+    """
+    await using_db.execute_query(
+        f'INSERT OR REPLACE INTO "{CHECKPOINT_TABLE_NAME}" ("name", "last_source_id") VALUES (?, ?)',
+        ['myapp_emoji', last_source_id],
+    )
+
+
+async def stream_import_emoji_data(chunk_size: int = STREAM_CHUNK_SIZE, reset: bool = False):
+    """ 串流匯入表符資料 (可中斷後續傳)
+
+    1. 將 CSV 分批寫入暫存的 sqlite3 資料庫，並依來源 ID 建立索引
+       (保存於 STAGING_DB_PATH: CSV 未異動時沿用，續傳、--reset 或重新同步皆不必重新暫存)
+    2. 依來源 ID 遞增順序，每次讀取 chunk_size 個表符與其標籤
+    3. 每批的標籤、表符、標籤關聯與匯入進度在同一交易中寫入: 中斷時僅會遺失未完成的一批，
+       重新執行即自上次的進度繼續
+    4. 以網址判斷表符是否已存在 (已存在者僅補上缺少的標籤關聯)，因此重複匯入或自新的資料匯出檔同步皆安全
+
+    自新的資料匯出檔同步時，僅讀取來源 ID 大於匯入進度的表符: 已匯入的表符於匯出檔中的標籤異動不會再比對，
+    須以 reset 自頭比對 (僅補上新增的標籤，匯出檔中已移除的標籤不會自資料庫移除)
+
+    Args:
+        chunk_size (int, optional): 每批表符數量. Defaults to STREAM_CHUNK_SIZE.
+        reset (bool, optional): 是否忽略先前的匯入進度而自頭開始. Defaults to False.
+    """
+    start_time = time.perf_counter()
+    after_source_id = 0 if reset else await get_checkpoint()
+    logger.info(f'自來源 ID {after_source_id} 之後開始匯入')
+
+    base_created_at = datetime.datetime.now(datetime.timezone.utc)
+    emoji_n = 0
+    relation_n = 0
+    staging_db = open_staging_db(chunk_size)
+    try:
+        for emoji_row_list, tag_str_list_dict in iter_staged_emoji_chunk(
+                staging_db, after_source_id, chunk_size):
+            # 以網址比對資料庫中已存在的表符
+            emoji_dict: Dict[str, Emoji] = {
+                emoji.url: emoji
+                for emoji in await Emoji.filter(
+                    url__in=list({url for _, url, _ in emoji_row_list}))
+            }
+            new_emoji_list: List[Emoji] = []
+            emoji_tag_str_list_dict: Dict[str, List[str]] = {}
+            for source_id, url, average_hash_str in emoji_row_list:
+                if url not in emoji_dict:
+                    # 依來源 ID 給予遞增的建立時間，使分頁排序與來源順序相同
+                    emoji_dict[url] = Emoji(
+                        url=url,
+                        average_hash_str=average_hash_str,
+                        created_at=base_created_at+datetime.timedelta(microseconds=source_id),
+                    )
+                    new_emoji_list.append(emoji_dict[url])
+                emoji_tag_str_list_dict.setdefault(url, []).extend(
+                    tag_str_list_dict.get(source_id, []))
+
+            # 獲取此批的標籤 (缺少的標籤於交易中新增)
+            tag_str_set = {
+                tag_str
+                for tag_str_list in emoji_tag_str_list_dict.values()
+                for tag_str in tag_str_list
+            }
+            tag_dict: Dict[str, Tag] = {
+                tag.name: tag
+                for tag in await Tag.filter(name__in=list(tag_str_set))
+            }
+            new_tag_list = [
+                Tag(name=tag_str) for tag_str in sorted(tag_str_set - set(tag_dict))
+            ]
+            tag_dict.update({tag.name: tag for tag in new_tag_list})
+
+            emoji_tag_list_tuple_list = [
+                (emoji_dict[url], [tag_dict[tag_str] for tag_str in dict.fromkeys(tag_str_list)])
+                for url, tag_str_list in emoji_tag_str_list_dict.items()
+            ]
+            async with in_transaction() as connection:
+                await Tag.bulk_create(new_tag_list, batch_size=BATCH_SIZE, using_db=connection)
+                await Emoji.bulk_create(new_emoji_list, batch_size=BATCH_SIZE, using_db=connection)
+                await Emoji.bulk_add_tags(
+                    emoji_tag_list_tuple_list,
+                    using_db=connection,
+                    batch_size=BATCH_SIZE,
+                )
+                await set_checkpoint(emoji_row_list[-1][0], using_db=connection)
+
+            emoji_n += len(new_emoji_list)
+            relation_n += sum(len(tag_list) for _, tag_list in emoji_tag_list_tuple_list)
+            elapsed_s = time.perf_counter()-start_time
+            logger.info(
+                f'已匯入至來源 ID {emoji_row_list[-1][0]}: 新增 {emoji_n} 個表符 '
+                f'({emoji_n/elapsed_s:.0f} 表符/秒)'
+            )
+    finally:
+        staging_db.close()
+
+    elapsed_s = time.perf_counter()-start_time
+    logger.info(
+        f'串流匯入完成: 新增 {emoji_n} 個表符，寫入 {relation_n} 個標籤關聯 (含已存在者)，'
+        f'耗時 {elapsed_s:.1f} 秒'
+    )
+
+
+async def main(
+        import_data_n: int = None,
+        stream: bool = False,
+        chunk_size: int = STREAM_CHUNK_SIZE,
+        reset: bool = False):
     logger.info(f'初始化資料庫')
     await init_db()
 
+    if stream:
+        logger.info(f'自 CSV 串流匯入表符')
+        await stream_import_emoji_data(chunk_size=chunk_size, reset=reset)
+
+        logger.info(f'自 CSV 串流匯入組合表符')
+        await import_combind_emoji_data(pd.read_csv(
+            Path(__file__).parent / 'myapp_combindemoji.csv',
+            chunksize=chunk_size,
+        ))
+        return
+
     logger.info(f'獲取 DF 資料表')
-    prepare_dfs()
+    prepare_dfs(import_data_n)
 
     logger.info(f'自 CSV 匯入表符')
     await import_emoji_data()
 
-    # logger.info(f'自 CSV 匯入標籤')
-    # await import_tag_data()
-
-    # await import_tagged_emoji_data()
+    logger.info(f'自 CSV 匯入組合表符')
+    await import_combind_emoji_data([myapp_combindemoji_df])
 
 
 if __name__ == '__main__':
-    run_async(main())
+    parser = argparse.ArgumentParser(
+        description='自 CSV 匯入表符資料',
+        epilog='伺服器運行中時，匯入後須重新啟動伺服器或送出 SIGHUP (kill -HUP <pid>) 以重新載入索引與回應快取')
+    parser.add_argument('import_data_n', type=int, nargs='?', help='匯入數量 (僅一次載入模式，預設為全部)')
+    parser.add_argument(
+        '--stream', action='store_true',
+        help='串流匯入 (分批讀取，可中斷後續傳；僅匯入來源 ID 大於匯入進度的表符，'
+             '已匯入表符的標籤異動不會再比對)')
+    parser.add_argument('--chunk-size', type=int, default=STREAM_CHUNK_SIZE, help='串流匯入每批表符數量')
+    parser.add_argument(
+        '--reset', action='store_true',
+        help='串流匯入時忽略先前的匯入進度，自頭比對所有表符 (補上缺少的標籤關聯；不移除標籤)')
+    args = parser.parse_args()
+    run_async(main(args.import_data_n, args.stream, args.chunk_size, args.reset))
+    # 伺服器的索引與回應快取僅隨其自身的寫入更新
+    logger.info('若伺服器運行中，請重新啟動伺服器或送出 SIGHUP (kill -HUP <pid>) 以重新載入索引')
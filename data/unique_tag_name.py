@@ -0,0 +1,55 @@
+""" 為既有資料庫的 Tag.name 加上唯一約束
+
+新建立的資料庫會由 generate_schemas 自動建立唯一約束，既有的資料庫則需執行此腳本:
+先將同名的標籤合併至最早建立的標籤 (表符關聯一併轉移)，再建立唯一索引
+"""
+from pathlib import Path  # nopep8
+import sys  # nopep8
+sys.path.append(str(Path(__file__).resolve().parent.parent))  # nopep8
+from tortoise import Tortoise, run_async
+from config import get_tortoise_config
+from db.models import *
+from loguru import logger
+
+
+async def init_db():
+    """ 初始化資料庫
+    """
+    await Tortoise.init(config=get_tortoise_config(is_read_connection=False))
+    await Tortoise.generate_schemas()
+
+
+async def merge_duplicate_tags():
+    """ 合併同名的標籤
+    """
+    _, row_list = await Tortoise.get_connection('default').execute_query(
+        'SELECT "name" FROM "tag" GROUP BY "name" HAVING COUNT(*) > 1'
+    )
+    for row in row_list:
+        keep_tag, *duplicate_tag_list = await Tag\
+            .filter(name=row['name'])\
+            .order_by('created_at')
+        emoji_list = await Emoji.filter(
+            _tag_list__id__in=[tag.id for tag in duplicate_tag_list]
+        ).distinct()
+        await keep_tag.emoji_list.add(*emoji_list)
+        for tag in duplicate_tag_list:
+            await tag.delete()
+        logger.info(f'合併標籤 [{keep_tag.name}]: 移除 {len(duplicate_tag_list)} 個重複標籤')
+
+
+async def main():
+    logger.info(f'初始化資料庫')
+    await init_db()
+
+    logger.info(f'合併同名的標籤')
+    await merge_duplicate_tags()
+
+    logger.info(f'建立 Tag.name 唯一索引')
+    await Tortoise.get_connection('default').execute_script(
+        'CREATE UNIQUE INDEX IF NOT EXISTS "uid_tag_name" ON "tag" ("name")'
+    )
+
+
+if __name__ == '__main__':
+    run_async(main())
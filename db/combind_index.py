@@ -0,0 +1,108 @@
+""" 常駐記憶體的組合表符索引 (表符 ID → 組合表符 ID 集合)
+"""
+import datetime
+import heapq
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from uuid import UUID
+
+
+class CombindEmojiIndex:
+    """ 組合表符索引
+
+    記錄每個表符出現在哪些組合表符中，使以表符或標籤查詢組合表符時
+    不需掃描組合表符字串。於程序啟動時自資料庫載入，並在新增組合表符或刪除表符時同步更新
+    """
+
+    def __init__(self):
+        # 表符 ID → 組合表符 ID 集合
+        self._combind_id_set_dict: Dict[UUID, Set[UUID]] = {}
+        # 組合表符 ID → 排序鍵 (建立時間, 組合表符 ID)
+        self._sort_key_dict: Dict[UUID, Tuple[datetime.datetime, UUID]] = {}
+
+    @property
+    def combind_n(self) -> int:
+        """ 組合表符總數
+        """
+        return len(self._sort_key_dict)
+
+    def load(
+            self,
+            combind_id_created_at_tuple_list: Iterable[Tuple[UUID, datetime.datetime]],
+            combind_id_emoji_id_tuple_list: Iterable[Tuple[UUID, UUID]]):
+        """ 載入組合表符與其表符以重建索引
+
+        Args:
+            combind_id_created_at_tuple_list (Iterable[Tuple[UUID, datetime.datetime]]):
+                (組合表符 ID, 建立時間) 列表
+            combind_id_emoji_id_tuple_list (Iterable[Tuple[UUID, UUID]]):
+                (組合表符 ID, 表符 ID) 列表
+        """
+        self._combind_id_set_dict.clear()
+        self._sort_key_dict.clear()
+        for combind_id, created_at in combind_id_created_at_tuple_list:
+            self._sort_key_dict[combind_id] = (created_at, combind_id)
+        for combind_id, emoji_id in combind_id_emoji_id_tuple_list:
+            self._combind_id_set_dict.setdefault(emoji_id, set()).add(combind_id)
+
+    def add(
+            self,
+            combind_id: UUID,
+            created_at: datetime.datetime,
+            emoji_id_list: Iterable[UUID]):
+        """ 新增組合表符
+
+        Args:
+            combind_id (UUID): 組合表符 ID
+            created_at (datetime.datetime): 建立時間
+            emoji_id_list (Iterable[UUID]): 組合表符中已連結的表符 ID
+        """
+        self._sort_key_dict[combind_id] = (created_at, combind_id)
+        for emoji_id in emoji_id_list:
+            self._combind_id_set_dict.setdefault(emoji_id, set()).add(combind_id)
+
+    def remove_emoji(self, emoji_id: UUID):
+        """ 移除表符 (組合表符本身保留其網址)
+
+        Args:
+            emoji_id (UUID): 表符 ID
+        """
+        self._combind_id_set_dict.pop(emoji_id, None)
+
+    def get_combind_id_set(self, emoji_id_iter: Iterable[UUID]) -> Set[UUID]:
+        """ 獲取含有任一這些表符的組合表符 ID 集合
+
+        Args:
+            emoji_id_iter (Iterable[UUID]): 表符 ID
+
+        Returns:
+            Set[UUID]
+        """
+        combind_id_set: Set[UUID] = set()
+        for emoji_id in emoji_id_iter:
+            combind_id_set |= self._combind_id_set_dict.get(emoji_id, set())
+        return combind_id_set
+
+    def get_sorted_combind_id_list(
+            self,
+            combind_id_set: Optional[Set[UUID]],
+            offset_n: int,
+            limit_n: int) -> List[UUID]:
+        """ 將組合表符 ID 依 (建立時間, 組合表符 ID) 由新至舊排序後，取出指定範圍
+
+        Args:
+            combind_id_set (Optional[Set[UUID]]): 組合表符 ID 集合，None 表示所有組合表符
+            offset_n (int): 位移量
+            limit_n (int): 數量
+
+        Returns:
+            List[UUID]
+        """
+        return heapq.nlargest(
+            offset_n+limit_n,
+            self._sort_key_dict if combind_id_set is None else combind_id_set,
+            key=self._sort_key_dict.__getitem__,
+        )[offset_n:]
+
+
+# 程序共用的組合表符索引
+combind_index = CombindEmojiIndex()
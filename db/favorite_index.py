@@ -0,0 +1,85 @@
+""" 常駐記憶體的收藏索引 (使用者 uid → 收藏的表符 ID 集合)
+"""
+from typing import Dict, Iterable, Set, Tuple
+from uuid import UUID
+
+
+class FavoriteIndex:
+    """ 收藏索引
+
+    於程序啟動時自資料庫載入，並在新增/移除收藏或刪除表符時同步更新，
+    使收藏篩選可與標籤倒排索引的結果直接求交集
+    """
+
+    def __init__(self):
+        # 使用者 uid → 收藏的表符 ID 集合
+        self._emoji_id_set_dict: Dict[str, Set[UUID]] = {}
+        # 表符 ID → 收藏此表符的使用者 uid 集合 (刪除表符時用以回收)
+        self._uid_set_dict: Dict[UUID, Set[str]] = {}
+
+    def load(self, uid_emoji_id_tuple_list: Iterable[Tuple[str, UUID]]):
+        """ 載入 (使用者 uid, 表符 ID) 列表以重建索引
+
+        Args:
+            uid_emoji_id_tuple_list (Iterable[Tuple[str, UUID]]): (使用者 uid, 表符 ID) 列表
+        """
+        self._emoji_id_set_dict.clear()
+        self._uid_set_dict.clear()
+        for uid, emoji_id in uid_emoji_id_tuple_list:
+            self.add(uid, emoji_id)
+
+    def add(self, uid: str, emoji_id: UUID):
+        """ 新增收藏
+
+        Args:
+            uid (str): 使用者 uid
+            emoji_id (UUID): 表符 ID
+        """
+        self._emoji_id_set_dict.setdefault(uid, set()).add(emoji_id)
+        self._uid_set_dict.setdefault(emoji_id, set()).add(uid)
+
+    def remove(self, uid: str, emoji_id: UUID):
+        """ 移除收藏
+
+        Args:
+            uid (str): 使用者 uid
+            emoji_id (UUID): 表符 ID
+        """
+        self._emoji_id_set_dict.get(uid, set()).discard(emoji_id)
+        self._uid_set_dict.get(emoji_id, set()).discard(uid)
+
+    def remove_emoji(self, emoji_id: UUID):
+        """ 移除表符 (自所有使用者的收藏中移除)
+
+        Args:
+            emoji_id (UUID): 表符 ID
+        """
+        for uid in self._uid_set_dict.pop(emoji_id, set()):
+            self._emoji_id_set_dict[uid].discard(emoji_id)
+
+    def is_favorite(self, uid: str, emoji_id: UUID) -> bool:
+        """ 表符是否已被使用者收藏
+
+        Args:
+            uid (str): 使用者 uid
+            emoji_id (UUID): 表符 ID
+
+        Returns:
+            bool
+        """
+        return emoji_id in self._emoji_id_set_dict.get(uid, ())
+
+    def get_emoji_id_set(self, uid: str) -> Set[UUID]:
+        """ 獲取使用者收藏的表符 ID 集合
+
+        Args:
+            uid (str): 使用者 uid
+
+        Returns:
+            Set[UUID]: 為索引保留的集合，呼叫端不應修改
+        """
+        return self._emoji_id_set_dict.get(uid, set())
+
+
+# 程序共用的收藏索引
+favorite_index = FavoriteIndex()
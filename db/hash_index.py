@@ -0,0 +1,259 @@
+""" 常駐記憶體的平均哈希值索引 (以漢明距離搜尋相似表符)
+"""
+import re
+from typing import Dict, Iterable, List, Tuple
+from uuid import UUID
+
+from loguru import logger
+import numpy as np
+
+
+# 平均哈希值字串的格式: 64 位元，即 16 個 16 進位字元
+AVERAGE_HASH_STR_PATTERN = re.compile(r'^[0-9a-f]{16}$')
+
+
+def is_valid_hash_str(average_hash_str) -> bool:
+    """ 是否為有效的平均哈希值字串 (16 個小寫 16 進位字元)
+
+    Args:
+        average_hash_str: 平均哈希值字串
+
+    Returns:
+        bool
+    """
+    return isinstance(average_hash_str, str) and \
+        AVERAGE_HASH_STR_PATTERN.match(average_hash_str) is not None
+
+
+def hash_str_2_int(average_hash_str: str) -> int:
+    """ 將平均哈希值 16 進位字串轉為整數
+
+    Args:
+        average_hash_str (str): 平均哈希值字串 (例如 'ffc3c3c3c3c3ff00')
+
+    Raises:
+        ValueError: 平均哈希值字串格式錯誤
+
+    Returns:
+        int
+    """
+    if not is_valid_hash_str(average_hash_str):
+        raise ValueError(f'平均哈希值格式錯誤: {average_hash_str!r}')
+    return int(average_hash_str, 16)
+
+
+def filter_valid_hash_str(
+        emoji_id_hash_str_tuple_list: Iterable[Tuple[UUID, str]]) -> List[Tuple[UUID, str]]:
+    """ 過濾出平均哈希值格式正確的 (表符 ID, 平均哈希值字串)，格式錯誤者略過並記錄 (不中斷索引的載入)
+
+    Args:
+        emoji_id_hash_str_tuple_list (Iterable[Tuple[UUID, str]])
+
+    Returns:
+        List[Tuple[UUID, str]]
+    """
+    valid_tuple_list = []
+    for emoji_id, average_hash_str in emoji_id_hash_str_tuple_list:
+        if is_valid_hash_str(average_hash_str):
+            valid_tuple_list.append((emoji_id, average_hash_str))
+        else:
+            logger.warning(f'略過平均哈希值格式錯誤的表符: {emoji_id} ({average_hash_str!r})')
+    return valid_tuple_list
+
+
+def popcount_uint64_array(x: np.ndarray) -> np.ndarray:
+    """ 向量化計算 uint64 陣列中每個元素的位元 1 數量 (SWAR 演算法)
+
+    Args:
+        x (np.ndarray): uint64 陣列
+
+    Returns:
+        np.ndarray: 與 x 形狀相同的 uint64 陣列
+    """
+    x = x - ((x >> np.uint64(1)) & np.uint64(0x5555555555555555))
+    x = (x & np.uint64(0x3333333333333333)) + \
+        ((x >> np.uint64(2)) & np.uint64(0x3333333333333333))
+    x = (x + (x >> np.uint64(4))) & np.uint64(0x0f0f0f0f0f0f0f0f)
+    return (x * np.uint64(0x0101010101010101)) >> np.uint64(56)
+
+
+class HashMatrix:
+    """ 平均哈希值矩陣 (向量化全掃描)
+
+    將所有表符的 64 位元平均哈希值存放於連續的 uint64 陣列，表符 ID 存放於平行陣列，
+    以 XOR 與向量化 popcount 計算漢明距離，並以 argpartition 選出前 k 名，
+    並支援一次查詢多個哈希值
+    """
+    # 批量查詢時每批距離陣列的元素數量上限
+    BATCH_ELEMENT_N = 1 << 16
+
+    def __init__(self, capacity_n: int = 1024):
+        self._hash_array = np.zeros(capacity_n, dtype=np.uint64)
+        self._emoji_id_list: List[UUID] = []
+        # 表符 ID → 陣列位置
+        self._position_dict: Dict[UUID, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._emoji_id_list)
+
+    def load(self, emoji_id_hash_str_tuple_list: Iterable[Tuple[UUID, str]]):
+        """ 載入 (表符 ID, 平均哈希值字串) 列表以重建索引 (略過平均哈希值格式錯誤的表符)
+
+        Args:
+            emoji_id_hash_str_tuple_list (Iterable[Tuple[UUID, str]])
+        """
+        emoji_id_hash_str_tuple_list = filter_valid_hash_str(emoji_id_hash_str_tuple_list)
+        self._emoji_id_list = [
+            emoji_id for emoji_id, _ in emoji_id_hash_str_tuple_list]
+        self._position_dict = {
+            emoji_id: position_n
+            for position_n, emoji_id in enumerate(self._emoji_id_list)
+        }
+        self._hash_array = np.zeros(
+            max(len(self._emoji_id_list)*2, 1024), dtype=np.uint64)
+        self._hash_array[:len(self._emoji_id_list)] = np.array(
+            [
+                hash_str_2_int(average_hash_str)
+                for _, average_hash_str in emoji_id_hash_str_tuple_list
+            ],
+            dtype=np.uint64,
+        )
+
+    def add(self, emoji_id: UUID, average_hash_str: str):
+        """ 新增表符 (若表符已存在則以新的哈希值取代)
+
+        Args:
+            emoji_id (UUID): 表符 ID
+            average_hash_str (str): 平均哈希值字串
+        """
+        hash_int = hash_str_2_int(average_hash_str)
+        position_n = self._position_dict.get(emoji_id)
+        if position_n is not None:
+            self._hash_array[position_n] = hash_int
+            return
+
+        # 容量不足時倍增陣列
+        position_n = len(self._emoji_id_list)
+        if position_n >= len(self._hash_array):
+            self._hash_array = np.concatenate(
+                [self._hash_array, np.zeros_like(self._hash_array)])
+        self._hash_array[position_n] = hash_int
+        self._emoji_id_list.append(emoji_id)
+        self._position_dict[emoji_id] = position_n
+
+    def remove(self, emoji_id: UUID):
+        """ 移除表符 (以陣列最後一個表符填補空位)
+
+        Args:
+            emoji_id (UUID): 表符 ID
+        """
+        position_n = self._position_dict.pop(emoji_id, None)
+        if position_n is None:
+            return
+        last_emoji_id = self._emoji_id_list.pop()
+        last_position_n = len(self._emoji_id_list)
+        if position_n != last_position_n:
+            self._hash_array[position_n] = self._hash_array[last_position_n]
+            self._emoji_id_list[position_n] = last_emoji_id
+            self._position_dict[last_emoji_id] = position_n
+
+    def _get_distance_array(self, hash_str_list: List[str]) -> np.ndarray:
+        """ 計算多個查詢哈希值與所有表符的漢明距離
+
+        Args:
+            hash_str_list (List[str]): 查詢的平均哈希值字串列表
+
+        Returns:
+            np.ndarray: 形狀為 (查詢數量, 表符數量) 的距離陣列
+        """
+        query_hash_array = np.array(
+            [hash_str_2_int(hash_str) for hash_str in hash_str_list],
+            dtype=np.uint64,
+        )
+        return popcount_uint64_array(
+            query_hash_array[:, np.newaxis] ^
+            self._hash_array[np.newaxis, :len(self._emoji_id_list)]
+        )
+
+    def search_radius(
+            self,
+            average_hash_str: str,
+            radius_n: int) -> List[Tuple[int, UUID]]:
+        """ 半徑查詢: 獲取漢明距離不超過 radius_n 的表符
+
+        Args:
+            average_hash_str (str): 查詢的平均哈希值字串
+            radius_n (int): 最大漢明距離
+
+        Returns:
+            List[Tuple[int, UUID]]: (漢明距離, 表符 ID) 列表，依距離由小至大排序
+        """
+        distance_array = self._get_distance_array([average_hash_str])[0]
+        position_array = np.nonzero(distance_array <= radius_n)[0]
+        return sorted(
+            (int(distance_array[position_n]), self._emoji_id_list[position_n])
+            for position_n in position_array
+        )
+
+    def search_top_k(
+            self,
+            average_hash_str: str,
+            k: int) -> List[Tuple[int, UUID]]:
+        """ 前 k 名查詢: 獲取漢明距離最小的 k 個表符
+
+        Args:
+            average_hash_str (str): 查詢的平均哈希值字串
+            k (int): 輸出數量
+
+        Returns:
+            List[Tuple[int, UUID]]: (漢明距離, 表符 ID) 列表，依距離由小至大排序
+        """
+        return self.search_top_k_batch([average_hash_str], k)[0]
+
+    def search_top_k_batch(
+            self,
+            hash_str_list: List[str],
+            k: int) -> List[List[Tuple[int, UUID]]]:
+        """ 批量前 k 名查詢: 一次為多個查詢哈希值各自獲取漢明距離最小的 k 個表符
+
+        Args:
+            hash_str_list (List[str]): 查詢的平均哈希值字串列表
+            k (int): 每個查詢的輸出數量
+
+        Returns:
+            List[List[Tuple[int, UUID]]]: 各查詢的 (漢明距離, 表符 ID) 列表
+        """
+        k = min(k, len(self._emoji_id_list))
+        if k <= 0 or not hash_str_list:
+            return [[] for _ in hash_str_list]
+
+        # 分批計算以控制距離陣列大小，避免暫存陣列超出 CPU 快取
+        chunk_n = max(1, self.BATCH_ELEMENT_N // len(self._emoji_id_list))
+        result_list = []
+        for chunk_i in range(0, len(hash_str_list), chunk_n):
+            distance_array = self._get_distance_array(
+                hash_str_list[chunk_i:chunk_i+chunk_n])
+            # 先以 argpartition 選出前 k 名，再僅排序這 k 個結果
+            position_array = np.argpartition(
+                distance_array, k-1, axis=1)[:, :k]
+            top_k_distance_array = np.take_along_axis(
+                distance_array, position_array, axis=1)
+            order_array = np.argsort(
+                top_k_distance_array, axis=1, kind='stable')
+            position_array = np.take_along_axis(
+                position_array, order_array, axis=1)
+            top_k_distance_array = np.take_along_axis(
+                top_k_distance_array, order_array, axis=1)
+            result_list.extend(
+                [
+                    (int(distance_n), self._emoji_id_list[position_n])
+                    for distance_n, position_n in zip(distance_row, position_row)
+                ]
+                for distance_row, position_row in zip(
+                    top_k_distance_array.tolist(), position_array.tolist())
+            )
+        return result_list
+
+
+# 程序共用的平均哈希值索引
+hash_index = HashMatrix()
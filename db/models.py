@@ -1,39 +1,90 @@
 from __future__ import annotations
-import imagehash
-import pandas as pd
+import asyncio
+import datetime
+from loguru import logger
 from tortoise import fields, models
 from tortoise.contrib.pydantic import pydantic_model_creator
+from tortoise.exceptions import IntegrityError
+from tortoise.transactions import in_transaction
 from pydantic import BaseModel
-from typing import List
+from pypika import Table
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
 from tortoise.query_utils import Prefetch
 
-from schema import EmojiAddTagsIn
+from schema import (
+    EmojiAddTagsIn,
+    EmojiIn,
+    EmojiBulkResultOut,
+    EmojiBulkStatus,
+)
+from db.tag_index import tag_index
+from db.hash_index import hash_index, is_valid_hash_str
+from db.tag_name_index import tag_name_index
+from db.combind_index import combind_index
+from db.favorite_index import favorite_index
+from utils import InvalidImageError, combind_url_2_url_row_list
+from cache import response_cache
+from config import WRITE_CONNECTION_NAME
 
 
 class Tag(models.Model):
     id = fields.UUIDField(pk=True)
-    name = fields.CharField(max_length=100)
+    name = fields.CharField(max_length=100, unique=True)
     created_at = fields.DatetimeField(auto_now_add=True)
     emoji_list = fields.ManyToManyField(
         'models.Emoji', related_name='_tag_list')
 
+    class Meta:
+        # 預設依名稱排序 (prefetch 表符的標籤時僅套用此排序，輸出時不需再排序)
+        ordering = ['name']
+
     @classmethod
     async def get_tag_list_by_str_list(cls, tag_str_list: List[str]) -> List[Tag]:
         """ 根據標籤名稱列表獲取標籤列表 (若資料庫無此標籤則會新增)
 
+        1. 以單一 name__in 查詢獲取已存在的標籤
+        2. 以 bulk_create 新增缺少的標籤
+        3. 重新查詢新增的標籤: 若其他請求同時建立了相同的標籤，
+           Tag.name 的唯一約束會使寫入失敗，此時改為逐一建立並以資料庫中的標籤為準
+
         Args:
             tag_str_list (List[str]): 標籤名稱列表.
 
         Returns:
-            List[Tag]
+            List[Tag]: 依標籤名稱列表順序排列 (重複的名稱僅保留一個)
         """
-        tag_list = []
-        for tag_str in tag_str_list:
-            tag = await cls.filter(name=tag_str).first()
-            if not tag:
-                tag = await cls.create(name=tag_str)
-            tag_list.append(tag)
-        return tag_list
+        tag_str_list = list(dict.fromkeys(tag_str_list))
+        if not tag_str_list:
+            return []
+        tag_dict = {
+            tag.name: tag
+            for tag in await cls.filter(name__in=tag_str_list)
+        }
+
+        # 新增缺少的標籤
+        missing_tag_str_list = [
+            tag_str for tag_str in tag_str_list if tag_str not in tag_dict
+        ]
+        if missing_tag_str_list:
+            try:
+                async with in_transaction(WRITE_CONNECTION_NAME) as connection:
+                    await cls.bulk_create(
+                        [cls(name=tag_str) for tag_str in missing_tag_str_list],
+                        using_db=connection,
+                    )
+            except IntegrityError:
+                for tag_str in missing_tag_str_list:
+                    try:
+                        await cls.create(name=tag_str)
+                    except IntegrityError:
+                        pass
+            for tag in await cls.filter(name__in=missing_tag_str_list):
+                tag_dict[tag.name] = tag
+                tag_name_index.add(tag.id, tag.name)
+            # 新標籤可能出現在標籤模糊搜尋結果中
+            response_cache.invalidate_tag_search(missing_tag_str_list)
+        return [tag_dict[tag_str] for tag_str in tag_str_list]
 
 
 class Emoji(models.Model):
@@ -42,11 +93,213 @@ class Emoji(models.Model):
     average_hash_str = fields.CharField(max_length=100)
     created_at = fields.DatetimeField(auto_now_add=True)
 
+    class Meta:
+        # 分頁游標 (建立時間, 表符 ID) 的複合索引
+        indexes = (("created_at", "id"),)
+
+    async def save(self, *args, **kwargs) -> None:
+        """ 儲存表符 (並同步更新標籤倒排索引、平均哈希值索引與 API 回應快取)
+        """
+        is_created = not self._saved_in_db
+        await super().save(*args, **kwargs)
+        tag_index.add_emoji(self.id, self.created_at)
+        hash_index.add(self.id, self.average_hash_str)
+        response_cache.invalidate_emoji(
+            self.id, tag_index.get_tag_name_set(self.id), (), is_created=is_created)
+
     async def add_tags(self, emojiAddTagsIn: EmojiAddTagsIn):
         """ 新增標籤 (會自動忽略重複的標籤)
         """
         tag_list = await Tag.get_tag_list_by_str_list(emojiAddTagsIn.tag_str_list)
         await self._tag_list.add(*tag_list)
+        tag_name_list = [tag.name for tag in tag_list]
+        tag_index.add_tags(self.id, tag_name_list)
+        response_cache.invalidate_emoji(
+            self.id, tag_index.get_tag_name_set(self.id), tag_name_list)
+
+    @classmethod
+    async def bulk_add_tags(
+            cls,
+            emoji_tag_list_tuple_list: List[Tuple[Emoji, List[Tag]]],
+            using_db=None,
+            batch_size: int = 500):
+        """ 批量新增多個表符的標籤 (會自動忽略重複的標籤)
+
+        以單一查詢找出已存在的關聯，再將缺少的關聯分批寫入
+
+        Args:
+            emoji_tag_list_tuple_list (List[Tuple[Emoji, List[Tag]]]): (表符, 標籤列表) 列表
+            using_db (optional): 資料庫連線 (例如交易). Defaults to None.
+            batch_size (int, optional): 每批寫入的關聯數量. Defaults to 500.
+        """
+        field = cls._meta.fields_map['_tag_list']
+        db = using_db or cls._meta.db
+        through_table = Table(field.through)
+
+        # 獲取欲新增的 (表符 ID, 標籤 ID) 關聯集合，並扣除已存在的關聯
+        pair_set = {
+            (str(emoji.pk), str(tag.pk))
+            for emoji, tag_list in emoji_tag_list_tuple_list
+            for tag in tag_list
+        }
+        if not pair_set:
+            return
+        _, existing_row_list = await db.execute_query(str(
+            db.query_class.from_(through_table)
+            .where(through_table[field.backward_key].isin(
+                list({emoji_id_str for emoji_id_str, _ in pair_set})
+            ))
+            .select(field.backward_key, field.forward_key)
+        ))
+        pair_set -= {
+            (str(row[field.backward_key]), str(row[field.forward_key]))
+            for row in existing_row_list
+        }
+
+        # 分批寫入缺少的關聯
+        pair_list = sorted(pair_set)
+        for batch_i in range(0, len(pair_list), batch_size):
+            query = db.query_class.into(through_table).columns(
+                through_table[field.backward_key],
+                through_table[field.forward_key],
+            )
+            for pair in pair_list[batch_i:batch_i+batch_size]:
+                query = query.insert(*pair)
+            await db.execute_query(str(query))
+
+    @classmethod
+    async def create_tag_relation_index(cls, using_db=None):
+        """ 為表符與標籤的關聯表建立 (表符 ID, 標籤 ID) 索引 (已存在則略過)
+
+        generate_schemas 不會為多對多關聯表建立索引，
+        預先載入表符的標籤與批量新增關聯時，皆以表符 ID 查詢關聯表
+
+        Args:
+            using_db (optional): 資料庫連線. Defaults to None.
+        """
+        field = cls._meta.fields_map['_tag_list']
+        db = using_db or cls._meta.db
+        await db.execute_script(
+            f'CREATE INDEX IF NOT EXISTS "idx_{field.through}_{field.backward_key}" '
+            f'ON "{field.through}" ("{field.backward_key}", "{field.forward_key}")'
+        )
+
+    @classmethod
+    async def bulk_add(
+            cls,
+            emojiIn_list: List[EmojiIn],
+            concurrency_n: int = 8) -> List[EmojiBulkResultOut]:
+        """ 批量新增表符 (含標籤)
+
+        1. 批次內以網址去除重複，並以單一查詢比對資料庫中已存在的表符
+        2. 並行下載新表符的圖片並計算平均哈希值 (以 concurrency_n 限制同時連線數)
+        3. 以 bulk_create 新增表符
+        4. 一次獲取所有標籤，並分批寫入表符與標籤的關聯
+
+        Args:
+            emojiIn_list (List[EmojiIn]): 新增表符模型列表
+            concurrency_n (int, optional): 同時下載圖片的連線數上限. Defaults to 8.
+
+        Returns:
+            List[EmojiBulkResultOut]: 與 emojiIn_list 順序相同的處理結果
+        """
+        # 批次內以網址去除重複 (合併同一網址的標籤)
+        emojiIn_dict: Dict[str, EmojiIn] = {}
+        tag_str_list_dict: Dict[str, List[str]] = {}
+        for emojiIn in emojiIn_list:
+            emojiIn_dict.setdefault(emojiIn.url, emojiIn)
+            tag_str_list_dict.setdefault(emojiIn.url, []).extend(
+                EmojiAddTagsIn(tags_str=emojiIn.tags_str or '').tag_str_list)
+        tag_str_list_dict = {
+            url: list(dict.fromkeys(tag_str_list))
+            for url, tag_str_list in tag_str_list_dict.items()
+        }
+
+        # 以單一查詢比對資料庫中已存在的表符
+        emoji_dict: Dict[str, Emoji] = {}
+        for emoji in await cls.filter(url__in=list(emojiIn_dict)):
+            emoji_dict.setdefault(emoji.url, emoji)
+        status_dict: Dict[str, EmojiBulkStatus] = {
+            url: EmojiBulkStatus.existing for url in emoji_dict
+        }
+        detail_dict: Dict[str, str] = {}
+
+        # 並行下載新表符的圖片並計算平均哈希值 (逐項分類錯誤，任一項目失敗皆不影響整批)
+        semaphore = asyncio.Semaphore(concurrency_n)
+
+        async def fill_average_hash(
+                emojiIn: EmojiIn) -> Optional[Tuple[EmojiBulkStatus, str]]:
+            async with semaphore:
+                try:
+                    await emojiIn.fill_average_hash()
+                except InvalidImageError as e:
+                    return EmojiBulkStatus.invalid, str(e)
+                except ValueError as e:
+                    return EmojiBulkStatus.unreachable, str(e)
+                except Exception as e:
+                    logger.exception(f'表符圖片處理失敗: {emojiIn.url}')
+                    return EmojiBulkStatus.unreachable, f'圖片處理失敗: {e!r}'
+
+        new_emojiIn_list = [
+            emojiIn for url, emojiIn in emojiIn_dict.items()
+            if url not in emoji_dict
+        ]
+        error_tuple_list = await asyncio.gather(*[
+            fill_average_hash(emojiIn) for emojiIn in new_emojiIn_list
+        ])
+        new_emoji_list: List[Emoji] = []
+        for emojiIn, error_tuple in zip(new_emojiIn_list, error_tuple_list):
+            if error_tuple:
+                status_dict[emojiIn.url], detail_dict[emojiIn.url] = error_tuple
+                continue
+            emoji = cls(url=emojiIn.url, average_hash_str=emojiIn.average_hash_str)
+            new_emoji_list.append(emoji)
+            emoji_dict[emojiIn.url] = emoji
+            status_dict[emojiIn.url] = EmojiBulkStatus.created
+
+        # 一次獲取所有標籤
+        tag_dict: Dict[str, Tag] = {
+            tag.name: tag
+            for tag in await Tag.get_tag_list_by_str_list(list({
+                tag_str
+                for url in emoji_dict
+                for tag_str in tag_str_list_dict[url]
+            }))
+        }
+
+        # 新增表符並寫入表符與標籤的關聯
+        async with in_transaction(WRITE_CONNECTION_NAME) as connection:
+            await cls.bulk_create(new_emoji_list, using_db=connection)
+            await cls.bulk_add_tags(
+                [
+                    (emoji, [tag_dict[tag_str] for tag_str in tag_str_list_dict[url]])
+                    for url, emoji in emoji_dict.items()
+                ],
+                using_db=connection,
+            )
+
+        # 同步更新索引與 API 回應快取
+        for emoji in new_emoji_list:
+            tag_index.add_emoji(emoji.id, emoji.created_at)
+            hash_index.add(emoji.id, emoji.average_hash_str)
+        for url, emoji in emoji_dict.items():
+            tag_index.add_tags(emoji.id, tag_str_list_dict[url])
+            response_cache.invalidate_emoji(
+                emoji.id,
+                tag_index.get_tag_name_set(emoji.id),
+                tag_str_list_dict[url],
+                is_created=(status_dict[url] == EmojiBulkStatus.created),
+            )
+
+        return [
+            EmojiBulkResultOut(
+                url=emojiIn.url,
+                status=status_dict[emojiIn.url],
+                id=emoji_dict[emojiIn.url].id if emojiIn.url in emoji_dict else None,
+                detail=detail_dict.get(emojiIn.url),
+            )
+            for emojiIn in emojiIn_list
+        ]
 
     async def remove_tag(self, tag_id: str):
         """ 移除標籤
@@ -54,36 +307,252 @@ class Emoji(models.Model):
         tag = await Tag.filter(id=tag_id).first()
         if tag:
             await self._tag_list.remove(tag)
+            tag_name_set = set(tag_index.get_tag_name_set(self.id))
+            tag_index.remove_tag(self.id, tag.name)
+            response_cache.invalidate_emoji(self.id, tag_name_set, [tag.name])
+
+    async def delete(self, using_db=None) -> None:
+        """ 刪除表符 (並自標籤倒排索引與平均哈希值索引中移除，同步使 API 回應快取失效)
+        """
+        await super().delete(using_db=using_db)
+        tag_name_set = set(tag_index.get_tag_name_set(self.id))
+        tag_index.remove_emoji(self.id)
+        hash_index.remove(self.id)
+        combind_index.remove_emoji(self.id)
+        favorite_index.remove_emoji(self.id)
+        response_cache.invalidate_emoji(
+            self.id, tag_name_set, tag_name_set, is_deleted=True)
+
+    @staticmethod
+    def get_tag_list_prefetch() -> Prefetch:
+        """ 預先載入標籤列表至 tag_list 屬性 (於資料庫依名稱排序，輸出時不需再排序)
+
+        Returns:
+            Prefetch
+        """
+        return Prefetch("_tag_list", Tag.all(), to_attr="tag_list")
+
+    @classmethod
+    async def get_emoji_list_by_id_list(cls, emoji_id_list: List[UUID]) -> List[Emoji]:
+        """ 根據表符 ID 列表獲取表符列表 (含標籤)
+
+        以單一 id__in 查詢與一次 prefetch 獲取所有表符，再依表符 ID 列表的順序排列
+
+        Args:
+            emoji_id_list (List[UUID]): 表符 ID 列表
+
+        Returns:
+            List[Emoji]
+        """
+        if not emoji_id_list:
+            return []
+        emoji_dict = {
+            emoji.id: emoji
+            for emoji in await cls.filter(id__in=emoji_id_list).prefetch_related(
+                cls.get_tag_list_prefetch()
+            )
+        }
+        return [
+            emoji_dict[emoji_id]
+            for emoji_id in emoji_id_list
+            if emoji_id in emoji_dict
+        ]
 
     @classmethod
     async def get_similar_emoji_list(
             cls,
             average_hash_str: str,
             output_n: int = 20) -> List[Emoji]:
-        """ 獲取相似圖片的表符
+        """ 獲取相似圖片的表符 (平均哈希值格式錯誤時為空列表)
         """
-        # 獲取所有表符平均哈希值字典 → 產生 DF 資料表
-        emoji_dict_list = await Emoji.all().values('id', 'average_hash_str')
-        emoji_df = pd.DataFrame(emoji_dict_list)
-        emoji_df['average_hash'] = emoji_df['average_hash_str'].apply(
-            lambda x: imagehash.hex_to_hash(x))
-        # 新增欄位: 並計算相似度差異值 (越小越相似)
-        emoji_df['average_hash_diff_int'] = emoji_df['average_hash'] - \
-            imagehash.hex_to_hash(average_hash_str)
+        if not is_valid_hash_str(average_hash_str):
+            return []
 
-        return [
-            await Emoji.get(id=emoji_id).prefetch_related(
-                Prefetch("_tag_list", Tag.all(), to_attr="tag_list")
+        # 自平均哈希值索引獲取漢明距離最小的表符 ID 列表
+        distance_emoji_id_list = hash_index.search_top_k(
+            average_hash_str, output_n)
+
+        return await cls.get_emoji_list_by_id_list(
+            [emoji_id for _, emoji_id in distance_emoji_id_list])
+
+
+class Favorite(models.Model):
+    """ 使用者收藏的表符 (以 Firebase uid 區分使用者)
+    """
+    id = fields.IntField(pk=True)
+    uid = fields.CharField(max_length=128, index=True)
+    emoji = fields.ForeignKeyField(
+        'models.Emoji', related_name='favorite_list', on_delete=fields.CASCADE)
+    created_at = fields.DatetimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = (("uid", "emoji"),)
+
+    @classmethod
+    async def add(cls, uid: str, emoji_id: UUID) -> bool:
+        """ 新增收藏 (已收藏則略過)
+
+        Args:
+            uid (str): 使用者 uid
+            emoji_id (UUID): 表符 ID
+
+        Returns:
+            bool: 是否已收藏 (表符不存在則為 False)
+        """
+        if favorite_index.is_favorite(uid, emoji_id):
+            return True
+        try:
+            await cls.create(uid=uid, emoji_id=emoji_id)
+        except IntegrityError:
+            # 違反唯一約束: 同時有其他請求新增了相同的收藏；
+            # 否則為違反外鍵約束 (表符已被刪除)，不可加入收藏索引
+            if not await cls.exists(uid=uid, emoji_id=emoji_id):
+                return False
+        favorite_index.add(uid, emoji_id)
+        return True
+
+    @classmethod
+    async def remove(cls, uid: str, emoji_id: UUID):
+        """ 移除收藏
+
+        Args:
+            uid (str): 使用者 uid
+            emoji_id (UUID): 表符 ID
+        """
+        await cls.filter(uid=uid, emoji_id=emoji_id).delete()
+        favorite_index.remove(uid, emoji_id)
+
+
+class CombindEmoji(models.Model):
+    """ 組合表符 (由多列表符排列而成)
+    """
+    id = fields.UUIDField(pk=True)
+    # 原始的組合表符字串 (供複製使用)，例如 "*url1**url2*|*url3*"
+    combind_url = fields.TextField()
+    created_at = fields.DatetimeField(auto_now_add=True)
+
+    @classmethod
+    async def bulk_add(
+            cls,
+            combind_url_list: List[str],
+            created_at_list: List[datetime.datetime] = None,
+            using_db=None,
+            batch_size: int = 500) -> List[CombindEmoji]:
+        """ 批量新增組合表符
+
+        1. 解析組合表符字串為各列的表符網址
+        2. 以單一 url__in 查詢建立 網址 → 表符 ID 的對照表，將每格連結至已存在的表符
+        3. 以 bulk_create 寫入組合表符與每一格
+
+        Args:
+            combind_url_list (List[str]): 組合表符字串列表
+            created_at_list (List[datetime.datetime], optional): 各組合表符的建立時間. Defaults to None.
+            using_db (optional): 資料庫連線 (例如交易). Defaults to None.
+            batch_size (int, optional): 每批寫入的資料列數量. Defaults to 500.
+
+        Returns:
+            List[CombindEmoji]
+        """
+        url_row_list_list = [
+            combind_url_2_url_row_list(combind_url) for combind_url in combind_url_list
+        ]
+        emoji_query = Emoji.filter(url__in=list({
+            url
+            for url_row_list in url_row_list_list
+            for url_list in url_row_list
+            for url in url_list
+        }))
+        if using_db:
+            emoji_query = emoji_query.using_db(using_db)
+        emoji_id_dict: Dict[str, UUID] = dict(await emoji_query.values_list('url', 'id'))
+
+        combindEmoji_list = [
+            cls(
+                combind_url=combind_url,
+                created_at=created_at_list[combind_i] if created_at_list else None,
+            )
+            for combind_i, combind_url in enumerate(combind_url_list)
+        ]
+        cell_list = [
+            CombindEmojiCell(
+                combindEmoji_id=combindEmoji.id,
+                row_i=row_i,
+                column_i=column_i,
+                url=url,
+                emoji_id=emoji_id_dict.get(url),
             )
-            for emoji_id in emoji_df.sort_values(by=['average_hash_diff_int']).head(output_n)['id']
+            for combindEmoji, url_row_list in zip(combindEmoji_list, url_row_list_list)
+            for row_i, url_list in enumerate(url_row_list)
+            for column_i, url in enumerate(url_list)
         ]
+        await cls.bulk_create(combindEmoji_list, batch_size=batch_size, using_db=using_db)
+        await CombindEmojiCell.bulk_create(cell_list, batch_size=batch_size, using_db=using_db)
 
+        # 同步更新組合表符索引
+        for combindEmoji, url_row_list in zip(combindEmoji_list, url_row_list_list):
+            combind_index.add(
+                combindEmoji.id,
+                combindEmoji.created_at,
+                [
+                    emoji_id_dict[url]
+                    for url_list in url_row_list
+                    for url in url_list
+                    if url in emoji_id_dict
+                ],
+            )
+        return combindEmoji_list
+
+    @classmethod
+    async def get_combind_emoji_list_by_id_list(
+            cls,
+            combind_id_list: List[UUID]) -> List[CombindEmoji]:
+        """ 根據組合表符 ID 列表獲取組合表符列表 (含每一格)
 
-# class CombindEmoji(models.Model):
-#     id = fields.UUIDField(pk=True)
-#     combind_url = fields.TextField()
-#     emoji_list = fields.ManyToManyField(
-#         'models.Emoji', related_name='combindEmoji_list')
-# if __name__=='__main__':
+        Args:
+            combind_id_list (List[UUID]): 組合表符 ID 列表
+
+        Returns:
+            List[CombindEmoji]: 依組合表符 ID 列表的順序排列
+        """
+        if not combind_id_list:
+            return []
+        combindEmoji_dict = {
+            combindEmoji.id: combindEmoji
+            for combindEmoji in await cls.filter(id__in=combind_id_list).prefetch_related(
+                Prefetch("cell_list", CombindEmojiCell.all(), to_attr="_cell_list")
+            )
+        }
+        return [
+            combindEmoji_dict[combind_id]
+            for combind_id in combind_id_list
+            if combind_id in combindEmoji_dict
+        ]
+
+    @property
+    def cell_row_list(self) -> List[List[CombindEmojiCell]]:
+        """ 依列排列的每一格 (須已預先載入 _cell_list)
+
+        Returns:
+            List[List[CombindEmojiCell]]
+        """
+        row_dict: Dict[int, List[CombindEmojiCell]] = {}
+        for cell in sorted(self._cell_list, key=lambda cell: (cell.row_i, cell.column_i)):
+            row_dict.setdefault(cell.row_i, []).append(cell)
+        return [row_dict[row_i] for row_i in sorted(row_dict)]
+
+
+class CombindEmojiCell(models.Model):
+    """ 組合表符的一格 (第 row_i 列、第 column_i 個表符)
+    """
+    id = fields.IntField(pk=True)
+    combindEmoji = fields.ForeignKeyField(
+        'models.CombindEmoji', related_name='cell_list', on_delete=fields.CASCADE)
+    row_i = fields.SmallIntField()
+    column_i = fields.SmallIntField()
+    # 表符網址 (表符不存在於資料庫時，仍可顯示組合表符)
+    url = fields.CharField(max_length=100)
+    emoji = fields.ForeignKeyField(
+        'models.Emoji', related_name='combindEmojiCell_list', null=True, on_delete=fields.SET_NULL)
 
-    # await Emoji.get_similar_emoji_list
+    class Meta:
+        unique_together = (("combindEmoji", "row_i", "column_i"),)
@@ -0,0 +1,16 @@
+""" 資料庫讀寫分離路由
+"""
+from config import READ_CONNECTION_NAME, WRITE_CONNECTION_NAME
+
+
+class ReadWriteRouter:
+    """ 讀寫分離路由: 查詢使用唯讀連線，寫入使用寫入連線
+
+    交易中的查詢不會經過交易連線，須以 using_db 指定 (否則讀取不到尚未提交的資料)
+    """
+
+    def db_for_read(self, model) -> str:
+        return READ_CONNECTION_NAME
+
+    def db_for_write(self, model) -> str:
+        return WRITE_CONNECTION_NAME
@@ -0,0 +1,245 @@
+""" 常駐記憶體的標籤倒排索引 (標籤名稱 → 表符 ID 集合)
+"""
+from collections import OrderedDict
+import datetime
+import heapq
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+from uuid import UUID
+from loguru import logger
+
+
+class TagIndex:
+    """ 標籤倒排索引
+
+    於程序啟動時自資料庫載入，並在新增/刪除表符、追加/移除標籤時同步更新，
+    使多標籤 (AND) 搜尋可直接在記憶體中求交集，而不需逐一向資料庫查詢。
+
+    近期查詢過的標籤組合會保留其交集結果，並於寫入時逐筆增減維護，
+    因此表符總數與各標籤組合的表符數量皆可直接自記憶體取得
+    """
+    # 保留交集結果的標籤組合數量上限
+    RESULT_CACHE_SIZE = 256
+
+    def __init__(self):
+        # 標籤名稱 → 表符 ID 集合 (posting list)
+        self._emoji_id_set_dict: Dict[str, Set[UUID]] = {}
+        # 表符 ID → 標籤名稱集合 (刪除表符時用以回收 posting list)
+        self._tag_name_set_dict: Dict[UUID, Set[str]] = {}
+        # 表符 ID → 排序鍵 (建立時間, 表符 ID)，用於在記憶體中排序分頁
+        self._sort_key_dict: Dict[UUID, Tuple[datetime.datetime, UUID]] = {}
+        # 標籤組合 → 交集結果 (依最近使用排序)
+        self._result_cache_dict: Dict[FrozenSet[str], Set[UUID]] = OrderedDict()
+
+    @property
+    def emoji_n(self) -> int:
+        """ 表符總數
+        """
+        return len(self._sort_key_dict)
+
+    def load(
+            self,
+            tag_name_emoji_id_tuple_list: Iterable[Tuple[str, Optional[UUID]]],
+            emoji_id_created_at_tuple_list: Iterable[Tuple[UUID, datetime.datetime]]):
+        """ 載入 (標籤名稱, 表符 ID) 列表與 (表符 ID, 建立時間) 列表以重建索引
+
+        Args:
+            tag_name_emoji_id_tuple_list (Iterable[Tuple[str, Optional[UUID]]]):
+                (標籤名稱, 表符 ID) 列表，未被任何表符使用的標籤其表符 ID 為 None
+            emoji_id_created_at_tuple_list (Iterable[Tuple[UUID, datetime.datetime]]):
+                所有表符的 (表符 ID, 建立時間) 列表
+        """
+        self._emoji_id_set_dict.clear()
+        self._tag_name_set_dict.clear()
+        self._sort_key_dict.clear()
+        self._result_cache_dict.clear()
+        for emoji_id, created_at in emoji_id_created_at_tuple_list:
+            self.add_emoji(emoji_id, created_at)
+        for tag_name, emoji_id in tag_name_emoji_id_tuple_list:
+            emoji_id_set = self._emoji_id_set_dict.setdefault(tag_name, set())
+            if emoji_id is None:
+                continue
+            emoji_id_set.add(emoji_id)
+            self._tag_name_set_dict.setdefault(emoji_id, set()).add(tag_name)
+
+    def add_emoji(self, emoji_id: UUID, created_at: datetime.datetime):
+        """ 新增表符
+
+        Args:
+            emoji_id (UUID): 表符 ID
+            created_at (datetime.datetime): 表符建立時間
+        """
+        self._tag_name_set_dict.setdefault(emoji_id, set())
+        self._sort_key_dict[emoji_id] = (created_at, emoji_id)
+
+    def get_indexed_emoji_id_set(self, emoji_id_iter: Iterable[UUID]) -> Set[UUID]:
+        """ 僅保留索引中的表符 ID
+
+        資料庫中可能有索引尚未載入的表符 (例如程序執行期間以 data/csv2db.py 直接寫入)，
+        其他索引 (例如收藏) 的表符 ID 須先經此過濾，才能以 get_sorted_emoji_id_list 排序
+
+        Args:
+            emoji_id_iter (Iterable[UUID]): 表符 ID
+
+        Returns:
+            Set[UUID]: 新的集合
+        """
+        sort_key_dict = self._sort_key_dict
+        return {emoji_id for emoji_id in emoji_id_iter if emoji_id in sort_key_dict}
+
+    def get_tag_emoji_n(self, tag_name: str) -> int:
+        """ 獲取標籤的表符數量 (使用次數)
+
+        Args:
+            tag_name (str): 標籤名稱
+
+        Returns:
+            int
+        """
+        return len(self._emoji_id_set_dict.get(tag_name, ()))
+
+    def get_tag_name_set(self, emoji_id: UUID) -> Set[str]:
+        """ 獲取表符的標籤名稱集合
+
+        Args:
+            emoji_id (UUID): 表符 ID
+
+        Returns:
+            Set[str]: 為索引保留的集合，呼叫端不應修改
+        """
+        return self._tag_name_set_dict.get(emoji_id, set())
+
+    def add_tags(self, emoji_id: UUID, tag_name_list: List[str]):
+        """ 表符追加標籤 (會自動忽略重複的標籤)
+
+        Args:
+            emoji_id (UUID): 表符 ID
+            tag_name_list (List[str]): 標籤名稱列表
+        """
+        tag_name_set = self._tag_name_set_dict.setdefault(emoji_id, set())
+        for tag_name in tag_name_list:
+            self._emoji_id_set_dict.setdefault(tag_name, set()).add(emoji_id)
+            tag_name_set.add(tag_name)
+
+        # 維護交集結果: 表符因新標籤而符合的標籤組合
+        for tag_name_frozenset, emoji_id_set in self._result_cache_dict.items():
+            if tag_name_frozenset <= tag_name_set and \
+                    not tag_name_frozenset.isdisjoint(tag_name_list):
+                emoji_id_set.add(emoji_id)
+
+    def remove_tag(self, emoji_id: UUID, tag_name: str):
+        """ 移除表符下的標籤
+
+        Args:
+            emoji_id (UUID): 表符 ID
+            tag_name (str): 標籤名稱
+        """
+        self._emoji_id_set_dict.get(tag_name, set()).discard(emoji_id)
+        self._tag_name_set_dict.get(emoji_id, set()).discard(tag_name)
+
+        # 維護交集結果: 含有此標籤的標籤組合
+        for tag_name_frozenset, emoji_id_set in self._result_cache_dict.items():
+            if tag_name in tag_name_frozenset:
+                emoji_id_set.discard(emoji_id)
+
+    def remove_emoji(self, emoji_id: UUID):
+        """ 移除表符
+
+        Args:
+            emoji_id (UUID): 表符 ID
+        """
+        for tag_name in self._tag_name_set_dict.pop(emoji_id, set()):
+            self._emoji_id_set_dict[tag_name].discard(emoji_id)
+        self._sort_key_dict.pop(emoji_id, None)
+
+        # 維護交集結果
+        for emoji_id_set in self._result_cache_dict.values():
+            emoji_id_set.discard(emoji_id)
+
+    def get_emoji_id_set(self, tag_str_list: List[str]) -> Set[UUID]:
+        """ 獲取皆含有全部這些標籤 (AND) 的表符 ID 集合
+
+        依各標籤的表符數量由少至多排序，自最稀有的標籤開始，
+        僅以存活的候選表符逐一探查其餘標籤，候選集合一旦為空即提早結束
+
+        Args:
+            tag_str_list (List[str]): 標籤名稱列表
+
+        Returns:
+            Set[UUID]: 若有任何標籤不存在，則回傳空集合 (為索引保留的結果，呼叫端不應修改)
+        """
+        if not tag_str_list:
+            return set()
+
+        # 近期查詢過的標籤組合: 直接回傳保留的交集結果
+        tag_name_frozenset = frozenset(tag_str_list)
+        emoji_id_set = self._result_cache_dict.get(tag_name_frozenset)
+        if emoji_id_set is not None:
+            self._result_cache_dict.move_to_end(tag_name_frozenset)
+            return emoji_id_set
+
+        # 依標籤的表符數量 (選擇性) 排序查詢計畫
+        plan_list = sorted(
+            (
+                (tag_str, self._emoji_id_set_dict.get(tag_str, set()))
+                for tag_str in tag_name_frozenset
+            ),
+            key=lambda plan: len(plan[1]),
+        )
+        logger.debug(
+            '標籤查詢計畫: {}',
+            [(tag_str, len(emoji_id_set)) for tag_str, emoji_id_set in plan_list],
+        )
+
+        # 自最稀有的標籤開始，以候選表符探查其餘標籤
+        candidate_emoji_id_set = set(plan_list[0][1])
+        for probe_n, (tag_str, emoji_id_set) in enumerate(plan_list[1:], start=1):
+            if not candidate_emoji_id_set:
+                logger.debug(
+                    '標籤查詢計畫: 候選集合已為空，略過其餘 {} 個標籤',
+                    len(plan_list)-probe_n,
+                )
+                break
+            candidate_emoji_id_set = {
+                emoji_id for emoji_id in candidate_emoji_id_set
+                if emoji_id in emoji_id_set
+            }
+
+        # 保留交集結果 (超過上限時移除最久未使用的標籤組合)
+        self._result_cache_dict[tag_name_frozenset] = candidate_emoji_id_set
+        if len(self._result_cache_dict) > self.RESULT_CACHE_SIZE:
+            self._result_cache_dict.popitem(last=False)
+        return candidate_emoji_id_set
+
+    def get_sorted_emoji_id_list(
+            self,
+            emoji_id_set: Set[UUID],
+            offset_n: int,
+            limit_n: int,
+            before_sort_key: Optional[Tuple[datetime.datetime, UUID]] = None) -> List[UUID]:
+        """ 將表符 ID 依 (建立時間, 表符 ID) 由新至舊排序後，取出指定範圍
+
+        Args:
+            emoji_id_set (Set[UUID]): 表符 ID 集合 (須皆在索引中，見 get_indexed_emoji_id_set)
+            offset_n (int): 位移量
+            limit_n (int): 數量
+            before_sort_key (Optional[Tuple[datetime.datetime, UUID]], optional):
+                分頁游標，若有值則僅取排序在此之後 (較舊) 的表符. Defaults to None.
+
+        Returns:
+            List[UUID]
+        """
+        sort_key_dict = self._sort_key_dict
+        if before_sort_key is not None:
+            emoji_id_set = (
+                emoji_id for emoji_id in emoji_id_set
+                if sort_key_dict[emoji_id] < before_sort_key
+            )
+        return heapq.nlargest(
+            offset_n+limit_n,
+            emoji_id_set,
+            key=sort_key_dict.__getitem__,
+        )[offset_n:]
+
+
+# 程序共用的標籤倒排索引
+tag_index = TagIndex()
@@ -0,0 +1,160 @@
+""" 常駐記憶體的標籤名稱 n-gram 索引 (標籤自動完成)
+"""
+import heapq
+from typing import Callable, Dict, Iterable, List, NamedTuple, Set, Tuple
+from uuid import UUID
+
+
+class TagNameEntry(NamedTuple):
+    """ 標籤名稱索引的項目 (欄位同 TagOut)
+    """
+    id: UUID
+    name: str
+
+
+def get_gram_set(text: str) -> Set[str]:
+    """ 獲取字串的單字 (unigram) 與雙字 (bigram) 集合
+
+    中文標籤多為二至四字，以字元為單位切分即可，不需斷詞
+
+    Args:
+        text (str): 已轉為小寫的字串
+
+    Returns:
+        Set[str]
+    """
+    return set(text) | {text[i:i+2] for i in range(len(text)-1)}
+
+
+class TagNameIndex:
+    """ 標籤名稱 n-gram 索引
+
+    以標籤名稱 (不分大小寫) 的單字與雙字建立倒排索引: 查詢時取查詢字串各雙字 (單字查詢則取單字)
+    的標籤集合求交集，再確認確實包含查詢字串，使查詢時間只與候選標籤數量相關，而不隨標籤總數成長
+
+    於程序啟動時自資料庫載入，並在新增標籤時同步更新
+    """
+
+    def __init__(self):
+        # 標籤名稱 → 標籤項目
+        self._entry_dict: Dict[str, TagNameEntry] = {}
+        # 單字/雙字 → 標籤名稱集合
+        self._tag_name_set_dict: Dict[str, Set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entry_dict)
+
+    def load(self, tag_id_name_tuple_list: Iterable[Tuple[UUID, str]]):
+        """ 載入 (標籤 ID, 標籤名稱) 列表以重建索引
+
+        Args:
+            tag_id_name_tuple_list (Iterable[Tuple[UUID, str]]): (標籤 ID, 標籤名稱) 列表
+        """
+        self._entry_dict.clear()
+        self._tag_name_set_dict.clear()
+        for tag_id, tag_name in tag_id_name_tuple_list:
+            self.add(tag_id, tag_name)
+
+    def add(self, tag_id: UUID, tag_name: str):
+        """ 新增標籤
+
+        Args:
+            tag_id (UUID): 標籤 ID
+            tag_name (str): 標籤名稱
+        """
+        if tag_name in self._entry_dict:
+            return
+        self._entry_dict[tag_name] = TagNameEntry(tag_id, tag_name)
+        for gram in get_gram_set(tag_name.lower()):
+            self._tag_name_set_dict.setdefault(gram, set()).add(tag_name)
+
+    def _get_matched_tag_name_set(self, tag_str: str) -> Set[str]:
+        """ 獲取包含查詢字串 (不分大小寫) 的標籤名稱集合
+
+        Args:
+            tag_str (str): 已轉為小寫的查詢字串
+
+        Returns:
+            Set[str]
+        """
+        if len(tag_str) == 1:
+            return self._tag_name_set_dict.get(tag_str, set())
+
+        # 自標籤數量最少的雙字開始求交集
+        tag_name_set_list = sorted(
+            (
+                self._tag_name_set_dict.get(tag_str[i:i+2], set())
+                for i in range(len(tag_str)-1)
+            ),
+            key=len,
+        )
+        candidate_tag_name_set = set(tag_name_set_list[0])
+        for tag_name_set in tag_name_set_list[1:]:
+            if not candidate_tag_name_set:
+                break
+            candidate_tag_name_set &= tag_name_set
+
+        # 雙字皆符合不代表查詢字串連續出現 (例如標籤 "bcab" 亦含有查詢 "abca" 的所有雙字)，須再確認
+        if len(tag_name_set_list) > 1:
+            candidate_tag_name_set = {
+                tag_name for tag_name in candidate_tag_name_set
+                if tag_str in tag_name.lower()
+            }
+        return candidate_tag_name_set
+
+    def search(
+            self,
+            tag_str_list: List[str],
+            limit_n: int,
+            popularity_func: Callable[[str], int] = None) -> List[TagNameEntry]:
+        """ 模糊搜尋標籤 (多個查詢字串取聯集)
+
+        排序依序為: 完全相符、開頭相符、其餘包含查詢字串者；同級者名稱較短者優先，再依名稱排序。
+        若有指定熱門程度函式，則以熱門程度由高至低為優先，且未指定查詢字串時以所有標籤為候選
+
+        Args:
+            tag_str_list (List[str]): 查詢字串列表
+            limit_n (int): 數量上限
+            popularity_func (Callable[[str], int], optional): 標籤名稱 → 熱門程度. Defaults to None.
+
+        Returns:
+            List[TagNameEntry]
+        """
+        match_rank_dict: Dict[str, int] = {}
+        for tag_str in tag_str_list:
+            tag_str = tag_str.lower()
+            if not tag_str:
+                continue
+            for tag_name in self._get_matched_tag_name_set(tag_str):
+                lower_tag_name = tag_name.lower()
+                if lower_tag_name == tag_str:
+                    match_rank = 0
+                elif lower_tag_name.startswith(tag_str):
+                    match_rank = 1
+                else:
+                    match_rank = 2
+                if match_rank < match_rank_dict.get(tag_name, 3):
+                    match_rank_dict[tag_name] = match_rank
+
+        if popularity_func is None:
+            rank_iter = (
+                (match_rank, len(tag_name), tag_name)
+                for tag_name, match_rank in match_rank_dict.items()
+            )
+        else:
+            if not tag_str_list:
+                match_rank_dict = dict.fromkeys(self._entry_dict, 0)
+            rank_iter = (
+                (-popularity_func(tag_name), match_rank, len(tag_name), tag_name)
+                for tag_name, match_rank in match_rank_dict.items()
+            )
+
+        # 僅保留前 limit_n 名 (堆積)，不需排序所有候選標籤
+        return [
+            self._entry_dict[rank[-1]]
+            for rank in heapq.nsmallest(limit_n, rank_iter)
+        ]
+
+
+# 程序共用的標籤名稱索引
+tag_name_index = TagNameIndex()
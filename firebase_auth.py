@@ -0,0 +1,74 @@
+""" Firebase 登入驗證
+
+前端以 Authorization: Bearer <Firebase ID token> 標頭識別使用者；
+伺服器端以 Firebase Admin SDK 驗證 ID token 的簽章、有效期限與專案，並自驗證後的宣告取得 uid。
+uid 並非秘密，不可直接信任前端送出的 uid
+"""
+import asyncio
+from typing import Optional
+
+import firebase_admin
+from fastapi import HTTPException, status
+from firebase_admin import auth, credentials
+from google.auth.exceptions import GoogleAuthError
+from loguru import logger
+
+from config import FIREBASE_CREDENTIALS_PATH, FIREBASE_PROJECT_ID
+
+
+def get_firebase_app() -> firebase_admin.App:
+    """ 獲取 Firebase Admin SDK 應用程式 (首次使用時初始化)
+
+    Returns:
+        firebase_admin.App
+    """
+    try:
+        return firebase_admin.get_app()
+    except ValueError:
+        return firebase_admin.initialize_app(
+            credential=credentials.Certificate(FIREBASE_CREDENTIALS_PATH)
+            if FIREBASE_CREDENTIALS_PATH else None,
+            options={'projectId': FIREBASE_PROJECT_ID},
+        )
+
+
+def get_bearer_token(authorization: Optional[str]) -> Optional[str]:
+    """ 自 Authorization 標頭取出 Bearer token (格式不符則回傳 None)
+
+    Args:
+        authorization (Optional[str]): Authorization 標頭
+
+    Returns:
+        Optional[str]
+    """
+    scheme, _, token = (authorization or '').partition(' ')
+    if scheme.lower() != 'bearer' or not token.strip():
+        return None
+    return token.strip()
+
+
+async def verify_id_token_uid(id_token: str) -> str:
+    """ 驗證 Firebase ID token，並回傳其中的使用者 uid
+
+    驗證時可能須下載 Google 的公鑰 (之後依 Cache-Control 快取)，因此於執行緒池中執行，不阻塞事件迴圈
+
+    Args:
+        id_token (str): Firebase ID token
+
+    Raises:
+        HTTPException: ID token 無效或已過期 (401)；無法取得公鑰或憑證 (503)
+
+    Returns:
+        str
+    """
+    try:
+        claim_dict = await asyncio.get_running_loop().run_in_executor(
+            None, lambda: auth.verify_id_token(id_token, app=get_firebase_app()))
+    except (auth.InvalidIdTokenError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail='登入狀態無效，請重新登入')
+    except (auth.CertificateFetchError, GoogleAuthError) as e:
+        logger.error(f'Firebase ID token 驗證失敗: {e!r}')
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail='暫時無法驗證登入狀態')
+    return claim_dict['uid']
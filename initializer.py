@@ -1,6 +1,23 @@
+import asyncio
+import signal
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
 from tortoise.contrib.starlette import register_tortoise
+from loguru import logger
+
+from cache import response_cache
+from config import DB_PROFILE, DB_URL, get_tortoise_config
+from db.models import CombindEmoji, CombindEmojiCell, Emoji, Favorite, Tag
+from db.tag_index import tag_index
+from db.hash_index import hash_index
+from db.tag_name_index import tag_name_index
+from db.combind_index import combind_index
+from db.favorite_index import favorite_index
+from brython_bundle import build_bundle
+from static_files import get_static_files_list
+from utils import close_http_client
 
 
 def init(app: FastAPI):
@@ -10,22 +27,133 @@ def init(app: FastAPI):
         app (FastAPI)
     """
     init_db(app)
+    init_index(app)
+    init_http_client(app)
+    init_brython_bundle(app)
+    init_static_files(app)
     init_middleware(app)
 
 
 def init_db(app: FastAPI):
     """ Init database models.
 
+    連線網址與效能設定檔見 config.py
+
     Args:
         app (FastAPI)
     """
+    logger.info(f'資料庫: {DB_URL} (效能設定檔: {DB_PROFILE})')
     register_tortoise(
         app,
-        db_url='sqlite://db.sqlite3',
+        config=get_tortoise_config(),
         generate_schemas=True,
-        modules={"models": ["db.models"]},
     )
 
+    @app.on_event("startup")
+    async def create_index():
+        await Emoji.create_tag_relation_index()
+
+
+def init_index(app: FastAPI):
+    """ 建立常駐記憶體索引 (須於資料庫初始化之後執行)
+
+    程序收到 SIGHUP 時重新載入索引 (例如以 csv2db 離線匯入之後，不必重新啟動伺服器)
+
+    Args:
+        app (FastAPI)
+    """
+    @app.on_event("startup")
+    async def init_load_index():
+        await load_index()
+        # Windows 無 SIGHUP
+        if hasattr(signal, 'SIGHUP'):
+            asyncio.get_event_loop().add_signal_handler(
+                signal.SIGHUP, lambda: asyncio.ensure_future(reload_index()))
+
+
+async def load_index():
+    """ 自資料庫載入所有常駐記憶體索引，並使所有 API 回應快取失效
+
+    先讀取所有資料再一併載入 (載入期間不讓出事件迴圈)，查詢不會看到新舊混雜的索引；
+    讀取期間若有表符或標籤寫入 (資料版本改變)，讀取的資料可能不含該寫入，因此重新讀取
+    """
+    while True:
+        data_version = response_cache.data_version
+        emoji_tuple_list = await Emoji.all().values_list(
+            'id', 'average_hash_str', 'created_at')
+        tag_emoji_id_tuple_list = await Tag.all().values_list('name', 'emoji_list__id')
+        tag_id_name_tuple_list = await Tag.all().values_list('id', 'name')
+        combind_tuple_list = await CombindEmoji.all().values_list('id', 'created_at')
+        combind_cell_tuple_list = await CombindEmojiCell.filter(
+            emoji_id__isnull=False).values_list('combindEmoji_id', 'emoji_id')
+        favorite_tuple_list = await Favorite.all().values_list('uid', 'emoji_id')
+        if data_version == response_cache.data_version:
+            break
+        logger.info('讀取索引資料期間有寫入，重新讀取')
+
+    tag_index.load(
+        tag_emoji_id_tuple_list,
+        [(emoji_id, created_at) for emoji_id, _, created_at in emoji_tuple_list],
+    )
+    logger.info('標籤倒排索引建立完成')
+    tag_name_index.load(tag_id_name_tuple_list)
+    logger.info(f'標籤名稱索引建立完成: {len(tag_name_index)} 個標籤')
+    hash_index.load(
+        [(emoji_id, average_hash_str)
+         for emoji_id, average_hash_str, _ in emoji_tuple_list]
+    )
+    logger.info(f'平均哈希值索引建立完成: {len(hash_index)} 個表符')
+    combind_index.load(combind_tuple_list, combind_cell_tuple_list)
+    logger.info(f'組合表符索引建立完成: {combind_index.combind_n} 個組合表符')
+    favorite_index.load(favorite_tuple_list)
+    logger.info('收藏索引建立完成')
+    response_cache.clear()
+
+
+async def reload_index():
+    """ 重新載入常駐記憶體索引 (SIGHUP)；失敗時保留原有的索引
+    """
+    logger.info('收到 SIGHUP，重新載入索引')
+    try:
+        await load_index()
+    except Exception:
+        logger.exception('索引重新載入失敗')
+
+
+def init_http_client(app: FastAPI):
+    """ 程序關閉時釋放共用的 HTTP 連線池
+
+    Args:
+        app (FastAPI)
+    """
+    app.add_event_handler("shutdown", close_http_client)
+
+
+def init_brython_bundle(app: FastAPI):
+    """ 程序啟動時產生精簡的 Brython 模組包 (pysrc 未異動時略過；失敗時頁面改用完整的標準庫)
+
+    Args:
+        app (FastAPI)
+    """
+    @app.on_event("startup")
+    async def load_brython_bundle():
+        try:
+            await run_in_threadpool(build_bundle)
+        except Exception:
+            logger.exception('Brython 模組包產生失敗')
+
+
+def init_static_files(app: FastAPI):
+    """ 程序啟動時預先壓縮所有掛載的靜態文件 (須於掛載靜態文件之後執行)
+
+    Args:
+        app (FastAPI)
+    """
+    @app.on_event("startup")
+    async def load_static_files():
+        for static_files in get_static_files_list(app.routes):
+            await run_in_threadpool(static_files.load)
+
 
 def init_middleware(app: FastAPI):
     """
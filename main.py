@@ -1,39 +1,95 @@
-import json
+import asyncio
+import gzip
+import orjson
+from fastapi import Depends
 from fastapi.params import Header, Query
+from pydantic import ValidationError
 from pydantic.types import conint
 import _pickle as cPickle
 from dataclasses import dataclass
 import pickle
-from typing import List
-from fastapi import FastAPI, Request, status
-from fastapi.responses import HTMLResponse, JSONResponse
+from typing import Dict, List, Optional, Union
+from fastapi import FastAPI, HTTPException, Request, status
+from fastapi.responses import HTMLResponse, JSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.templating import Jinja2Templates
-from fastapi.staticfiles import StaticFiles
 from tortoise.query_utils import Prefetch
 from pathlib import Path
 from loguru import logger
 from uuid import UUID
 from tortoise.query_utils import Q
-from functools import reduce
 
+from cache import (
+    CacheEntry,
+    KIND_ALL,
+    KIND_SIMILAR,
+    KIND_TAG,
+    KIND_TAG_SEARCH,
+    response_cache,
+)
+from firebase_auth import get_bearer_token, verify_id_token_uid
 from initializer import init
 from db.models import *
+from db.tag_index import tag_index
+from db.tag_name_index import tag_name_index
+from db.combind_index import combind_index
+from db.favorite_index import favorite_index
 from schema import *
+from brython_bundle import BUNDLE_DIR, BUNDLE_NAME, BUNDLE_PATH
+from static_files import (
+    COMPRESS_MIN_SIZE,
+    ENCODING_ETAG_SUFFIX_DICT,
+    REVALIDATE_CACHE_CONTROL,
+    PrecompressedStaticFiles,
+    get_accepted_encoding_set,
+    is_etag_matched,
+)
+from serializer import (
+    COMPACT_MEDIA_TYPE,
+    dumps_combind_emoji_list,
+    dumps_emoji_list,
+    dumps_emoji_list_compact,
+    dumps_tag_list,
+    emoji_2_dict,
+    json_response,
+)
+from utils import encode_cursor, decode_cursor
+from pysrc.common_utils import get_page_btn_n, get_page_n_list
 
 
 # 建立 app 實例
 app = FastAPI()
 
 
-# 設定前端文件:靜態文件與HTML檔
-app.mount("/static", StaticFiles(directory="static"), name="static")
-app.mount("/pysrc", StaticFiles(directory="pysrc"), name="py")
+# 設定前端文件:靜態文件與HTML檔 (預先壓縮，並以內容版本網址長期快取)
+static_files = PrecompressedStaticFiles(directory="static")
+pysrc_files = PrecompressedStaticFiles(directory="pysrc")
+# Brython 模組包於程序啟動時才產生，目錄此時可能尚不存在
+bundle_files = PrecompressedStaticFiles(directory=str(BUNDLE_DIR), check_dir=False)
+app.mount("/static", static_files, name="static")
+app.mount("/pysrc", pysrc_files, name="py")
+app.mount("/dist", bundle_files, name="dist")
 templates = Jinja2Templates(directory=".")
+templates.env.globals.update(
+    static_url=lambda path: '/static/'+static_files.get_versioned_path(path),
+    pysrc_url=lambda path: '/pysrc/'+pysrc_files.get_versioned_path(path),
+    search_url=lambda **kw: SearchPageQuery(**kw).to_url(),
+    get_page_btn_n=get_page_btn_n,
+    get_page_n_list=get_page_n_list,
+)
 
 
 @app.get("/search", response_class=HTMLResponse)
 async def 表符搜尋頁面(request: Request):
+
+    # 伺服器端渲染首頁結果 (查詢參數無效，或查詢我的收藏須待前端確認登入狀態時，改由前端查詢)
+    try:
+        searchPageQuery = SearchPageQuery(**request.query_params)
+    except ValidationError:
+        searchPageQuery = None
+    initial_data_dict = orjson.loads(await get_search_body(searchPageQuery)) \
+        if searchPageQuery and not searchPageQuery.is_favorite else None
+
     return templates.TemplateResponse(
         "index.html",
         {
@@ -41,90 +97,370 @@ async def 表符搜尋頁面(request: Request):
             # 目前版本 ##
             "VERSION": "3.0",
             # 瀏覽人次 ##
-            "VIEWS": 123
+            "VIEWS": 123,
+            # 精簡的 Brython 模組包 (不存在時改用完整的標準庫)
+            "BRYTHON_BUNDLE_URL": '/dist/'+bundle_files.get_versioned_path(BUNDLE_NAME)
+            if BUNDLE_PATH.exists() else None,
+            # 伺服器端渲染的查詢參數與首頁資料 (None 則由前端查詢並生成頁面)
+            "QUERY": searchPageQuery,
+            "INITIAL_DATA": initial_data_dict,
         }
     )
 
 
-@app.get("/api/emoji", response_model=List[EmojiOut], tags=['表符'])
+def emoji_list_response(
+        emoji_list: List[Emoji],
+        emoji_n: int,
+        page_size_n: int = None,
+        is_compact: bool = False) -> Response:
+    """ 表符列表回應 (表符總數置於 emoji_n 標頭，下一頁的分頁游標置於 next_cursor 標頭)
+
+    Args:
+        emoji_list (List[Emoji]): 當頁表符列表
+        emoji_n (int): 表符總數
+        page_size_n (int, optional): 每頁顯示數量，若當頁已滿則附上下一頁的分頁游標. Defaults to None.
+        is_compact (bool, optional): 是否使用緊湊格式. Defaults to False.
+
+    Returns:
+        Response
+    """
+    # 回應格式可由 Accept 標頭指定，因此標示 Vary 以免共用快取混用兩種格式
+    headers = {"emoji_n": str(emoji_n), "vary": "Accept"}
+    if page_size_n and len(emoji_list) == page_size_n:
+        headers["next_cursor"] = encode_cursor(
+            emoji_list[-1].created_at, emoji_list[-1].id)
+    if is_compact:
+        return json_response(
+            dumps_emoji_list_compact(emoji_list), headers=headers, media_type=COMPACT_MEDIA_TYPE)
+    return json_response(dumps_emoji_list(emoji_list), headers=headers)
+
+
+def is_compact_format(response_format: EmojiListFormat, accept: Optional[str]) -> bool:
+    """ 是否回傳緊湊格式的表符列表 (以查詢參數 format=compact 或 Accept 標頭指定)
+
+    Args:
+        response_format (EmojiListFormat): format 查詢參數
+        accept (Optional[str]): Accept 標頭
+
+    Returns:
+        bool
+    """
+    return response_format == EmojiListFormat.compact or COMPACT_MEDIA_TYPE in (accept or '')
+
+
+def cached_response(entry: CacheEntry) -> Response:
+    """ 以快取項目建立回應
+
+    Args:
+        entry (CacheEntry): 快取項目
+
+    Returns:
+        Response
+    """
+    return json_response(entry.body, headers=entry.headers)
+
+
+# API 回應的 gzip 壓縮等級 (動態內容須於請求時壓縮，以速度為重)
+API_GZIP_LEVEL = 6
+
+
+def get_data_etag(is_compact: bool = False) -> str:
+    """ 以目前資料版本作為 API 回應的 ETag (不含引號；緊湊格式另加後綴以區分回應格式)
+
+    Args:
+        is_compact (bool, optional): 是否為緊湊格式. Defaults to False.
+
+    Returns:
+        str
+    """
+    return response_cache.data_etag + ('-compact' if is_compact else '')
+
+
+def is_gzip_accepted(accept_encoding: Optional[str]) -> bool:
+    """ 請求是否接受 gzip 內容編碼
+    """
+    return 'gzip' in get_accepted_encoding_set(accept_encoding or '')
+
+
+def get_validation_headers(etag: str, accept_encoding: Optional[str], vary: str) -> Dict[str, str]:
+    """ 條件式請求的驗證標頭 (每次使用前須以 ETag 重新驗證)
+
+    以 gzip 回應的內容不同，強驗證的 ETag 亦須不同: 接受 gzip 的請求一律加上 -gz 後綴。
+    內容是否達壓縮大小下限僅取決於資料，因此同一 ETag 仍只對應一種內容
+
+    Args:
+        etag (str): 資料版本的 ETag (見 get_data_etag)
+        accept_encoding (Optional[str]): Accept-Encoding 標頭
+        vary (str): 影響回應內容的請求標頭
+
+    Returns:
+        Dict[str, str]
+    """
+    suffix = ENCODING_ETAG_SUFFIX_DICT['gzip'] if is_gzip_accepted(accept_encoding) else ''
+    return {
+        'etag': f'"{etag}{suffix}"',
+        'cache-control': REVALIDATE_CACHE_CONTROL,
+        'vary': vary,
+    }
+
+
+def not_modified_response(
+        if_none_match: Optional[str],
+        etag: str,
+        accept_encoding: Optional[str],
+        vary: str) -> Optional[Response]:
+    """ 若 If-None-Match 與目前資料版本相符則回傳 304 回應，否則回傳 None
+
+    Args:
+        if_none_match (Optional[str]): If-None-Match 標頭
+        etag (str): 資料版本的 ETag (見 get_data_etag)
+        accept_encoding (Optional[str]): Accept-Encoding 標頭
+        vary (str): 影響回應內容的請求標頭
+
+    Returns:
+        Optional[Response]
+    """
+    if if_none_match and is_etag_matched(if_none_match, etag):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED,
+            headers=get_validation_headers(etag, accept_encoding, vary),
+        )
+    return None
+
+
+def conditional_response(
+        response: Response,
+        etag: str,
+        accept_encoding: Optional[str],
+        vary: str,
+        entry: Optional[CacheEntry] = None) -> Response:
+    """ 為 API 回應加上驗證標頭，並於請求接受 gzip 且內容達大小下限時壓縮
+
+    Args:
+        response (Response): 未壓縮的回應
+        etag (str): 資料版本的 ETag (見 get_data_etag)
+        accept_encoding (Optional[str]): Accept-Encoding 標頭
+        vary (str): 影響回應內容的請求標頭
+        entry (Optional[CacheEntry], optional): 回應的快取項目，壓縮結果保留於其中，不重複壓縮. Defaults to None.
+
+    Returns:
+        Response
+    """
+    response.headers.update(get_validation_headers(etag, accept_encoding, vary))
+    if not is_gzip_accepted(accept_encoding) or len(response.body) < COMPRESS_MIN_SIZE:
+        return response
+
+    if entry is None:
+        body = gzip.compress(response.body, compresslevel=API_GZIP_LEVEL, mtime=0)
+    else:
+        if entry.gzip_body is None:
+            entry.gzip_body = gzip.compress(entry.body, compresslevel=API_GZIP_LEVEL, mtime=0)
+        body = entry.gzip_body
+    response.body = body
+    response.headers['content-encoding'] = 'gzip'
+    response.headers['content-length'] = str(len(body))
+    return response
+
+
+async def get_login_uid(authorization: Optional[str]) -> str:
+    """ 獲取登入使用者的 uid (取自驗證後的 Firebase ID token)
+
+    Args:
+        authorization (Optional[str]): Authorization 標頭 (Bearer <Firebase ID token>)
+
+    Raises:
+        HTTPException: 未登入，或 ID token 無效
+
+    Returns:
+        str
+    """
+    id_token = get_bearer_token(authorization)
+    if not id_token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail='請先登入')
+    return await verify_id_token_uid(id_token)
+
+
+@app.get("/api/emoji", response_model=Union[List[EmojiOut], EmojiListCompactOut], tags=['表符'])
 async def 獲取表符列表(
         *,
         page_n: conint(ge=1) = Query(1, description="頁數"),
-        page_size_n: int = Query(30, description="每頁顯示數量"),
+        page_size_n: conint(ge=1, le=100) = Query(30, description="每頁顯示數量"),
+        cursor: str = Query(
+            None, description="分頁游標 (取自上一頁回應的 next_cursor 標頭)，若有值則忽略頁數"),
         tags_str: str = None,
         tag_str: str = None,
-        similar_emoji_id: str = None,):
+        similar_emoji_id: str = None,
+        is_favorite: bool = Query(False, description="僅顯示我的收藏 (須登入)"),
+        response_format: EmojiListFormat = Query(
+            EmojiListFormat.json, alias='format',
+            description=f"回應格式 (亦可以 Accept: {COMPACT_MEDIA_TYPE} 指定緊湊格式)"),
+        accept: str = Header(None),
+        accept_encoding: str = Header(None),
+        if_none_match: str = Header(None),
+        authorization: str = Header(None, description="Bearer <Firebase ID token>"),):
+
+    is_compact = is_compact_format(response_format, accept)
 
     # 若請求是源於點擊 [標籤搜尋結果區] 的其中一個標籤時，就以搜尋此標籤為主
     if tag_str:
         tags_str = tag_str
 
-    # 建立表符查詢池: 若有指定查詢的標籤，就先過濾出皆含有全部這些標籤(AND)的表符
+    # 獲取標籤字串列表
+    tag_str_list = tags_str_2_tag_str_list(tags_str) if tags_str else []
+
+    # 計算查詢位移量: 若有分頁游標，則改為自游標之後開始查詢
+    offset_n: int = (page_n-1)*page_size_n
+    cursor_tuple = None
+    if cursor:
+        try:
+            cursor_tuple = decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+        offset_n = 0
+
+    # 僅顯示我的收藏: 自收藏索引獲取表符 ID 集合，並與標籤篩選求交集 (個人資料不使用回應快取)
+    # (僅保留標籤倒排索引中的表符，才能排序分頁)
+    if is_favorite:
+        emoji_id_set = tag_index.get_indexed_emoji_id_set(
+            favorite_index.get_emoji_id_set(await get_login_uid(authorization)))
+        if tags_str:
+            emoji_id_set = emoji_id_set & tag_index.get_emoji_id_set(tag_str_list)
+        emoji_n = len(emoji_id_set)
+        emoji_list = await Emoji.get_emoji_list_by_id_list(
+            tag_index.get_sorted_emoji_id_list(
+                emoji_id_set, offset_n, page_size_n, before_sort_key=cursor_tuple)
+        )
+        return emoji_list_response(emoji_list, emoji_n, page_size_n, is_compact)
+
+    # 條件式請求: 資料版本未變時直接回傳 304，不執行查詢
+    # (須於查詢前讀取資料版本: 查詢期間若有寫入，回應至多標示為較舊的版本且不保留於快取，下次請求即重新查詢)
+    data_version = response_cache.data_version
+    etag = get_data_etag(is_compact)
+    vary = 'Accept, Accept-Encoding'
+    response = not_modified_response(if_none_match, etag, accept_encoding, vary)
+    if response is not None:
+        return response
+
+    # 以正規化後的查詢參數與回應格式作為快取鍵 (標籤不分順序；有分頁游標時忽略頁數)
+    page_key = ('cursor', cursor) if cursor else ('page', page_n)
     if tags_str:
-        # 獲取標籤字串列表
-        tag_str_list = tags_str_2_tag_str_list(tags_str)
-        # 獲取標籤列表
-        tag_list = [await Tag.filter(name=tag_str).first() for tag_str in tag_str_list]
-        # 若有任何標籤不存在，則回傳空表符列表
-        if not all(tag_list):
-            return []
-        # 獲取[各標籤的表符列表]列表
-        emoji_list_list = [
-            await Emoji.filter(_tag_list__in=[tag])
-            for tag in tag_list
-        ]
-        # 獲取這些表符列表的表符 ID 聯集
-        emoji_id_set = reduce(lambda x, y: x & y, [
-            set(emoji.id for emoji in emoji_list) for emoji_list in emoji_list_list])
-        # 獲取符合所有標籤的表符查詢池
-        emoji_query = Emoji.filter(id__in=emoji_id_set)
+        cache_kind = KIND_TAG
+        cache_key = (KIND_TAG, frozenset(tag_str_list), page_key, page_size_n, is_compact)
+    elif similar_emoji_id:
+        cache_kind = KIND_SIMILAR
+        cache_key = (KIND_SIMILAR, similar_emoji_id, is_compact)
+    else:
+        cache_kind = KIND_ALL
+        cache_key = (KIND_ALL, page_key, page_size_n, is_compact)
+    entry = response_cache.get(cache_key)
+    if entry is not None:
+        return conditional_response(cached_response(entry), etag, accept_encoding, vary, entry)
+
+    # 若有指定查詢的標籤，就自標籤倒排索引過濾出皆含有全部這些標籤(AND)的表符
+    if tags_str:
+        # 自標籤倒排索引獲取皆含有全部這些標籤的表符 ID 集合 (若有任何標籤不存在，則為空集合)
+        # 該集合由索引保留並於寫入時就地增減，因此於查詢 (await) 前複製，表符總數與當頁表符取自同一時間點
+        emoji_id_set = set(tag_index.get_emoji_id_set(tag_str_list))
+        emoji_n = len(emoji_id_set)
+        # 於記憶體中排序分頁後，批量獲取當頁表符
+        emoji_list = await Emoji.get_emoji_list_by_id_list(
+            tag_index.get_sorted_emoji_id_list(
+                emoji_id_set, offset_n, page_size_n, before_sort_key=cursor_tuple)
+        ) if emoji_id_set else []
+        response = emoji_list_response(
+            emoji_list, emoji_n, page_size_n, is_compact)
     # 若有指定查詢的相似表符
     elif similar_emoji_id:
         # 獲取相似表符
         emoji = await Emoji.filter(id=similar_emoji_id).first()
         if emoji is None:
-            return []
+            return conditional_response(
+                emoji_list_response([], 0, is_compact=is_compact), etag, accept_encoding, vary)
 
         # 獲取相似表符的表符查詢池
-        similar_emoji_list = await Emoji.get_similar_emoji_list(
+        emoji_list = await Emoji.get_similar_emoji_list(
             emoji.average_hash_str)
-
-        return JSONResponse(
-            content=[
-                json.loads(EmojiOut.from_orm(emoji).json())
-                for emoji in similar_emoji_list
-            ],
-            headers={"emoji_n": str(len(similar_emoji_list))},
-        )
-    # 若不指定查詢標籤，則直接查詢所有表符
+        response = emoji_list_response(emoji_list, len(emoji_list), is_compact=is_compact)
+    # 若不指定查詢標籤，則直接查詢所有表符 (表符總數取自標籤倒排索引，不需另外計數)
     else:
         emoji_query = Emoji.all()
+        emoji_n = tag_index.emoji_n
+
+        # 以分頁游標 (建立時間, 表符 ID) 過濾，使深層分頁不需掃描並捨棄先前的資料列
+        if cursor_tuple:
+            cursor_created_at, cursor_emoji_id = cursor_tuple
+            emoji_query = emoji_query.filter(
+                Q(created_at__lt=cursor_created_at) |
+                Q(created_at=cursor_created_at, id__lt=cursor_emoji_id)
+            )
+
+        # 獲取表符列表
+        emoji_list = await emoji_query\
+            .order_by('-created_at', '-id')\
+            .offset(offset_n)\
+            .limit(page_size_n)\
+            .prefetch_related(Emoji.get_tag_list_prefetch())
+        response = emoji_list_response(emoji_list, emoji_n, page_size_n, is_compact)
+
+    # 保留回應內容，並記錄其標籤組合與所含表符，以便寫入時精確失效
+    entry = response_cache.set(
+        cache_key,
+        response.body,
+        {
+            key: value for key, value in response.headers.items()
+            if key in ("emoji_n", "next_cursor", "vary", "content-type")
+        },
+        cache_kind,
+        data_version,
+        tag_name_iter=tag_str_list,
+        emoji_id_iter=[emoji.id for emoji in emoji_list],
+    )
+    return conditional_response(response, etag, accept_encoding, vary, entry)
 
-    # 計算查詢位移量
-    offset_n: int = (page_n-1)*page_size_n
 
-    # 獲取表符數量
-    emoji_n = await emoji_query.count()
+@app.get("/api/combind_emoji", response_model=List[CombindEmojiOut], tags=['組合表符'])
+async def 獲取組合表符列表(
+        *,
+        page_n: conint(ge=1) = Query(1, description="頁數"),
+        page_size_n: conint(ge=1, le=100) = Query(30, description="每頁顯示數量"),
+        tags_str: str = None,
+        tag_str: str = None,
+        emoji_id: UUID = Query(None, description="表符 ID，若有值則查詢含有此表符的組合表符"),):
 
-    # 獲取表符列表
-    emoji_list = await emoji_query\
-        .order_by('-created_at')\
-        .offset(offset_n)\
-        .limit(page_size_n)\
-        .prefetch_related(
-            Prefetch("_tag_list", Tag.all(), to_attr="tag_list")
-        )
-    return JSONResponse(
-        content=[
-            json.loads(EmojiOut.from_orm(emoji).json())
-            for emoji in emoji_list
-        ],
-        headers={"emoji_n": str(emoji_n)},
+    # 若請求是源於點擊 [標籤搜尋結果區] 的其中一個標籤時，就以搜尋此標籤為主
+    if tag_str:
+        tags_str = tag_str
+
+    # 自組合表符索引獲取含有此表符，或含有符合標籤搜尋的任一表符的組合表符 (未指定則為所有組合表符)
+    if emoji_id:
+        combind_id_set = combind_index.get_combind_id_set([emoji_id])
+    elif tags_str:
+        combind_id_set = combind_index.get_combind_id_set(
+            tag_index.get_emoji_id_set(tags_str_2_tag_str_list(tags_str)))
+    else:
+        combind_id_set = None
+
+    # 組合表符總數置於 emoji_n 標頭 (與表符列表相同，供前端分頁；須於查詢 (await) 前讀取，與當頁取自同一時間點)
+    combind_n = combind_index.combind_n if combind_id_set is None else len(combind_id_set)
+    combindEmoji_list = await CombindEmoji.get_combind_emoji_list_by_id_list(
+        combind_index.get_sorted_combind_id_list(
+            combind_id_set, (page_n-1)*page_size_n, page_size_n)
+    )
+    return json_response(
+        dumps_combind_emoji_list(combindEmoji_list),
+        headers={"emoji_n": str(combind_n)},
     )
 
 
 @app.post("/api/emoji", tags=['表符'])
 async def 新增表符(emojiIn: EmojiIn):
+    try:
+        await emojiIn.fill_average_hash()
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
     emoji, _ = await Emoji.get_or_create(
         url=emojiIn.url,
         defaults=dict(
@@ -135,11 +471,31 @@ async def 新增表符(emojiIn: EmojiIn):
     return JSONResponse(status_code=status.HTTP_200_OK)
 
 
-@app.post("/api/emoji_list", tags=['表符'])
-async def 批量新增表符列表(emojiIn_list: List[EmojiIn]):
-    for emojiIn in emojiIn_list:
-        await 新增表符(emojiIn)
-    return JSONResponse(status_code=status.HTTP_200_OK)
+@app.post("/api/emoji_list", response_model=List[EmojiBulkResultOut], tags=['表符'])
+async def 批量新增表符列表(
+        *,
+        emojiListItemIn_list: List[EmojiListItemIn],
+        concurrency_n: conint(ge=1, le=16) = Query(8, description="同時下載圖片的連線數上限"),):
+
+    # 逐項驗證網址與平均哈希值格式: 無效的項目僅標記為 invalid，不影響整批
+    emojiIn_list: List[EmojiIn] = []
+    invalid_result_dict: Dict[int, EmojiBulkResultOut] = {}
+    for item_i, emojiListItemIn in enumerate(emojiListItemIn_list):
+        try:
+            emojiIn_list.append(EmojiIn(**emojiListItemIn.dict()))
+        except ValidationError as e:
+            invalid_result_dict[item_i] = EmojiBulkResultOut(
+                url=emojiListItemIn.url,
+                status=EmojiBulkStatus.invalid,
+                detail=e.errors()[0]['msg'],
+            )
+
+    # 批量新增表符，並依請求順序合併處理結果
+    result_iter = iter(await Emoji.bulk_add(emojiIn_list, concurrency_n=concurrency_n))
+    return [
+        invalid_result_dict[item_i] if item_i in invalid_result_dict else next(result_iter)
+        for item_i in range(len(emojiListItemIn_list))
+    ]
 
 
 @app.delete("/api/emoji", tags=['表符'])
@@ -163,10 +519,8 @@ async def 更新表符_追加標籤(
 
     await emoji.add_tags(emojiAddTagsIn)
 
-    emoji = await Emoji.get(id=id).prefetch_related(
-        Prefetch("_tag_list", Tag.all(), to_attr="tag_list")
-    )
-    return EmojiOut.from_orm(emoji)
+    emoji = await Emoji.get(id=id).prefetch_related(Emoji.get_tag_list_prefetch())
+    return json_response(orjson.dumps(emoji_2_dict(emoji)))
 
 
 @app.delete("/api/emoji/tag", tags=['表符'])
@@ -184,24 +538,173 @@ async def 刪除表符下的標籤(
     return
 
 
+@app.get("/api/favorite", response_model=List[UUID], tags=['收藏'])
+async def 獲取收藏狀態(
+        *,
+        emoji_id: List[UUID] = Query(
+            None, description="表符 ID (可重複指定以批量查詢)，未指定則回傳所有收藏"),
+        authorization: str = Header(None, description="Bearer <Firebase ID token>"),):
+
+    # 回傳已收藏的表符 ID (批量查詢時依請求順序；未指定時由新至舊)
+    favorite_emoji_id_set = favorite_index.get_emoji_id_set(await get_login_uid(authorization))
+    if emoji_id is None:
+        favorite_emoji_id_set = tag_index.get_indexed_emoji_id_set(favorite_emoji_id_set)
+        emoji_id_list = tag_index.get_sorted_emoji_id_list(
+            favorite_emoji_id_set, 0, len(favorite_emoji_id_set))
+    else:
+        emoji_id_list = [
+            _emoji_id for _emoji_id in emoji_id if _emoji_id in favorite_emoji_id_set
+        ]
+    return json_response(orjson.dumps(emoji_id_list))
+
+
+@app.put("/api/favorite", tags=['收藏'])
+async def 新增收藏(
+        *,
+        emoji_id: UUID = Query(..., description='表符 ID'),
+        authorization: str = Header(None, description="Bearer <Firebase ID token>"),):
+
+    uid = await get_login_uid(authorization)
+    if not await Emoji.exists(id=emoji_id) or not await Favorite.add(uid, emoji_id):
+        return JSONResponse(status_code=status.HTTP_404_NOT_FOUND)
+    return JSONResponse(status_code=status.HTTP_200_OK)
+
+
+@app.delete("/api/favorite", tags=['收藏'])
+async def 移除收藏(
+        *,
+        emoji_id: UUID = Query(..., description='表符 ID'),
+        authorization: str = Header(None, description="Bearer <Firebase ID token>"),):
+
+    await Favorite.remove(await get_login_uid(authorization), emoji_id)
+    return JSONResponse(status_code=status.HTTP_200_OK)
+
+
 @app.get("/api/tag", response_model=List[TagOut], tags=['標籤'])
 async def 獲取標籤列表(
         *,
-        tags_str: str = None,):
+        tags_str: str = None,
+        limit_n: conint(ge=1, le=100) = Query(30, description="數量上限"),
+        sort_by: TagSortBy = Query(
+            TagSortBy.match, description="排序方式 (popularity 未指定標籤時回傳最熱門的標籤)"),
+        accept_encoding: str = Header(None),
+        if_none_match: str = Header(None),):
+
+    # 條件式請求: 資料版本未變時直接回傳 304，不執行搜尋
+    data_version = response_cache.data_version
+    etag = get_data_etag()
+    vary = 'Accept-Encoding'
+    response = not_modified_response(if_none_match, etag, accept_encoding, vary)
+    if response is not None:
+        return response
 
     # 獲取點位字串列表
-    tag_str_list = tags_str_2_tag_str_list(tags_str)
-    # 獲取標籤列表 (模糊搜尋 & 聯集)
-    tag_list = await Tag.filter(
-        Q(
-            *[
-                Q(name__icontains=tag_str)
-                for tag_str in tag_str_list
-            ],
-            join_type='OR'
+    tag_str_list = tags_str_2_tag_str_list(tags_str) if tags_str else []
+
+    cache_key = (KIND_TAG_SEARCH, frozenset(tag_str_list), limit_n, sort_by)
+    entry = response_cache.get(cache_key)
+    if entry is not None:
+        return conditional_response(cached_response(entry), etag, accept_encoding, vary, entry)
+
+    # 自標籤名稱索引模糊搜尋標籤 (聯集)，表符數量取自標籤倒排索引
+    tag_list = tag_name_index.search(
+        tag_str_list,
+        limit_n,
+        popularity_func=tag_index.get_tag_emoji_n if sort_by == TagSortBy.popularity else None,
+    )
+    response = json_response(dumps_tag_list(tag_list, tag_index.get_tag_emoji_n))
+    entry = response_cache.set(
+        cache_key, response.body, {}, KIND_TAG_SEARCH, data_version, tag_name_iter=tag_str_list)
+    return conditional_response(response, etag, accept_encoding, vary, entry)
+
+
+async def get_search_body(
+        searchPageQuery: SearchPageQuery,
+        authorization: Optional[str] = None,
+        is_compact: bool = False) -> bytes:
+    """ 搜尋結果 JSON (同 SearchOut): 同時查詢標籤搜尋結果與表符 (或組合表符) 列表
+
+    沿用各 API 的回應快取，並直接組合其已編碼的 JSON，不重新編碼 (不指定 Accept-Encoding，回應皆未壓縮)
+
+    Args:
+        searchPageQuery (SearchPageQuery): 查詢參數
+        authorization (Optional[str], optional): Authorization 標頭 (查詢我的收藏時須有值). Defaults to None.
+        is_compact (bool, optional): 表符列表是否使用緊湊格式. Defaults to False.
+
+    Returns:
+        bytes
+    """
+    async def get_list_response() -> Response:
+        if searchPageQuery.is_combind:
+            return await 獲取組合表符列表(
+                page_n=searchPageQuery.page_n,
+                page_size_n=searchPageQuery.page_size_n,
+                tags_str=searchPageQuery.tags_str,
+                tag_str=searchPageQuery.tag_str,
+                emoji_id=searchPageQuery.emoji_id,
+            )
+        return await 獲取表符列表(
+            page_n=searchPageQuery.page_n,
+            page_size_n=searchPageQuery.page_size_n,
+            cursor=None,
+            tags_str=searchPageQuery.tags_str,
+            tag_str=searchPageQuery.tag_str,
+            similar_emoji_id=searchPageQuery.similar_emoji_id and str(
+                searchPageQuery.similar_emoji_id),
+            is_favorite=bool(searchPageQuery.is_favorite),
+            response_format=EmojiListFormat.compact if is_compact else EmojiListFormat.json,
+            accept=None,
+            accept_encoding=None,
+            if_none_match=None,
+            authorization=authorization,
         )
-    ).all()
-    return [TagOut.from_orm(tag) for tag in tag_list]
+
+    async def get_tag_list_body() -> bytes:
+        # 標籤搜尋結果 (僅於輸入搜尋標籤時顯示)
+        if not searchPageQuery.tags_str:
+            return b'[]'
+        return (await 獲取標籤列表(
+            tags_str=searchPageQuery.tags_str,
+            limit_n=30,
+            sort_by=TagSortBy.match,
+            accept_encoding=None,
+            if_none_match=None,
+        )).body
+
+    # 先排程表符查詢: 於等待資料庫時即進行標籤搜尋 (記憶體內運算)
+    list_response, tag_list_body = await asyncio.gather(
+        get_list_response(), get_tag_list_body())
+    list_key = b'combind_emoji_list' if searchPageQuery.is_combind else b'emoji_list'
+    return b''.join([
+        b'{"tag_list":', tag_list_body,
+        b',"', list_key, b'":', list_response.body,
+        b',"emoji_n":', list_response.headers['emoji_n'].encode(),
+        b'}',
+    ])
+
+
+@app.get("/api/search", response_model=SearchOut, response_model_exclude_none=True, tags=['搜尋'])
+async def 搜尋(
+        *,
+        searchPageQuery: SearchPageQuery = Depends(),
+        response_format: EmojiListFormat = Query(
+            EmojiListFormat.json, alias='format',
+            description=f"表符列表的格式 (亦可以 Accept: {COMPACT_MEDIA_TYPE} 指定緊湊格式)"),
+        accept: str = Header(None),
+        authorization: str = Header(None, description="Bearer <Firebase ID token>"),):
+
+    # 一次請求取得標籤搜尋結果、當頁表符 (或組合表符) 與結果總數
+    return json_response(
+        await get_search_body(
+            searchPageQuery, authorization, is_compact_format(response_format, accept)),
+        headers={"vary": "Accept"},
+    )
+
+
+@app.get("/api/cache_stats", tags=['系統'])
+async def 獲取快取統計():
+    return response_cache.get_stats_dict()
+
 
 init(app)
 
@@ -1,7 +1,7 @@
 """ 後端(fastapi) 與 前端(Brython) 共用的工具函數
 """
 
-from typing import List
+from typing import List, Optional
 
 
 def tags_str_2_tag_str_list(tags_str: str) -> List[str]:
@@ -17,3 +17,107 @@ def tags_str_2_tag_str_list(tags_str: str) -> List[str]:
     return [
         tag_str for tag_str in tag_str_list if tag_str
     ]
+
+
+def get_page_btn_n(item_n: int, page_size_n: int) -> int:
+    """ 計算頁籤按鈕數量
+
+    Args:
+        item_n (int): 結果總數
+        page_size_n (int): 每頁顯示結果數量
+
+    Returns:
+        int
+    """
+    return (item_n // page_size_n) + (item_n % page_size_n > 0)
+
+
+def get_page_n_list(current_page_n: int, page_btn_n: int) -> List[Optional[int]]:
+    """ 頁籤數字按鈕的頁數列表 (None 為省略符號)
+
+    若按頁籤鈕數量少於 10 個則全部列出，否則省略中間的頁數:
+    當前頁面很靠近首頁或末頁時 (效果: 1 2 3 4 5 ... 7 8 9 10 11)，
+    不靠近首頁或末頁時 (效果: 1 2 3 ... 5 6 7 ... 9 10 11)
+
+    Args:
+        current_page_n (int): 當前頁數
+        page_btn_n (int): 頁籤按鈕數量
+
+    Returns:
+        List[Optional[int]]
+    """
+    if page_btn_n < 10:
+        return list(range(1, page_btn_n+1))
+
+    if (1 <= current_page_n <= 5) or (page_btn_n-4 <= current_page_n <= page_btn_n):
+        return (
+            # 前段數字按鈕
+            list(range(1, 6))
+            # 選擇性增補第 6 頁數字按鈕
+            + [6]*(current_page_n == 5)
+            # 省略符號 (...)
+            + [None]
+            # 選擇性增補倒數第 6 頁數字按鈕
+            + [page_btn_n-5]*(current_page_n == page_btn_n-4)
+            # 末段數字按鈕
+            + list(range(page_btn_n-4, page_btn_n+1))
+        )
+
+    return (
+        # 前段數字按鈕
+        list(range(1, 4))
+        # 省略符號 (...)
+        + [None]
+        # 中段數字按鈕
+        + list(range(current_page_n-1, current_page_n+2))
+        # 省略符號 (...)
+        + [None]
+        # 末段數字按鈕
+        + list(range(page_btn_n-2, page_btn_n+1))
+    )
+
+
+def hex_2_uuid_str(hex_str: str) -> str:
+    """ 將不含連字號的 UUID 還原為標準格式 (8-4-4-4-12)
+
+    Args:
+        hex_str (str): 32 個十六進位字元
+
+    Returns:
+        str
+    """
+    return '-'.join([
+        hex_str[:8], hex_str[8:12], hex_str[12:16], hex_str[16:20], hex_str[20:],
+    ])
+
+
+def compact_2_emoji_dict_list(compact_dict: dict) -> List[dict]:
+    """ 將緊湊格式的表符列表 (見 serializer.py 的 dumps_emoji_list_compact) 還原為一般格式
+
+    Args:
+        compact_dict (dict): 緊湊格式的表符列表
+
+    Returns:
+        List[dict]: 同 EmojiOut 的字典列表
+    """
+    tag_dict_list = [
+        {'id': hex_2_uuid_str(tag_id), 'name': tag_name}
+        for tag_id, tag_name in zip(compact_dict['tag_id_list'], compact_dict['tag_name_list'])
+    ]
+    url_prefix = compact_dict['url_prefix']
+    return [
+        {
+            'url': url_prefix+url,
+            'id': hex_2_uuid_str(emoji_id),
+            'created_at': created_at,
+            'average_hash_str': average_hash_str,
+            'tag_list': [tag_dict_list[tag_index] for tag_index in index_list],
+        }
+        for emoji_id, url, created_at, average_hash_str, index_list in zip(
+            compact_dict['id_list'],
+            compact_dict['url_list'],
+            compact_dict['created_at_list'],
+            compact_dict['average_hash_str_list'],
+            compact_dict['tag_index_list'],
+        )
+    ]
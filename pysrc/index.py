@@ -6,40 +6,81 @@ from browser import bind, window, alert, ajax, aio
 from pysrc.schema import *
 from pysrc.utils import *
 
-# 綁定頭像按鈕登入登出事件: 刷新頭像區域
-window.firebase.auth().onAuthStateChanged(
-    lambda user: Avatar().refresh()
-)
+# 登入狀態是否已確認 (Firebase 於頁面載入後才會回報登入狀態)
+auth_state_dict = dict(is_ready=False)
+
+
+def on_id_token_changed(user):
+    """ 登入/登出 (及 ID token 定期更新) 事件: 保存 ID token 後，刷新頭像區域與收藏狀態
+    """
+    def on_id_token(id_token=None):
+        Avatar.id_token = id_token
+        auth_state_dict['is_ready'] = True
+        Avatar().refresh()
+        aio.run(refresh_favorite_icons())
+
+    if user:
+        user.getIdToken().then(on_id_token)
+    else:
+        on_id_token()
+
+
+window.firebase.auth().onIdTokenChanged(on_id_token_changed)
 
 
 async def main():
+    # 分析網址查詢參數字典
+    emojiQuery = EmojiQuery.from_url()
+    # print(emojiQuery)
+
+    # 伺服器端已渲染首頁結果: 僅綁定事件並刷新收藏(愛心) icon
+    initial_data_dict = get_initial_data_dict()
+    if initial_data_dict is not None:
+        hydrate_search_page(emojiQuery, initial_data_dict)
+        await refresh_favorite_icons()
+        return
+
     # 置入標頭
     doc <= header_div()
 
     # 置入導覽列
     doc <= nav_div()
 
-    # 分析網址查詢參數字典
-    emojiQuery = EmojiQuery.from_url()
-    # print(emojiQuery)
-
     # 查詢表符表單區域
     doc <= EmojiSearchForm(emojiQuery=emojiQuery).div
 
-    # 標籤查詢結果區域
-    doc <= (await tag_search_result_div(emojiQuery=emojiQuery))
+    # 查詢我的收藏須先確認登入狀態
+    while emojiQuery.is_favorite and not auth_state_dict['is_ready']:
+        await aio.sleep(0.05)
 
-    # 獲取表符物件列表與結果數量
-    emoji_list, emoji_n = await Emoji.get_emoji_list_and_emoji_n_tuple(
-        emojiQuery=emojiQuery
-    )
+    # 一次請求取得標籤搜尋結果、當頁表符 (或組合表符) 與結果數量
+    search_result_dict = await get_search_result_dict(emojiQuery)
+    emoji_n = search_result_dict['emoji_n']
 
-    # 生成表符列表表格
-    emojiTable = EmojiTable(
-        emoji_list=emoji_list
+    # 標籤查詢結果區域
+    doc <= tag_search_result_div(
+        emojiQuery=emojiQuery,
+        tag_dict_list=search_result_dict['tag_list'],
     )
 
-    doc <= emojiTable.table_div
+    if emojiQuery.is_combind:
+        # 生成組合表符列表表格
+        doc <= CombindEmojiTable(
+            combindEmoji_list=[
+                CombindEmoji.from_dict(combindEmoji_dict)
+                for combindEmoji_dict in search_result_dict['combind_emoji_list']
+            ]
+        ).table_div
+    else:
+        # 生成表符列表表格
+        emojiTable = EmojiTable(
+            emoji_list=Emoji.from_dict_list(search_result_dict['emoji_list'])
+        )
+
+        doc <= emojiTable.table_div
+
+        # 刷新收藏(愛心) icon
+        await refresh_favorite_icons()
 
     # 生成頁籤
     emojiTablePageBtnArea = EmojiTablePageBtnArea(
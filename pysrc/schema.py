@@ -9,6 +9,7 @@ from typing import List, Dict, Any, Optional, Union, Tuple
 from pysrc.utils import *
 Emoji = None
 EmojiQuery = None
+CombindEmoji = None
 
 
 @dataclass
@@ -21,12 +22,18 @@ class EmojiQuery:
         tags_str(str): 輸入框或表格標籤的搜尋標籤文字. Defaults to None
         tag_str(str): 在標籤搜尋結果被點擊的標籤名稱，若有值則搜索標籤將以此為主. Defaults to None
         similar_emoji_id(str): 搜尋相似表符的表符 ID. Defaults to None
+        is_combind(bool): 是否搜尋組合表符. Defaults to None
+        emoji_id(str): 搜尋含有此表符的組合表符. Defaults to None
+        is_favorite(bool): 是否僅顯示我的收藏. Defaults to None
     """
     page_n: int = 1
     page_size_n: int = 30
     tags_str: str = None
     tag_str: str = None
     similar_emoji_id: str = None
+    is_combind: bool = None
+    emoji_id: str = None
+    is_favorite: bool = None
 
     @classmethod
     def from_url(cls, url: str = window.location.href) -> EmojiQuery:
@@ -50,6 +57,15 @@ class EmojiQuery:
         similar_emoji_id: Optional[str] = similar_emoji_id and str(
             similar_emoji_id)
 
+        is_combind = url_query_dict.get('is_combind', None)
+        is_combind: Optional[bool] = (is_combind in ('True', 'true', '1')) or None
+
+        emoji_id = url_query_dict.get('emoji_id', None)
+        emoji_id: Optional[str] = emoji_id and str(emoji_id)
+
+        is_favorite = url_query_dict.get('is_favorite', None)
+        is_favorite: Optional[bool] = (is_favorite in ('True', 'true', '1')) or None
+
         return cls(
             page_n=int(url_query_dict.get('page_n', cls.page_n)),
             page_size_n=int(url_query_dict.get(
@@ -57,6 +73,9 @@ class EmojiQuery:
             tags_str=tags_str,
             tag_str=tag_str,
             similar_emoji_id=similar_emoji_id,
+            is_combind=is_combind,
+            emoji_id=emoji_id,
+            is_favorite=is_favorite,
         )
 
     def _to_url_query_str(self, **update_kw_dict) -> str:
@@ -141,6 +160,20 @@ class Tag:
             )
         )
 
+    def bind_span(self, span: SPAN) -> SPAN:
+        """ 綁定表符表格中標籤元素的事件 (亦用於伺服器端渲染的標籤元素)
+
+        Args:
+            span (SPAN): 表符表格中的標籤元素
+
+        Returns:
+            SPAN
+        """
+        return span.bind(
+            # 綁定事件: 右鍵刪除標籤
+            'contextmenu', lambda ev: aio.run(self.onrightclick_delete(ev))
+        )
+
     @property
     def span(self) -> SPAN:
         """ 表符表格中的標籤元素
@@ -148,17 +181,14 @@ class Tag:
         Returns:
             SPAN
         """
-        return SPAN(
+        return self.bind_span(SPAN(
             A(
                 self._span,
                 href=EmojiQuery(tags_str=self.name).to_url(),
                 # 隱藏超連結底線
                 style=(dict(textDecoration='none',)),
             )
-        ).bind(
-            # 綁定事件: 右鍵刪除標籤
-            'contextmenu', lambda ev: aio.run(self.onrightclick_delete(ev))
-        )
+        ))
 
     @property
     def search_result_span(self) -> SPAN:
@@ -216,6 +246,20 @@ class Emoji:
             ],
         ))
 
+    @classmethod
+    def from_dict_list(cls, emoji_data: Union[List[dict], dict]) -> List[Emoji]:
+        """ 輸入表符列表建立表符 (可為一般的字典列表，或緊湊格式的物件)
+
+        Args:
+            emoji_data (Union[List[dict], dict]): 表符字典列表，或緊湊格式 (format=compact) 的物件
+
+        Returns:
+            List[Emoji]
+        """
+        if isinstance(emoji_data, dict):
+            emoji_data = compact_2_emoji_dict_list(emoji_data)
+        return [cls.from_dict(emoji_dict) for emoji_dict in emoji_data]
+
     def update_emoji(self, emoji):
         """ 更新表符物件
         """
@@ -279,9 +323,29 @@ class Emoji:
         copy_text_to_cliboard(self.for_copy_url)
         show_alert_message(f"已複製表符")
 
+    async def onclick_toggle_favorite(self, ev):
+        """ 收藏/取消收藏表符
+        """
+        avatar = Avatar()
+        if not avatar.is_login:
+            alert("請先登入")
+            return
+
+        icon = ev.currentTarget
+        is_favorite = not icon.classList.contains('is_favorite')
+        set_favorite_icon(icon, is_favorite)
+
+        # 送出請求: 新增收藏或移除收藏
+        await aio.ajax(
+            "PUT" if is_favorite else "DELETE",
+            f"/api/favorite?emoji_id={self.id}",
+            headers=avatar.auth_header_dict,
+        )
+        show_alert_message("已加入收藏" if is_favorite else "已移除收藏")
+
     @property
     def img_div(self) -> DIV:
-        """ 網格區域元素: 表符圖片
+        """ 網格區域元素: 表符圖片 (事件於 bind_main_tr 綁定)
 
         Returns:
             DIV: [description]
@@ -295,11 +359,12 @@ class Emoji:
                     cursor="pointer",
                 )
             ),
-        ).bind("click", self.onclick_copy_emoji_url)
+            Class="emoji_img_div",
+        )
 
     @property
     def iconTool_is_div(self) -> DIV:
-        """ 網格區域元素: 表符操作工具: 加入收藏按鈕、檢視組表符按鈕
+        """ 網格區域元素: 表符操作工具: 加入收藏按鈕、檢視組表符按鈕 (事件於 bind_tool_tr 綁定)
 
         Returns:
             DIV
@@ -335,16 +400,20 @@ class Emoji:
                 I(
                     Class="far fa-copy",
                     style=_icon_style_dict,
-                ).bind("click", self.onclick_copy_emoji_url),
-                # icon 按鈕: 收藏(愛心) ##
-                I(
-                    Class="fas fa-heart",
-                    style=_icon_style_dict,
                 ),
-                # icon 按鈕: 檢視組合表符 ##
+                # icon 按鈕: 收藏(愛心)，收藏狀態於表格生成後由 refresh_favorite_icons 批量查詢
                 I(
-                    Class="fas fa-th-large",
+                    Class="fas fa-heart favorite_icon",
                     style=_icon_style_dict,
+                    emoji_id=self.id,
+                ),
+                # icon 按鈕: 檢視含有此表符的組合表符
+                A(
+                    I(
+                        Class="fas fa-th-large",
+                        style=_icon_style_dict,
+                    ),
+                    href=f"/search?is_combind=True&emoji_id={self.id}",
                 ),
                 # icon 按鈕: 搜尋相似表符
                 A(
@@ -365,17 +434,18 @@ class Emoji:
                         paddingLeft="12px",
                     ),
                     emoji_id=self.id,
-                ).bind("keydown", lambda ev: hasattr(ev, 'key') and (ev.key == "Enter") and aio.run(self.onclick_add_new_tag(ev))),
+                ),
                 # 按鈕: 新增標籤
                 SPAN(
                     "新增",
+                    Class="add_tag_btn",
                     style=_send_add_new_tag_btn_style_dict
-                ).bind("click", lambda ev: aio.run(self.onclick_add_new_tag(ev))),
+                ),
                 # icon 按鈕: 複製所有標籤字串
                 I(
                     Class="fa fa-clone",
                     style=_icon_style_dict,
-                ).bind("click", self.onclick_copy_tags_str),
+                ),
             ],
             style=dict(
                 float="left",
@@ -426,8 +496,7 @@ class Emoji:
             ],
             emoji_id=self.id,
         )
-        tr.emoji = self
-        return tr
+        return self.bind_main_tr(tr)
 
     @property
     def tool_tr(self) -> TR:
@@ -450,37 +519,55 @@ class Emoji:
                     ),
                 )
             ],
+            emoji_id=self.id,
         )
+        return self.bind_tool_tr(tr)
+
+    def bind_main_tr(self, tr: TR) -> TR:
+        """ 綁定表格橫列 (表符和標籤) 的事件，並於元素上記錄表符物件
+
+        Args:
+            tr (TR): main_tr 或伺服器端渲染的相同元素
+
+        Returns:
+            TR
+        """
         tr.emoji = self
+        tr.select_one('div.emoji_img_div').bind("click", self.onclick_copy_emoji_url)
         return tr
 
-    @classmethod
-    async def get_emoji_list_and_emoji_n_tuple(
-            cls,
-            emojiQuery: EmojiQuery) -> Tuple[List[Emoji], int]:
-        """ 根據搜尋條件取得表符列表
+    def bind_tool_tr(self, tr: TR) -> TR:
+        """ 綁定表格橫列 (表符操作工具) 的事件，並於元素上記錄表符物件
 
         Args:
-            emojiQuery (EmojiQuery): 搜尋參數
+            tr (TR): tool_tr 或伺服器端渲染的相同元素
 
         Returns:
-            Tuple[List[Emoji], int]
+            TR
         """
+        tr.emoji = self
+        tr.select_one('i.fa-copy').bind("click", self.onclick_copy_emoji_url)
+        tr.select_one('i.favorite_icon').bind(
+            "click", lambda ev: aio.run(self.onclick_toggle_favorite(ev)))
+        # 輸入框: 按下 Enter 可直接新增標籤
+        tr.select_one('input').bind(
+            "keydown", lambda ev: hasattr(ev, 'key') and (ev.key == "Enter") and aio.run(self.onclick_add_new_tag(ev)))
+        tr.select_one('span.add_tag_btn').bind(
+            "click", lambda ev: aio.run(self.onclick_add_new_tag(ev)))
+        tr.select_one('i.fa-clone').bind("click", self.onclick_copy_tags_str)
+        return tr
 
-        # 建立搜尋表單字典
-        emojiQuery_dict = {
-            k: v for k, v in asdict(emojiQuery).items() if v is not None
-        }
-
-        # 取得表符列表(自 res.body 中取得) 以及 表符總數(自 res.headers 中取得)
-        get_emojis_res = (await aio.get("/api/emoji", data=emojiQuery_dict))
-        emoji_n = int(get_emojis_res.response_headers.get("emoji_n", 0))
-        emoji_dict_list = json.loads(get_emojis_res.data)
+    def hydrate(self, main_tr: TR, tool_tr: TR):
+        """ 為伺服器端渲染的表格橫列綁定事件 (含標籤元素)
 
-        return [
-            cls.from_dict(emoji_dict)
-            for emoji_dict in emoji_dict_list
-        ], emoji_n
+        Args:
+            main_tr (TR): 表格橫列 (表符和標籤)
+            tool_tr (TR): 表格橫列 (表符操作工具)
+        """
+        for tag, span in zip(self.tag_list, main_tr.select('div.tag_spans > span')):
+            tag.bind_span(span)
+        self.bind_main_tr(main_tr)
+        self.bind_tool_tr(tool_tr)
 
     async def put_tags(self, tags_str: str) -> Emoji:
         """ 更新表符標籤
@@ -555,6 +642,135 @@ class EmojiTable:
         )
 
 
+@dataclass
+class CombindEmoji:
+    """ 組合表符元素
+    """
+    id: str
+    combind_url: str
+    created_at: str
+    # 依列排列的每一格: dict(url=表符網址, emoji_id=表符 ID)
+    row_list: List[List[dict]]
+
+    @classmethod
+    def from_dict(cls, combindEmoji_dict: dict) -> CombindEmoji:
+        """ 輸入字典建立組合表符
+        """
+        return cls(**dict(
+            id=combindEmoji_dict['id'],
+            combind_url=combindEmoji_dict['combind_url'],
+            created_at=combindEmoji_dict['created_at'],
+            row_list=combindEmoji_dict['row_list'],
+        ))
+
+    def onclick_copy_combind_url(self, ev):
+        """ 複製組合表符字串
+        """
+        copy_text_to_cliboard(self.combind_url)
+        show_alert_message(f"已複製組合表符")
+
+    @property
+    def img_div(self) -> DIV:
+        """ 網格區域元素: 依列排列的表符圖片
+
+        Returns:
+            DIV
+        """
+        return DIV(
+            [
+                DIV(
+                    [
+                        IMG(
+                            src=cell['url'],
+                            style=dict(
+                                display="inline-block",
+                                verticalAlign="top",
+                            ),
+                        )
+                        for cell in cell_list
+                    ],
+                    # 列與列之間不留空隙
+                    style=dict(lineHeight="0"),
+                )
+                for cell_list in self.row_list
+            ],
+            style=dict(
+                display="inline-block",
+                cursor="pointer",
+            ),
+            Class="combind_img_div",
+        )
+
+    @property
+    def tr(self) -> TR:
+        """ 表格單一橫列元素 (組合表符)
+
+        Returns:
+            TR
+        """
+        return self.bind_tr(TR(
+            TD(
+                self.img_div,
+                style=dict(
+                    textAlign="center",
+                    verticalAlign="middle",
+                    border="1px solid #dddddd",
+                ),
+            ),
+            combind_id=self.id,
+        ))
+
+    def bind_tr(self, tr: TR) -> TR:
+        """ 綁定表格橫列的事件 (亦用於伺服器端渲染的表格橫列)
+
+        Args:
+            tr (TR): 表格單一橫列元素
+
+        Returns:
+            TR
+        """
+        tr.select_one('div.combind_img_div').bind("click", self.onclick_copy_combind_url)
+        return tr
+
+
+@dataclass
+class CombindEmojiTable:
+    """ 組合表符列表表格
+
+    Attributes:
+        combindEmoji_list (List[CombindEmoji]): 組合表符列表
+    """
+    combindEmoji_list: List[CombindEmoji]
+
+    @property
+    def table_div(self) -> DIV:
+        """ 表格區域元素
+
+        Returns:
+            DIV
+        """
+        return DIV(
+            TABLE(
+                [
+                    # 表格標頭
+                    THEAD(
+                        TR(
+                            TH(
+                                '組合表符 (點擊複製)',
+                                style=dict(textAlign="center"),
+                            ),
+                            Class="w3-indigo",
+                        ),
+                    ),
+                ]+[
+                    combindEmoji.tr for combindEmoji in self.combindEmoji_list
+                ],
+                Class="w3-table w3-border w3-bordered",
+            ),
+            Class="w3-container",
+        )
+
+
 @dataclass
 class EmojiTablePageBtnArea:
     """ 表符表格頁籤區域 """
@@ -583,7 +799,7 @@ class EmojiTablePageBtnArea:
     @property
     def page_btn_n(self):
         # 計算頁籤按鈕數量
-        return (self.emoji_n // self.emojiQuery.page_size_n) + (self.emoji_n % self.emojiQuery.page_size_n > 0)
+        return get_page_btn_n(self.emoji_n, self.emojiQuery.page_size_n)
 
     def a(self, page_n: int, is_current: bool = False, text: str = None) -> A:
         """ 一個頁籤超連結(A)元素
@@ -623,66 +839,12 @@ class EmojiTablePageBtnArea:
         Returns:
             List[Union[A, SPAN]]: 頁籤超連結(A)元素列表，可能含有省略符號 SPAN("...")
         """
-
-        # 若按頁籤鈕數量少於 10 個, 則全部列出
-        if self.page_btn_n < 10:
-            return [
-                self.a(
-                    page_n=page_n,
-                    is_current=(self.current_page_n == page_n),
-                )
-                for page_n in range(1, self.page_btn_n+1)
-            ]
-
-        # 若按頁籤鈕數量大於 10 個，且當前頁面很靠近首頁或末頁 (效果: 1 2 3 4 5 .... 7 8 9 10 11)
-        if (1 <= self.current_page_n <= 5) or (self.page_btn_n-4 <= self.current_page_n <= self.page_btn_n):
-            return [
-                # 前段數字按鈕
-                self.a(
-                    page_n=page_n,
-                    is_current=(self.current_page_n == page_n),
-                )
-                for page_n in range(1, 6)
-            ]+[
-                # 選擇性增補第 6 頁數字按鈕
-                self.a(page_n=6)
-            ]*(self.current_page_n == 5)+[
-                # 省略符號 (...)
-                self.ellipsis_span()
-            ]+[
-                # 選擇性增補倒數第 6 頁數字按鈕
-                self.a(page_n=self.page_btn_n-5)
-            ]*(self.current_page_n == self.page_btn_n-4)+[
-                # 末段數字按鈕
-                self.a(
-                    page_n=page_n,
-                    is_current=(self.current_page_n == page_n),
-                )
-                for page_n in range(self.page_btn_n-4, self.page_btn_n+1)
-            ]
-
-        # 若按頁籤鈕數量大於 10 個，且當前頁面不靠近首頁或末頁 (效果: 1 2 3 ... 5 6 7 ... 9 10 11)
         return [
-            # 前段數字按鈕
-            self.a(page_n=page_n)
-            for page_n in range(1, 4)
-        ]+[
-            # 省略符號 (...)
-            self.ellipsis_span()
-        ]+[
-            # 中段數字按鈕
-            self.a(
+            self.ellipsis_span() if page_n is None else self.a(
                 page_n=page_n,
                 is_current=(self.current_page_n == page_n),
             )
-            for page_n in range(self.current_page_n-1, self.current_page_n+2)
-        ]+[
-            # 省略符號 (...)
-            self.ellipsis_span()
-        ]+[
-            # 末段數字按鈕
-            self.a(page_n=page_n)
-            for page_n in range(self.page_btn_n-2, self.page_btn_n+1)
+            for page_n in get_page_n_list(self.current_page_n, self.page_btn_n)
         ]
 
     @property
@@ -726,11 +888,33 @@ class EmojiSearchForm:
     """
     emojiQuery: EmojiQuery
 
+    def onkeydown_search_tags_str(self, ev):
+        """ 按下 Enter 時觸發按下 [搜尋] 按鈕送出查詢
+        """
+        if hasattr(ev, 'key') and (ev.key == "Enter"):
+            doc['search_tags_str_button'].click()
+
+    def onclick_checkbox_label(self, ev):
+        """ 點擊勾選元素的文字時切換勾選
+        """
+        ev.currentTarget.parent.select_one('input').click()
+
+    def bind_events(self):
+        """ 為伺服器端渲染的表單綁定事件
+        """
+        doc['search_tags_str_input'].bind("keydown", self.onkeydown_search_tags_str)
+        doc['search_tags_str_button'].bind("click", self.onclick_send_query)
+        for checkbox_id in ('search_is_favorite_checkbox', 'search_is_combind_checkbox'):
+            doc[checkbox_id].parent.select_one('span').bind(
+                "click", self.onclick_checkbox_label)
+
     def onclick_send_query(self, ev) -> EmojiQuery:
         """ 自表單 DIV 元素取得查詢表符參數
         """
         window.location.href = EmojiQuery(
             tags_str=doc['search_tags_str_input'].value,
+            is_combind=doc['search_is_combind_checkbox'].checked or None,
+            is_favorite=doc['search_is_favorite_checkbox'].checked or None,
         ).to_url()
 
     @property
@@ -762,11 +946,7 @@ class EmojiSearchForm:
                             ),
                         ).bind(
                             # 綁定事件: 按下 Enter 時觸發按下 [搜尋] 按鈕送出查詢
-                            "keydown",
-                            lambda ev:
-                                hasattr(ev, 'key')
-                                and (ev.key == "Enter")
-                                and doc['search_tags_str_button'].click()
+                            "keydown", self.onkeydown_search_tags_str
                         ),
                         # 送出搜尋按鈕
                         BUTTON(
@@ -785,14 +965,19 @@ class EmojiSearchForm:
                         # 勾選元素: 我的收藏
                         DIV(
                             [
-                                INPUT(type="checkbox"),
+                                INPUT(
+                                    type="checkbox",
+                                    id="search_is_favorite_checkbox",
+                                    # 僅於勾選時設定 checked 屬性 (屬性存在即為勾選)
+                                    **({'checked': True} if self.emojiQuery.is_favorite else {}),
+                                ),
                                 SPAN(
                                     " 我的收藏",
                                     Class='noselect',
                                     style=dict(
                                         fontWeight="bold",
                                     ),
-                                ).bind("click", lambda ev:ev.currentTarget.parent.select_one('input').click()),
+                                ).bind("click", self.onclick_checkbox_label),
                             ],
                             style=dict(
                                 cursor="pointer",
@@ -804,14 +989,19 @@ class EmojiSearchForm:
                         # 勾選元素: 組合表符
                         DIV(
                             [
-                                INPUT(type="checkbox"),
+                                INPUT(
+                                    type="checkbox",
+                                    id="search_is_combind_checkbox",
+                                    # 僅於勾選時設定 checked 屬性 (屬性存在即為勾選)
+                                    **({'checked': True} if self.emojiQuery.is_combind else {}),
+                                ),
                                 SPAN(
                                     " 組合表符",
                                     Class='noselect',
                                     style=dict(
                                         fontWeight="bold",
                                     )
-                                ).bind("click", lambda ev:ev.currentTarget.parent.select_one('input').click()),
+                                ).bind("click", self.onclick_checkbox_label),
                             ],
                             style=dict(
                                 cursor="pointer",
@@ -861,11 +1051,35 @@ class EmojiSearchForm:
         )
 
 
-async def tag_search_result_div(emojiQuery: EmojiQuery) -> DIV:
+async def get_search_result_dict(emojiQuery: EmojiQuery) -> dict:
+    """ 根據搜尋條件，一次請求取得標籤搜尋結果、當頁表符 (或組合表符) 與結果總數
+
+    Args:
+        emojiQuery (EmojiQuery): 搜尋參數
+
+    Returns:
+        dict: tag_list、emoji_n，以及 emoji_list 或 combind_emoji_list (同伺服器端渲染嵌入的首頁資料)
+    """
+
+    # 建立搜尋表單字典 (表符列表以緊湊格式回傳)
+    emojiQuery_dict = {
+        k: v for k, v in asdict(emojiQuery).items() if v is not None
+    }
+    emojiQuery_dict['format'] = 'compact'
+
+    return json.loads((await aio.get(
+        "/api/search",
+        data=emojiQuery_dict,
+        headers=Avatar().auth_header_dict,
+    )).data)
+
+
+def tag_search_result_div(emojiQuery: EmojiQuery, tag_dict_list: List[dict]) -> DIV:
     """ 標籤搜尋結果 DIV 元素
 
     Args:
         emojiQuery (EmojiQuery)
+        tag_dict_list (List[dict]): 標籤搜尋結果
 
     Returns:
         DIV
@@ -874,15 +1088,9 @@ async def tag_search_result_div(emojiQuery: EmojiQuery) -> DIV:
     if not emojiQuery.tags_str:
         return DIV()
 
-    tag_dict_list = json.loads((await aio.get(
-        f"/api/tag",
-        data=dict(tags_str=emojiQuery.tags_str)
-    )).data)
-    # tag_dict_list = tag_res_dict['tag_list']
-
     return DIV(
         [
-            Tag(**tag_dict).search_result_span
+            Tag(id=tag_dict['id'], name=tag_dict['name']).search_result_span
             for tag_dict in tag_dict_list
         ],
         Class="w3-container",
@@ -890,9 +1098,48 @@ async def tag_search_result_div(emojiQuery: EmojiQuery) -> DIV:
     )
 
 
+def set_favorite_icon(icon, is_favorite: bool):
+    """ 設定收藏(愛心) icon 的顯示狀態
+
+    Args:
+        icon (I): 收藏 icon 元素
+        is_favorite (bool): 是否已收藏
+    """
+    if is_favorite:
+        icon.classList.add('is_favorite')
+        icon.style.color = "crimson"
+    else:
+        icon.classList.remove('is_favorite')
+        icon.style.color = "#ccc"
+
+
+async def refresh_favorite_icons():
+    """ 批量查詢頁面上表符的收藏狀態，並刷新收藏(愛心) icon
+    """
+    icon_list = list(doc.select('.favorite_icon'))
+    avatar = Avatar()
+    if not (icon_list and avatar.is_login):
+        for icon in icon_list:
+            set_favorite_icon(icon, False)
+        return
+
+    # 一次請求查詢所有表符 (重複指定 emoji_id 參數；元素屬性名稱的底線會轉為連字號)
+    query_str = '&'.join([
+        f"emoji_id={icon.attrs['emoji-id']}" for icon in icon_list
+    ])
+    favorite_emoji_id_set = set(json.loads((await aio.get(
+        f"/api/favorite?{query_str}",
+        headers=avatar.auth_header_dict,
+    )).data))
+    for icon in icon_list:
+        set_favorite_icon(icon, icon.attrs['emoji-id'] in favorite_emoji_id_set)
+
+
 class Avatar:
     """ 人物頭像 登出/登入按鈕
     """
+    # 目前使用者的 Firebase ID token (由 onIdTokenChanged 事件更新，未登入時為 None)
+    id_token: Optional[str] = None
 
     def refresh(self):
         """ 刷新區域
@@ -935,6 +1182,14 @@ class Avatar:
             return True
         return False
 
+    @property
+    def auth_header_dict(self) -> dict:
+        """ 識別使用者的請求標頭: Firebase ID token (未登入時為空字典)
+        """
+        if self.is_login and Avatar.id_token:
+            return {'Authorization': f'Bearer {Avatar.id_token}'}
+        return {}
+
     @property
     def div(self) -> DIV:
         """ 登入區域
@@ -1031,3 +1286,27 @@ def nav_div() -> DIV:
         ],
         Class="w3-black"
     )
+
+
+def hydrate_search_page(emojiQuery: EmojiQuery, initial_data_dict: dict):
+    """ 為伺服器端渲染的搜尋頁面綁定事件 (不重新查詢與生成元素)
+
+    Args:
+        emojiQuery (EmojiQuery): 搜尋參數
+        initial_data_dict (dict): 伺服器端嵌入的首頁資料 (見 get_initial_data_dict)
+    """
+    # 登入區域 (伺服器端僅渲染未登入的樣式)
+    Avatar().refresh()
+
+    # 查詢表符表單區域
+    EmojiSearchForm(emojiQuery=emojiQuery).bind_events()
+
+    # 表符列表表格: 每個表符有兩個表格橫列 (表符和標籤、表符操作工具)
+    for emoji_dict in initial_data_dict.get('emoji_list', []):
+        emoji = Emoji.from_dict(emoji_dict)
+        emoji.hydrate(*doc.select(f'tr[emoji-id="{emoji.id}"]'))
+
+    # 組合表符列表表格
+    for combindEmoji_dict in initial_data_dict.get('combind_emoji_list', []):
+        combindEmoji = CombindEmoji.from_dict(combindEmoji_dict)
+        combindEmoji.bind_tr(doc.select_one(f'tr[combind-id="{combindEmoji.id}"]'))
@@ -1,5 +1,6 @@
 from urllib import parse
-from typing import Any
+from typing import Any, Optional
+import json
 import uuid
 from browser.html import *
 from browser import doc, window, timer
@@ -24,6 +25,18 @@ def get_url_query_dict(url: str) -> dict:
     return dict(parse.parse_qsl(parse.urlsplit(url).query))
 
 
+def get_initial_data_dict() -> Optional[dict]:
+    """ 獲取伺服器端渲染時嵌入頁面的首頁資料 (頁面未經伺服器端渲染時回傳 None)
+
+    Returns:
+        Optional[dict]
+    """
+    script = doc.select_one('#initial_data')
+    if script is None:
+        return None
+    return json.loads(script.text)
+
+
 def copy_text_to_cliboard(text: str) -> None:
     """ 將文字複製到剪貼簿
     """
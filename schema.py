@@ -1,10 +1,12 @@
-from pydantic import BaseModel, validator, root_validator
-from typing import List
+from pydantic import BaseModel, conint, validator
+from typing import List, Union
+from urllib.parse import urlencode
 from uuid import UUID
+from enum import Enum
 import datetime
-import imagehash
 
 
+from db.hash_index import is_valid_hash_str
 from utils import (
     is_alive_url,
     get_average_hash_str,
@@ -12,6 +14,20 @@ from utils import (
 )
 
 
+def validate_average_hash_str(average_hash_str: str) -> str:
+    """ 驗證用戶端提供的平均哈希值 (去除頭尾空白並轉為小寫後，須為 16 個 16 進位字元)
+
+    Raises:
+        ValueError: 平均哈希值格式錯誤
+    """
+    if average_hash_str is None:
+        return None
+    average_hash_str = average_hash_str.strip().lower()
+    if not is_valid_hash_str(average_hash_str):
+        raise ValueError('平均哈希值須為 16 個 16 進位字元')
+    return average_hash_str
+
+
 class OutBase(BaseModel):
     class Config:
         orm_mode = True
@@ -27,7 +43,26 @@ class TagBase(BaseModel):
 
 
 class TagOut(TagBase, OutBase):
-    ...
+    """ 標籤 模型
+
+    Args:
+        emoji_n (int): 標籤的表符數量 (僅標籤搜尋結果有值)
+    """
+    emoji_n: int = None
+
+
+class TagSortBy(str, Enum):
+    """ 標籤搜尋結果的排序方式
+    """
+    match = 'match'  # 依相符程度 (完全相符 > 開頭相符 > 包含)
+    popularity = 'popularity'  # 依表符數量由多至少
+
+
+class EmojiListFormat(str, Enum):
+    """ 表符列表的回應格式
+    """
+    json = 'json'  # 同 EmojiOut 的列表
+    compact = 'compact'  # 緊湊格式: 頁面層級的標籤表與欄式陣列 (見 serializer.py 的 dumps_emoji_list_compact)
 
 
 class EmojiBase(BaseModel):
@@ -38,6 +73,9 @@ class EmojiIn(EmojiBase):
     tags_str: str = None
     average_hash_str: str = None
 
+    _validate_average_hash_str = validator(
+        'average_hash_str', allow_reuse=True)(validate_average_hash_str)
+
     @validator('url')
     def format_url(url):
         """
@@ -53,23 +91,52 @@ class EmojiIn(EmojiBase):
         else:
             raise ValueError(f'非噗浪表符網址: {url}')
 
-    @validator('url')
-    def alive_url(url):
-        """ 輸出前驗證: 網址是否存在
-        """
-        if is_alive_url(url):
-            return url
-        raise ValueError(f'網址無法連線: {url}')
+    async def fill_average_hash(self):
+        """ 連線確認網址存在，並自動填入 average_hash
 
-    @root_validator
-    def fill_average_hash(cls, value_dict: dict):
-        """ 輸出前自動填入 average_hash
+        網址的連線與圖片的下載、解碼皆以非同步進行，不於驗證器中執行 I/O
+
+        Raises:
+            ValueError: 網址無法連線
+            InvalidImageError: 網址的內容不是可解碼的圖片 (ValueError 的子類別)
         """
-        average_hash_str = value_dict['average_hash_str']
-        if average_hash_str is None:
-            value_dict['average_hash_str'] = get_average_hash_str(
-                value_dict['url'])
-        return value_dict
+        if self.average_hash_str is None:
+            self.average_hash_str = await get_average_hash_str(self.url)
+            if self.average_hash_str is None:
+                raise ValueError(f'網址無法連線: {self.url}')
+        elif not await is_alive_url(self.url):
+            raise ValueError(f'網址無法連線: {self.url}')
+
+
+class EmojiListItemIn(EmojiBase):
+    """ 批量新增表符的單一項目 (網址與平均哈希值於處理時才逐項驗證，無效的項目不會使整批失敗)
+    """
+    tags_str: str = None
+    average_hash_str: str = None
+
+
+class EmojiBulkStatus(str, Enum):
+    """ 批量新增表符的單一項目處理結果
+    """
+    created = 'created'
+    existing = 'existing'
+    invalid = 'invalid'
+    unreachable = 'unreachable'
+
+
+class EmojiBulkResultOut(BaseModel):
+    """ 批量新增表符的單一項目處理結果 模型
+
+    Args:
+        url (str): 請求中的表符網址
+        status (EmojiBulkStatus): 處理結果
+        id (UUID): 表符 ID (僅 created / existing 有值)
+        detail (str): 錯誤訊息 (僅 invalid / unreachable 有值)
+    """
+    url: str
+    status: EmojiBulkStatus
+    id: UUID = None
+    detail: str = None
 
 
 class EmojiOut(EmojiBase, OutBase):
@@ -101,3 +168,102 @@ class EmojiAddTagsIn(BaseModel):
             List[str]
         """
         return tags_str_2_tag_str_list(self.tags_str)
+
+
+class CombindEmojiCellOut(BaseModel):
+    """ 組合表符的一格 模型
+
+    Args:
+        url (str): 表符網址
+        emoji_id (UUID): 表符 ID (表符不存在於資料庫時為 None)
+    """
+    url: str
+    emoji_id: UUID = None
+
+
+class CombindEmojiOut(BaseModel):
+    """ 組合表符 模型
+
+    Args:
+        id (UUID): 組合表符 ID
+        combind_url (str): 組合表符字串 (供複製使用)
+        created_at (datetime.datetime): 建立時間
+        row_list (List[List[CombindEmojiCellOut]]): 依列排列的每一格
+    """
+    id: UUID
+    combind_url: str
+    created_at: datetime.datetime
+    row_list: List[List[CombindEmojiCellOut]]
+
+
+class SearchPageQuery(BaseModel):
+    """ 表符搜尋頁面的查詢參數 (同前端 pysrc/schema.py 的 EmojiQuery，供伺服器端渲染首頁結果)
+
+    Args:
+        page_n (int): 當前頁數. Defaults to 1
+        page_size_n (int): 每頁顯示結果數量. Defaults to 30
+        tags_str (str): 輸入框或表格標籤的搜尋標籤文字. Defaults to None
+        tag_str (str): 在標籤搜尋結果被點擊的標籤名稱，若有值則搜索標籤將以此為主. Defaults to None
+        similar_emoji_id (UUID): 搜尋相似表符的表符 ID. Defaults to None
+        is_combind (bool): 是否搜尋組合表符. Defaults to None
+        emoji_id (UUID): 搜尋含有此表符的組合表符. Defaults to None
+        is_favorite (bool): 是否僅顯示我的收藏. Defaults to None
+    """
+    page_n: conint(ge=1) = 1
+    page_size_n: conint(ge=1, le=100) = 30
+    tags_str: str = None
+    tag_str: str = None
+    similar_emoji_id: UUID = None
+    is_combind: bool = None
+    emoji_id: UUID = None
+    is_favorite: bool = None
+
+    def to_url(self, **update_kw_dict) -> str:
+        """ 取得查詢參數的 url (同前端 EmojiQuery.to_url，僅保留有值的參數)
+
+        **update_kw_dict : 欲更新的參數字典
+
+        Returns:
+            str
+        """
+        url_query_dict = {**self.dict(), **update_kw_dict}
+        return '/search?' + urlencode({k: v for k, v in url_query_dict.items() if v})
+
+
+class EmojiListCompactOut(BaseModel):
+    """ 緊湊格式的表符列表 模型 (format=compact；編碼見 serializer.py 的 dumps_emoji_list_compact)
+
+    Args:
+        tag_id_list (List[str]): 頁面層級的標籤表: 標籤 ID (不含連字號)
+        tag_name_list (List[str]): 頁面層級的標籤表: 標籤名稱
+        url_prefix (str): 所有表符網址的共同前綴
+        id_list (List[str]): 表符 ID (不含連字號)
+        url_list (List[str]): 去除共同前綴的表符網址
+        created_at_list (List[datetime.datetime]): 建立時間
+        average_hash_str_list (List[str]): 平均哈希值
+        tag_index_list (List[List[int]]): 各表符的標籤 (標籤表的索引，依標籤名稱排序)
+    """
+    tag_id_list: List[str]
+    tag_name_list: List[str]
+    url_prefix: str
+    id_list: List[str]
+    url_list: List[str]
+    created_at_list: List[datetime.datetime]
+    average_hash_str_list: List[str]
+    tag_index_list: List[List[int]]
+
+
+class SearchOut(BaseModel):
+    """ 搜尋結果 模型 (標籤搜尋結果與表符列表於同一次請求取得)
+
+    Args:
+        tag_list (List[TagOut]): 標籤搜尋結果 (未指定 tags_str 時為空列表)
+        emoji_list (Union[List[EmojiOut], EmojiListCompactOut]):
+            當頁表符列表 (非組合表符搜尋時有值；指定緊湊格式時為 EmojiListCompactOut)
+        combind_emoji_list (List[CombindEmojiOut]): 當頁組合表符列表 (組合表符搜尋時有值)
+        emoji_n (int): 結果總數
+    """
+    tag_list: List[TagOut]
+    emoji_list: Union[List[EmojiOut], EmojiListCompactOut] = None
+    combind_emoji_list: List[CombindEmojiOut] = None
+    emoji_n: int
@@ -0,0 +1,181 @@
+""" 表符與標籤的快速序列化 (與 EmojiOut / TagOut 的輸出格式相同)
+
+直接自 ORM 物件建立字典並以 orjson 一次編碼為 bytes，
+不經過 pydantic 驗證與 json.loads/json.dumps 的重複編碼。
+標籤須已於資料庫查詢時依名稱排序 (見 Emoji.get_tag_list_prefetch)
+"""
+import os
+from typing import Callable, Dict, Iterable
+
+import orjson
+from fastapi.responses import Response
+
+# 緊湊格式表符列表的媒體類型 (Accept 標頭指定此類型時回傳緊湊格式)
+COMPACT_MEDIA_TYPE = 'application/vnd.plurkemoji.compact+json'
+
+
+def tag_2_dict(tag) -> dict:
+    """ 標籤轉為字典 (同 TagOut)
+
+    Args:
+        tag (Tag): 標籤
+
+    Returns:
+        dict
+    """
+    return {
+        'id': tag.id,
+        'name': tag.name,
+    }
+
+
+def emoji_2_dict(emoji) -> dict:
+    """ 表符轉為字典 (同 EmojiOut)
+
+    Args:
+        emoji (Emoji): 表符 (tag_list 須已預先載入並依名稱排序)
+
+    Returns:
+        dict
+    """
+    return {
+        'url': emoji.url,
+        'id': emoji.id,
+        'created_at': emoji.created_at,
+        'average_hash_str': emoji.average_hash_str,
+        'tag_list': [tag_2_dict(tag) for tag in emoji.tag_list],
+    }
+
+
+def dumps_emoji_list(emoji_list: Iterable) -> bytes:
+    """ 表符列表編碼為 JSON
+
+    Args:
+        emoji_list (Iterable[Emoji]): 表符列表
+
+    Returns:
+        bytes
+    """
+    return orjson.dumps([emoji_2_dict(emoji) for emoji in emoji_list])
+
+
+def dumps_emoji_list_compact(emoji_list: Iterable) -> bytes:
+    """ 表符列表編碼為緊湊格式 JSON (解碼見 pysrc/common_utils.py 的 compact_2_emoji_dict_list)
+
+    熱門標籤 (例如 開心) 在同一頁中會重複出現多次，因此改以頁面層級的標籤表記錄每個標籤一次，
+    表符僅以整數索引參照標籤；其餘欄位以欄為單位排列為陣列，並省略 UUID 的連字號與網址的共同前綴:
+
+        {
+            "tag_id_list": [標籤 ID, ...], "tag_name_list": [標籤名稱, ...],
+            "url_prefix": 網址共同前綴,
+            "id_list": [...], "url_list": [去除前綴的網址, ...],
+            "created_at_list": [...], "average_hash_str_list": [...],
+            "tag_index_list": [[標籤索引, ...], ...]
+        }
+
+    Args:
+        emoji_list (Iterable[Emoji]): 表符列表 (tag_list 須已預先載入並依名稱排序)
+
+    Returns:
+        bytes
+    """
+    emoji_list = list(emoji_list)
+    # 標籤 ID → 標籤表索引 (依首次出現的順序)
+    tag_index_dict: Dict = {}
+    tag_name_list = []
+    tag_index_list = []
+    for emoji in emoji_list:
+        index_list = []
+        for tag in emoji.tag_list:
+            tag_index = tag_index_dict.get(tag.id)
+            if tag_index is None:
+                tag_index = tag_index_dict[tag.id] = len(tag_name_list)
+                tag_name_list.append(tag.name)
+            index_list.append(tag_index)
+        tag_index_list.append(index_list)
+
+    url_prefix = os.path.commonprefix([emoji.url for emoji in emoji_list])
+    return orjson.dumps({
+        'tag_id_list': [tag_id.hex for tag_id in tag_index_dict],
+        'tag_name_list': tag_name_list,
+        'url_prefix': url_prefix,
+        'id_list': [emoji.id.hex for emoji in emoji_list],
+        'url_list': [emoji.url[len(url_prefix):] for emoji in emoji_list],
+        'created_at_list': [emoji.created_at for emoji in emoji_list],
+        'average_hash_str_list': [emoji.average_hash_str for emoji in emoji_list],
+        'tag_index_list': tag_index_list,
+    })
+
+
+def dumps_tag_list(
+        tag_list: Iterable,
+        emoji_n_func: Callable[[str], int] = None) -> bytes:
+    """ 標籤列表編碼為 JSON
+
+    Args:
+        tag_list (Iterable[Tag]): 標籤列表
+        emoji_n_func (Callable[[str], int], optional): 標籤名稱 → 表符數量，若有值則輸出 emoji_n. Defaults to None.
+
+    Returns:
+        bytes
+    """
+    if emoji_n_func is None:
+        return orjson.dumps([tag_2_dict(tag) for tag in tag_list])
+    return orjson.dumps([
+        {**tag_2_dict(tag), 'emoji_n': emoji_n_func(tag.name)}
+        for tag in tag_list
+    ])
+
+
+def combind_emoji_2_dict(combindEmoji) -> dict:
+    """ 組合表符轉為字典 (同 CombindEmojiOut)
+
+    Args:
+        combindEmoji (CombindEmoji): 組合表符 (每一格須已預先載入)
+
+    Returns:
+        dict
+    """
+    return {
+        'id': combindEmoji.id,
+        'combind_url': combindEmoji.combind_url,
+        'created_at': combindEmoji.created_at,
+        'row_list': [
+            [
+                {'url': cell.url, 'emoji_id': cell.emoji_id}
+                for cell in cell_list
+            ]
+            for cell_list in combindEmoji.cell_row_list
+        ],
+    }
+
+
+def dumps_combind_emoji_list(combindEmoji_list: Iterable) -> bytes:
+    """ 組合表符列表編碼為 JSON
+
+    Args:
+        combindEmoji_list (Iterable[CombindEmoji]): 組合表符列表
+
+    Returns:
+        bytes
+    """
+    return orjson.dumps([
+        combind_emoji_2_dict(combindEmoji) for combindEmoji in combindEmoji_list
+    ])
+
+
+def json_response(
+        body: bytes,
+        headers: dict = None,
+        media_type: str = 'application/json') -> Response:
+    """ 以已編碼的 JSON 建立回應
+
+    Args:
+        body (bytes): JSON 內容
+        headers (dict, optional): 回應標頭. Defaults to None.
+        media_type (str, optional): 媒體類型. Defaults to 'application/json'.
+
+    Returns:
+        Response
+    """
+    return Response(content=body, headers=headers, media_type=media_type)
@@ -0,0 +1,243 @@
+""" 預先壓縮並可長期快取的靜態文件 (Brython 與前端 Python 原始碼)
+
+每個文件於程序啟動時 (或首次請求、文件異動時) 計算內容哈希值並預先壓縮為 gzip 與 brotli，
+請求時依 Accept-Encoding 直接回傳已壓縮的內容:
+
+    - ETag 為內容哈希值 (強驗證)，If-None-Match 相符時回傳 304
+    - 網址帶有相符的內容版本 (?v=內容哈希值，見 get_versioned_path) 時，
+      以 Cache-Control: immutable 長期快取；否則每次使用前須以 ETag 重新驗證
+"""
+from dataclasses import dataclass
+import gzip
+import hashlib
+from mimetypes import guess_type
+import os
+from typing import Dict, List, Optional
+
+import brotli
+from fastapi.staticfiles import StaticFiles
+from loguru import logger
+from starlette.datastructures import Headers, QueryParams
+from starlette.responses import Response
+from starlette.types import Scope
+
+
+# 值得壓縮的文件類型與大小下限
+COMPRESSIBLE_SUFFIX_SET = {'.js', '.py', '.css', '.html', '.json', '.svg', '.txt'}
+COMPRESS_MIN_SIZE = 1024
+# brotli 壓縮等級: 11 的 brython_stdlib 壓縮需時約 10 秒，9 約 0.5 秒且體積僅多約一成
+BROTLI_QUALITY = 9
+# 內容編碼 → ETag 後綴 (依偏好順序)
+ENCODING_ETAG_SUFFIX_DICT = {'br': '-br', 'gzip': '-gz'}
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+REVALIDATE_CACHE_CONTROL = 'no-cache'
+
+
+@dataclass
+class StaticAsset:
+    """ 預先壓縮的靜態文件
+
+    Args:
+        mtime_ns (int): 文件修改時間 (用以判斷文件是否異動)
+        size (int): 文件大小
+        content_hash (str): 內容哈希值
+        media_type (str): 文件類型
+        body_dict (Dict[str, bytes]): 內容編碼 → 內容 (identity 為原始內容)
+    """
+    mtime_ns: int
+    size: int
+    content_hash: str
+    media_type: str
+    body_dict: Dict[str, bytes]
+
+    @classmethod
+    def from_path(cls, full_path: str, stat_result: os.stat_result) -> 'StaticAsset':
+        """ 讀取文件，並預先壓縮 (壓縮後未變小的編碼則略過)
+
+        Args:
+            full_path (str): 文件路徑
+            stat_result (os.stat_result): 文件狀態
+
+        Returns:
+            StaticAsset
+        """
+        with open(full_path, 'rb') as f:
+            body = f.read()
+        body_dict = {'identity': body}
+        if os.path.splitext(full_path)[1] in COMPRESSIBLE_SUFFIX_SET and \
+                len(body) >= COMPRESS_MIN_SIZE:
+            for encoding, compressed_body in (
+                    ('br', brotli.compress(body, quality=BROTLI_QUALITY)),
+                    ('gzip', gzip.compress(body, compresslevel=9, mtime=0))):
+                if len(compressed_body) < len(body):
+                    body_dict[encoding] = compressed_body
+        return cls(
+            mtime_ns=stat_result.st_mtime_ns,
+            size=stat_result.st_size,
+            content_hash=hashlib.sha256(body).hexdigest()[:16],
+            media_type=guess_type(full_path)[0] or 'text/plain',
+            body_dict=body_dict,
+        )
+
+    def is_stale(self, stat_result: os.stat_result) -> bool:
+        """ 文件是否已異動
+        """
+        return (self.mtime_ns, self.size) != (stat_result.st_mtime_ns, stat_result.st_size)
+
+    def get_etag(self, encoding: str) -> str:
+        """ 獲取指定內容編碼的 ETag (不同編碼的內容不同，強驗證的 ETag 亦須不同)
+        """
+        return f'"{self.content_hash}{ENCODING_ETAG_SUFFIX_DICT.get(encoding, "")}"'
+
+
+def get_accepted_encoding_set(accept_encoding: str) -> set:
+    """ 解析 Accept-Encoding 標頭 (排除 q=0 的編碼)
+
+    Args:
+        accept_encoding (str): Accept-Encoding 標頭
+
+    Returns:
+        set
+    """
+    encoding_set = set()
+    for item in accept_encoding.split(','):
+        encoding, *param_list = [part.strip() for part in item.split(';')]
+        q = 1.0
+        for param in param_list:
+            name, _, value = param.partition('=')
+            if name.strip() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    pass
+        if encoding and q > 0:
+            encoding_set.add(encoding.lower())
+    return encoding_set
+
+
+def is_etag_matched(if_none_match: str, content_hash: str) -> bool:
+    """ If-None-Match 是否與文件內容相符 (弱比較: 忽略 W/ 前綴與內容編碼後綴)
+
+    Args:
+        if_none_match (str): If-None-Match 標頭
+        content_hash (str): 內容哈希值
+
+    Returns:
+        bool
+    """
+    for etag in if_none_match.split(','):
+        etag = etag.strip()
+        if etag == '*':
+            return True
+        etag = etag[2:] if etag.startswith('W/') else etag
+        etag = etag.strip('"')
+        for suffix in ENCODING_ETAG_SUFFIX_DICT.values():
+            if etag.endswith(suffix):
+                etag = etag[:-len(suffix)]
+                break
+        if etag == content_hash:
+            return True
+    return False
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """ 預先壓縮並可長期快取的靜態文件
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        # 文件路徑 → 預先壓縮的靜態文件
+        self._asset_dict: Dict[str, StaticAsset] = {}
+
+    def _get_asset(self, full_path: str, stat_result: os.stat_result) -> StaticAsset:
+        """ 獲取預先壓縮的靜態文件 (尚未載入或已異動時重新載入)
+        """
+        asset = self._asset_dict.get(full_path)
+        if asset is None or asset.is_stale(stat_result):
+            asset = self._asset_dict[full_path] = StaticAsset.from_path(full_path, stat_result)
+        return asset
+
+    def load(self):
+        """ 預先壓縮目錄下的所有文件 (於程序啟動時執行，避免首次請求時才壓縮)
+        """
+        for directory in self.all_directories:
+            for dir_path, dir_name_list, file_name_list in os.walk(directory):
+                dir_name_list[:] = [
+                    dir_name for dir_name in dir_name_list if dir_name != '__pycache__'
+                ]
+                for file_name in file_name_list:
+                    full_path = os.path.realpath(os.path.join(dir_path, file_name))
+                    self._get_asset(full_path, os.stat(full_path))
+        logger.info(
+            f'靜態文件預先壓縮完成: {self.directory} ({len(self._asset_dict)} 個文件)')
+
+    def get_versioned_path(self, path: str) -> str:
+        """ 獲取帶有內容版本的路徑 (內容異動時網址隨之改變，瀏覽器因此可長期快取)
+
+        Args:
+            path (str): 相對於靜態文件目錄的路徑
+
+        Returns:
+            str
+        """
+        full_path = os.path.realpath(os.path.join(self.directory, path))
+        asset = self._get_asset(full_path, os.stat(full_path))
+        return f'{path}?v={asset.content_hash}'
+
+    def file_response(
+            self,
+            full_path: str,
+            stat_result: os.stat_result,
+            scope: Scope,
+            status_code: int = 200) -> Response:
+        if status_code != 200:
+            return super().file_response(full_path, stat_result, scope, status_code)
+
+        asset = self._get_asset(full_path, stat_result)
+        request_headers = Headers(scope=scope)
+
+        # 依 Accept-Encoding 選擇內容編碼
+        accepted_encoding_set = get_accepted_encoding_set(
+            request_headers.get('accept-encoding', ''))
+        encoding = next(
+            (
+                encoding for encoding in ENCODING_ETAG_SUFFIX_DICT
+                if encoding in asset.body_dict and encoding in accepted_encoding_set
+            ),
+            'identity',
+        )
+
+        # 網址的內容版本相符時才可長期快取 (舊頁面引用的舊版本網址仍須重新驗證)
+        version: Optional[str] = QueryParams(scope['query_string']).get('v')
+        headers = {
+            'etag': asset.get_etag(encoding),
+            'cache-control': IMMUTABLE_CACHE_CONTROL
+            if version == asset.content_hash else REVALIDATE_CACHE_CONTROL,
+            'vary': 'Accept-Encoding',
+        }
+        if is_etag_matched(request_headers.get('if-none-match', ''), asset.content_hash):
+            return Response(status_code=304, headers=headers)
+
+        if encoding != 'identity':
+            headers['content-encoding'] = encoding
+        body = asset.body_dict[encoding]
+        if scope['method'] == 'HEAD':
+            headers['content-length'] = str(len(body))
+            body = b''
+        return Response(body, headers=headers, media_type=asset.media_type)
+
+
+def get_static_files_list(routes: List) -> List[PrecompressedStaticFiles]:
+    """ 獲取所有掛載的預先壓縮靜態文件
+
+    Args:
+        routes (List): app.routes
+
+    Returns:
+        List[PrecompressedStaticFiles]
+    """
+    return [
+        route.app for route in routes
+        if isinstance(getattr(route, 'app', None), PrecompressedStaticFiles)
+    ]
@@ -0,0 +1,11 @@
+""" 測試共用設定: 使用暫存的資料庫與 Brython 模組包輸出目錄，不修改工作目錄
+
+config 於匯入時讀取環境變數，因此須於收集測試 (匯入任何專案模組) 之前設定
+"""
+import os
+import tempfile
+
+# 程序結束時刪除
+TEMP_DIR = tempfile.TemporaryDirectory()
+os.environ['PLURKEMOJI_DB_URL'] = f'sqlite://{TEMP_DIR.name}/db.sqlite3'
+os.environ['PLURKEMOJI_BRYTHON_BUNDLE_DIR'] = f'{TEMP_DIR.name}/dist'
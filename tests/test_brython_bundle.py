@@ -0,0 +1,196 @@
+""" Brython 模組包測試: 模組包須含前端會用到的所有標準庫模組 (含函式內延遲載入的模組)，
+並以瀏覽器確認頁面僅載入模組包 (不載入 brython_stdlib.js 與 /pysrc/*.py) 即可啟動並完成搜尋
+
+瀏覽器測試須安裝 playwright 及 Chromium (python -m playwright install chromium)，未安裝時略過
+
+使用方法:
+    python -m pytest tests
+"""
+from pathlib import Path  # nopep8
+import sys  # nopep8
+sys.path.append(str(Path(__file__).resolve().parent.parent))  # nopep8
+import datetime
+import os
+import re
+import socket
+import subprocess
+import time
+import uuid
+from types import SimpleNamespace
+
+import httpx
+import orjson
+import pytest
+
+from brython_bundle import (
+    RUNTIME_MODULE_LIST, ROOT_DIR, get_imported_module_set, get_pysrc_module_dict,
+    get_required_stdlib_module_list, is_browser_unsupported_module, load_stdlib_vfs)
+from serializer import dumps_emoji_list_compact
+
+EMOJI_URL = 'https://emos.plurk.com/0123456789abcdef0123456789abcdef_w48_h48.gif'
+# 取代外部 CDN 的 Firebase (未登入)
+FIREBASE_STUB_JS = '''
+var firebase = {
+    initializeApp: function () {},
+    auth: function () {
+        return {
+            currentUser: null,
+            onIdTokenChanged: function (callback) { setTimeout(function () { callback(null) }, 50) },
+            signOut: function () {},
+        };
+    },
+};
+firebase.auth.GoogleAuthProvider = function () {};
+'''
+
+
+@pytest.fixture(scope='module')
+def stdlib_vfs() -> dict:
+    return load_stdlib_vfs()
+
+
+@pytest.fixture(scope='module')
+def bundle_module_set(stdlib_vfs) -> set:
+    """ 模組包中的標準庫模組 (同 build_bundle_text)
+    """
+    pysrc_module_dict = get_pysrc_module_dict()
+    module_name_set = set(stdlib_vfs) | set(pysrc_module_dict)
+    return set(get_required_stdlib_module_list(
+        {
+            name
+            for module_name, source in pysrc_module_dict.items()
+            for name in get_imported_module_set(
+                source, module_name_set, module_name, is_package='.' not in module_name)
+        } | set(RUNTIME_MODULE_LIST),
+        stdlib_vfs,
+    ))
+
+
+def test_lazy_import():
+    source = '''
+import json
+
+def dumps(obj):
+    import uuid
+    from urllib import parse
+    return json.dumps(obj)
+
+if __name__ == '__main__':
+    import unittest
+'''
+    module_name_set = {'json', 'uuid', 'urllib', 'urllib.parse', 'unittest'}
+    assert get_imported_module_set(source, module_name_set) == {
+        'json', 'uuid', 'urllib', 'urllib.parse'}
+
+
+def test_bundle_import_closure(stdlib_vfs, bundle_module_set):
+    # VFS 記錄的 import 列表 (由 Brython 產生，含函式內延遲載入的模組) 皆須已放入模組包
+    assert {'uuid', 'hashlib', 'traceback'} <= bundle_module_set
+    missing_dict = {
+        module_name: [
+            name for name in stdlib_vfs[module_name][2]
+            if name in stdlib_vfs and name not in bundle_module_set
+            and not is_browser_unsupported_module(name)
+        ]
+        for module_name in bundle_module_set
+        if stdlib_vfs[module_name][0] == '.py'
+    }
+    assert {k: v for k, v in missing_dict.items() if v} == {}
+    assert not any(is_browser_unsupported_module(name) for name in bundle_module_set)
+
+
+def get_search_body() -> bytes:
+    """ 模擬的 /api/search 回應 (表符列表為緊湊格式)
+    """
+    emoji = SimpleNamespace(
+        url=EMOJI_URL,
+        id=uuid.uuid4(),
+        created_at=datetime.datetime.now(datetime.timezone.utc),
+        average_hash_str='00000000ffffffff',
+        tag_list=[SimpleNamespace(id=uuid.uuid4(), name='開心')],
+    )
+    return b''.join([
+        b'{"tag_list":[],"emoji_n":1,"emoji_list":',
+        dumps_emoji_list_compact([emoji]),
+        b'}',
+    ])
+
+
+@pytest.fixture(scope='module')
+def browser():
+    sync_api = pytest.importorskip('playwright.sync_api')
+    with sync_api.sync_playwright() as playwright:
+        try:
+            browser = playwright.chromium.launch()
+        except sync_api.Error as e:
+            pytest.skip(f'無法啟動 Chromium: {e}')
+        yield browser
+        browser.close()
+
+
+@pytest.fixture(scope='module')
+def server_url(tmp_path_factory):
+    """ 以暫存的資料庫啟動伺服器 (啟動時產生的模組包亦輸出至暫存目錄，不修改工作目錄)
+    """
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    temp_dir = tmp_path_factory.mktemp('server')
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'main:app', '--host', '127.0.0.1', '--port', str(port)],
+        cwd=ROOT_DIR,
+        env={
+            **os.environ,
+            'PLURKEMOJI_DB_URL': f'sqlite://{temp_dir / "db.sqlite3"}',
+            'PLURKEMOJI_BRYTHON_BUNDLE_DIR': str(temp_dir / 'dist'),
+        },
+    )
+    url = f'http://127.0.0.1:{port}'
+    try:
+        for _ in range(300):
+            try:
+                if httpx.get(f'{url}/search').status_code == 200:
+                    break
+            except httpx.HTTPError:
+                pass
+            if process.poll() is not None:
+                pytest.fail('伺服器啟動失敗')
+            time.sleep(0.1)
+        yield url
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def route_external_request(route):
+    """ 外部 CDN 的腳本與樣式改以空白內容 (Firebase 則以 FIREBASE_STUB_JS) 回應
+    """
+    url = route.request.url
+    if 'firebase-app' in url:
+        route.fulfill(body=FIREBASE_STUB_JS, content_type='application/javascript')
+    elif url.endswith('.js'):
+        route.fulfill(body='', content_type='application/javascript')
+    else:
+        route.fulfill(body='', content_type='text/css')
+
+
+def test_search_page(browser, server_url):
+    page = browser.new_page()
+    requested_url_list = []
+    page.on('request', lambda request: requested_url_list.append(request.url))
+    page.route(re.compile(r'^https?://(?!127\.0\.0\.1)'), route_external_request)
+    page.route(
+        re.compile(r'/api/search\?'),
+        lambda route: route.fulfill(body=get_search_body(), content_type='application/json'))
+
+    # 查詢我的收藏不由伺服器端渲染: 前端確認登入狀態後自 /api/search 查詢並生成頁面
+    page.goto(f'{server_url}/search?is_favorite=true')
+    page.wait_for_selector(f'img[src="{EMOJI_URL}"]', timeout=30_000)
+    page.close()
+
+    assert any('/api/search?' in url and 'format=compact' in url for url in requested_url_list)
+    assert any('/dist/brython_modules.js' in url for url in requested_url_list)
+    assert not [
+        url for url in requested_url_list
+        if 'brython_stdlib' in url or '/pysrc/' in url or '/static/js/dependent/libs/' in url
+    ]
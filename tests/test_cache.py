@@ -0,0 +1,141 @@
+""" API 回應快取測試: 表符異動時的四種失效規則、查詢期間有寫入時不保留回應，
+以及資料於程序外寫入 (例如 data/csv2db.py) 後重新載入索引時，舊的 ETag 不再相符
+
+使用方法:
+    python -m pytest tests
+"""
+from pathlib import Path  # nopep8
+import sys  # nopep8
+sys.path.append(str(Path(__file__).resolve().parent.parent))  # nopep8
+import asyncio
+import datetime
+import uuid
+
+import pytest
+from starlette.testclient import TestClient
+
+from cache import KIND_ALL, KIND_SIMILAR, KIND_TAG, KIND_TAG_SEARCH, ResponseCache
+from db.models import Emoji
+from initializer import load_index
+import main
+
+EMOJI_ID = uuid.uuid4()
+OTHER_EMOJI_ID = uuid.uuid4()
+
+
+@pytest.fixture
+def cache() -> ResponseCache:
+    """ 含各種快取項目的快取 (鍵即項目說明)
+    """
+    cache = ResponseCache()
+    for key, kind, tag_name_iter, emoji_id_iter in [
+        ('all', KIND_ALL, (), [OTHER_EMOJI_ID]),
+        ('all_with_emoji', KIND_ALL, (), [EMOJI_ID]),
+        ('similar', KIND_SIMILAR, (), [OTHER_EMOJI_ID]),
+        ('tag_a', KIND_TAG, ['a'], [OTHER_EMOJI_ID]),
+        ('tag_a_b', KIND_TAG, ['a', 'b'], [OTHER_EMOJI_ID]),
+        ('tag_b', KIND_TAG, ['b'], [OTHER_EMOJI_ID]),
+        ('tag_c', KIND_TAG, ['c'], [OTHER_EMOJI_ID]),
+        ('tag_search_a', KIND_TAG_SEARCH, ['A'], ()),
+        ('tag_search_c', KIND_TAG_SEARCH, ['c'], ()),
+        ('tag_search_top', KIND_TAG_SEARCH, (), ()),
+    ]:
+        cache.set(
+            key, b'[]', {}, kind, cache.data_version,
+            tag_name_iter=tag_name_iter, emoji_id_iter=emoji_id_iter)
+    return cache
+
+
+def get_key_set(cache: ResponseCache) -> set:
+    return set(cache._entry_dict)
+
+
+def test_invalidate_emoji_containing(cache):
+    # 1. 回應中含有此表符的項目 (即使其他規則不適用)
+    cache.invalidate_emoji(EMOJI_ID, ['z'], [])
+    assert 'all_with_emoji' not in get_key_set(cache)
+    assert 'all' in get_key_set(cache)
+
+
+def test_invalidate_emoji_created_deleted(cache):
+    # 2. 新增表符: 不指定標籤的表符列表與所有相似表符列表
+    cache.invalidate_emoji(uuid.uuid4(), ['z'], ['z'], is_created=True)
+    assert not {'all', 'similar'} & get_key_set(cache)
+
+    # 刪除表符: 不指定標籤的表符列表，相似表符列表不受影響 (僅含此表符者已由規則 1 失效)
+    cache.set('all', b'[]', {}, KIND_ALL, cache.data_version)
+    cache.set('similar', b'[]', {}, KIND_SIMILAR, cache.data_version)
+    cache.invalidate_emoji(uuid.uuid4(), ['z'], ['z'], is_deleted=True)
+    assert 'all' not in get_key_set(cache)
+    assert 'similar' in get_key_set(cache)
+
+    # 追加或移除標籤: 兩者皆不受影響
+    cache.set('all', b'[]', {}, KIND_ALL, cache.data_version)
+    cache.invalidate_emoji(uuid.uuid4(), ['z'], ['z'])
+    assert {'all', 'similar'} <= get_key_set(cache)
+
+
+def test_invalidate_emoji_tag(cache):
+    # 3. 標籤組合包含於表符的標籤 (a, b)，且與異動的標籤 (b) 有交集
+    cache.invalidate_emoji(uuid.uuid4(), ['a', 'b'], ['b'])
+    key_set = get_key_set(cache)
+    assert not {'tag_a_b', 'tag_b'} & key_set
+    # 與異動的標籤無交集 (符合的表符不變)；或標籤組合不包含於表符的標籤
+    assert {'tag_a', 'tag_c'} <= key_set
+
+
+def test_invalidate_emoji_tag_search(cache):
+    # 4. 可能搜尋到異動標籤 (不分大小寫的子字串) 的標籤模糊搜尋結果，及未指定搜尋字串者
+    cache.invalidate_emoji(uuid.uuid4(), ['ab'], ['ab'])
+    key_set = get_key_set(cache)
+    assert not {'tag_search_a', 'tag_search_top'} & key_set
+    assert 'tag_search_c' in key_set
+
+    # 無異動的標籤時皆不受影響
+    cache.invalidate_emoji(uuid.uuid4(), ['c'], [])
+    assert 'tag_search_c' in get_key_set(cache)
+
+
+def test_set_stale(cache):
+    # 查詢期間有寫入 (資料版本已改變): 不保留回應
+    data_version = cache.data_version
+    cache.invalidate_emoji(uuid.uuid4(), ['z'], ['z'])
+    assert cache.set('stale', b'[]', {}, KIND_ALL, data_version) is None
+    assert 'stale' not in get_key_set(cache)
+    assert cache.stats.stale_n == 1
+
+    assert cache.set('fresh', b'[]', {}, KIND_ALL, cache.data_version) is not None
+    assert cache.get('fresh') is not None
+    assert cache.stats.stale_n == 1
+
+
+def test_clear(cache):
+    data_version = cache.data_version
+    assert cache.clear() == 10
+    assert len(cache) == 0
+    assert cache.data_version == data_version+1
+
+
+def test_reload_index():
+    with TestClient(main.app) as client:
+        response = client.get('/api/emoji')
+        etag = response.headers['etag']
+        emoji_n = int(response.headers['emoji_n'])
+
+        # 程序外寫入 (如同 data/csv2db.py，不更新索引與回應快取): 舊的 ETag 仍相符
+        emoji = Emoji(
+            url=f'https://emos.plurk.com/{uuid.uuid4().hex}_w48_h48.gif',
+            average_hash_str='0123456789abcdef',
+            created_at=datetime.datetime.now(datetime.timezone.utc),
+        )
+        loop = asyncio.get_event_loop()
+        loop.run_until_complete(Emoji.bulk_create([emoji]))
+        assert client.get('/api/emoji', headers={'If-None-Match': etag}).status_code == 304
+
+        # 重新載入索引後: 舊的 ETag 不再相符，且查詢到新寫入的表符
+        loop.run_until_complete(load_index())
+        response = client.get('/api/emoji', headers={'If-None-Match': etag})
+        assert response.status_code == 200
+        assert response.headers['etag'] != etag
+        assert int(response.headers['emoji_n']) == emoji_n+1
+        assert str(emoji.id) in [emoji_dict['id'] for emoji_dict in response.json()]
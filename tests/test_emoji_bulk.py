@@ -0,0 +1,32 @@
+""" 批量新增表符測試: 格式錯誤的項目僅標記為 invalid，不使整批失敗
+
+使用方法:
+    python -m pytest tests
+"""
+from pathlib import Path  # nopep8
+import sys  # nopep8
+sys.path.append(str(Path(__file__).resolve().parent.parent))  # nopep8
+import pytest
+from starlette.testclient import TestClient
+
+import main
+
+
+@pytest.fixture(scope='module')
+def client():
+    with TestClient(main.app) as client:
+        yield client
+
+
+def test_invalid_item(client):
+    item_list = [
+        dict(url='https://emos.plurk.com/0123456789abcdef0123456789abcdef_w48_h48.gif',
+             average_hash_str='not-a-hash'),
+        dict(url='https://example.com/emoji.gif'),
+    ]
+    response = client.post('/api/emoji_list', json=item_list)
+    assert response.status_code == 200
+    result_list = response.json()
+    assert [result['url'] for result in result_list] == [item['url'] for item in item_list]
+    assert [result['status'] for result in result_list] == ['invalid', 'invalid']
+    assert '平均哈希值' in result_list[0]['detail']
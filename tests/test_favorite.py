@@ -0,0 +1,92 @@
+""" 收藏測試: 資料庫中有、但標籤倒排索引中沒有的表符 (例如程序執行期間以 data/csv2db.py 寫入)，
+以及新增收藏時已被刪除的表符，皆不可使收藏查詢失敗
+
+使用方法:
+    python -m pytest tests
+"""
+from pathlib import Path  # nopep8
+import sys  # nopep8
+sys.path.append(str(Path(__file__).resolve().parent.parent))  # nopep8
+import asyncio
+import datetime
+import uuid
+
+import pytest
+from starlette.testclient import TestClient
+
+import main
+from db.favorite_index import favorite_index
+from db.models import Emoji, Favorite
+from db.tag_index import tag_index
+
+UID = 'test-uid'
+
+
+@pytest.fixture(scope='module')
+def client():
+    async def get_login_uid(authorization):
+        return UID
+
+    monkeypatch = pytest.MonkeyPatch()
+    monkeypatch.setattr(main, 'get_login_uid', get_login_uid)
+    with TestClient(main.app) as client:
+        yield client
+    monkeypatch.undo()
+
+
+def create_emoji(i: int, is_indexed: bool) -> Emoji:
+    """ 新增表符 (is_indexed 為 False 時以 bulk_create 直接寫入資料庫，如同 data/csv2db.py)
+    """
+    emoji = Emoji(
+        url=f'https://emos.plurk.com/{i:032x}_w48_h48.gif',
+        average_hash_str=f'{i:016x}',
+        created_at=datetime.datetime.now(datetime.timezone.utc),
+    )
+    loop = asyncio.get_event_loop()
+    if is_indexed:
+        loop.run_until_complete(emoji.save())
+    else:
+        loop.run_until_complete(Emoji.bulk_create([emoji]))
+    return emoji
+
+
+def test_favorite_not_indexed_emoji(client):
+    indexed_emoji = create_emoji(1, is_indexed=True)
+    not_indexed_emoji = create_emoji(2, is_indexed=False)
+    for emoji in (indexed_emoji, not_indexed_emoji):
+        assert client.put('/api/favorite', params=dict(emoji_id=str(emoji.id))).status_code == 200
+    assert favorite_index.is_favorite(UID, not_indexed_emoji.id)
+    assert not_indexed_emoji.id not in tag_index.get_indexed_emoji_id_set([not_indexed_emoji.id])
+
+    # 未載入索引的表符不列出 (亦不計入數量)
+    response = client.get('/api/favorite')
+    assert response.status_code == 200
+    assert response.json() == [str(indexed_emoji.id)]
+    response = client.get('/api/emoji', params=dict(is_favorite='true'))
+    assert response.status_code == 200
+    assert response.headers['emoji_n'] == '1'
+    assert [emoji_dict['id'] for emoji_dict in response.json()] == [str(indexed_emoji.id)]
+
+    # 批量查詢收藏狀態時仍依收藏記錄回傳
+    response = client.get('/api/favorite', params=dict(emoji_id=str(not_indexed_emoji.id)))
+    assert response.json() == [str(not_indexed_emoji.id)]
+
+
+def test_favorite_deleted_emoji(client):
+    # 表符於 Emoji.exists 與新增收藏之間被刪除: 違反外鍵約束，不可加入收藏索引
+    emoji_id = uuid.uuid4()
+    loop = asyncio.get_event_loop()
+    assert loop.run_until_complete(Favorite.add(UID, emoji_id)) is False
+    assert not favorite_index.is_favorite(UID, emoji_id)
+    assert client.put('/api/favorite', params=dict(emoji_id=str(emoji_id))).status_code == 404
+    assert client.get('/api/favorite').status_code == 200
+
+
+def test_favorite_duplicate(client):
+    # 收藏已寫入資料庫但尚未加入收藏索引 (同時有其他請求新增): 違反唯一約束，視為已收藏
+    emoji = create_emoji(3, is_indexed=True)
+    loop = asyncio.get_event_loop()
+    loop.run_until_complete(Favorite.create(uid=UID, emoji_id=emoji.id))
+    assert not favorite_index.is_favorite(UID, emoji.id)
+    assert loop.run_until_complete(Favorite.add(UID, emoji.id)) is True
+    assert favorite_index.is_favorite(UID, emoji.id)
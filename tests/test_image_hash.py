@@ -0,0 +1,94 @@
+""" 圖片下載與平均哈希值計算測試 (以本機的 http.server 模擬圖片伺服器)
+
+使用方法:
+    python -m pytest tests
+"""
+from pathlib import Path  # nopep8
+import sys  # nopep8
+sys.path.append(str(Path(__file__).resolve().parent.parent))  # nopep8
+import asyncio
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+import threading
+
+from PIL import Image
+import pytest
+
+import utils
+from utils import InvalidImageError, close_http_client, get_average_hash_str
+
+
+def make_png_bytes() -> bytes:
+    """ 建立 8x8 的 PNG 圖片 (上半黑、下半白)
+    """
+    image = Image.new('L', (8, 8), color=255)
+    image.paste(0, (0, 0, 8, 4))
+    buffer = BytesIO()
+    image.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+# 路徑 → (狀態碼, 內容)
+ROUTE_DICT = {
+    '/emoji.png': (200, make_png_bytes()),
+    '/not_image.png': (200, b'<html>not an image</html>'),
+    '/large.png': (200, b'\0'*(utils.MAX_IMAGE_BYTE_N+1)),
+}
+
+
+class StubImageHandler(BaseHTTPRequestHandler):
+    """ 依 ROUTE_DICT 回應，其餘路徑回傳 404
+    """
+
+    def do_GET(self):
+        status_code, body = ROUTE_DICT.get(self.path, (404, b'not found'))
+        self.send_response(status_code)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope='module')
+def base_url():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubImageHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_address[1]}'
+    server.shutdown()
+    server.server_close()
+
+
+def run_average_hash(url: str):
+    """ 於新的事件迴圈中計算平均哈希值 (共用的 HTTP 客戶端綁定事件迴圈，結束前須關閉)
+    """
+    async def main():
+        try:
+            return await get_average_hash_str(url)
+        finally:
+            await close_http_client()
+    return asyncio.run(main())
+
+
+def test_image(base_url):
+    assert run_average_hash(f'{base_url}/emoji.png') == '00000000ffffffff'
+
+
+def test_not_image(base_url):
+    with pytest.raises(InvalidImageError):
+        run_average_hash(f'{base_url}/not_image.png')
+
+
+def test_not_found(base_url):
+    assert run_average_hash(f'{base_url}/missing.png') is None
+
+
+def test_too_large(base_url):
+    with pytest.raises(InvalidImageError):
+        run_average_hash(f'{base_url}/large.png')
+
+
+def test_invalid_url():
+    assert run_average_hash('http://[invalid') is None
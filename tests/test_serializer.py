@@ -0,0 +1,41 @@
+""" 表符列表序列化測試: 緊湊格式須符合 EmojiListCompactOut (OpenAPI 文件)，且可還原為一般格式
+
+使用方法:
+    python -m pytest tests
+"""
+from pathlib import Path  # nopep8
+import sys  # nopep8
+sys.path.append(str(Path(__file__).resolve().parent.parent))  # nopep8
+import datetime
+import uuid
+from types import SimpleNamespace
+
+import orjson
+
+from pysrc.common_utils import compact_2_emoji_dict_list
+from schema import EmojiListCompactOut, SearchOut
+from serializer import dumps_emoji_list, dumps_emoji_list_compact
+
+
+def make_emoji_list() -> list:
+    tag_list = [SimpleNamespace(id=uuid.uuid4(), name=name) for name in ('可愛', '開心')]
+    now = datetime.datetime.now(datetime.timezone.utc)
+    return [
+        SimpleNamespace(
+            url=f'https://emos.plurk.com/{emoji_i:032x}_w48_h48.gif',
+            id=uuid.uuid4(),
+            created_at=now-datetime.timedelta(seconds=emoji_i),
+            average_hash_str=f'{emoji_i:016x}',
+            tag_list=tag_list[:emoji_i % 3],
+        )
+        for emoji_i in range(5)
+    ]
+
+
+def test_compact_format():
+    emoji_list = make_emoji_list()
+    compact_dict = orjson.loads(dumps_emoji_list_compact(emoji_list))
+    EmojiListCompactOut(**compact_dict)
+    search_out = SearchOut(tag_list=[], emoji_list=compact_dict, emoji_n=len(emoji_list))
+    assert isinstance(search_out.emoji_list, EmojiListCompactOut)
+    assert compact_2_emoji_dict_list(compact_dict) == orjson.loads(dumps_emoji_list(emoji_list))
@@ -1,14 +1,62 @@
+import asyncio
+import base64
+import binascii
+import datetime
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
 import imagehash
 from PIL import Image  # python -m pip install Pillow
-import requests
-from typing import List
+import httpx
+from typing import List, Optional, Tuple
+from uuid import UUID
 
 from pysrc.common_utils import *
-import requests
 
 
-def is_alive_url(url: str) -> bool:
+# 共用的 HTTP 連線池 (keep-alive): 於首次使用時建立，程序關閉時釋放
+HTTP_TIMEOUT = httpx.Timeout(10.0, connect=5.0)
+HTTP_LIMITS = httpx.Limits(max_connections=20, max_keepalive_connections=10)
+_http_client: Optional[httpx.AsyncClient] = None
+
+# 圖片解碼與哈希計算的執行緒池: 限制同時解碼的數量，且不阻塞事件迴圈
+image_hash_executor = ThreadPoolExecutor(
+    max_workers=4, thread_name_prefix='image_hash')
+# 圖片下載大小與像素數量上限 (表符圖片通常僅數 KB，避免超大文件或解壓縮炸彈耗盡記憶體)
+MAX_IMAGE_BYTE_N = 2*1024*1024
+MAX_IMAGE_PIXEL_N = 4096*4096
+
+
+class InvalidImageError(ValueError):
+    """ 網址可連線，但內容不是可解碼的圖片 (或超過大小上限)
+    """
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """ 獲取共用的非同步 HTTP 客戶端
+
+    Returns:
+        httpx.AsyncClient
+    """
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            timeout=HTTP_TIMEOUT,
+            limits=HTTP_LIMITS,
+            follow_redirects=True,
+        )
+    return _http_client
+
+
+async def close_http_client():
+    """ 關閉共用的非同步 HTTP 客戶端
+    """
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+async def is_alive_url(url: str) -> bool:
     """ 網址是否存在
 
     Args:
@@ -17,19 +65,139 @@ def is_alive_url(url: str) -> bool:
     Returns:
         bool
     """
-    res = requests.head(url)
+    try:
+        res = await get_http_client().head(url)
+    except (httpx.HTTPError, httpx.InvalidURL):
+        return False
     return (res.status_code == 200)
 
 
-def get_average_hash_str(img_src: str) -> str:
+def image_bytes_2_average_hash_str(image_bytes: bytes) -> str:
+    """ 根據圖片內容計算平均哈希值 (CPU 運算，應於執行緒池中執行)
+
+    Args:
+        image_bytes (bytes): 圖片內容
+
+    Raises:
+        InvalidImageError: 內容無法解碼為圖片，或像素數量超過上限
+
+    Returns:
+        str
+    """
+    try:
+        # Image.open 僅讀取檔頭，於解碼像素前即可檢查尺寸
+        image = Image.open(BytesIO(image_bytes))
+        if image.width*image.height > MAX_IMAGE_PIXEL_N:
+            raise InvalidImageError(f'圖片尺寸過大: {image.width}x{image.height}')
+        return str(imagehash.average_hash(image))
+    except (OSError, SyntaxError, ValueError, Image.DecompressionBombError) as e:
+        if isinstance(e, InvalidImageError):
+            raise
+        raise InvalidImageError(f'無法解碼圖片: {e}') from e
+
+
+async def download_image_bytes(img_src: str) -> Optional[bytes]:
+    """ 下載圖片內容 (以串流讀取，超過大小上限即中止)
+
+    Args:
+        img_src (str): 圖片網址
+
+    Raises:
+        InvalidImageError: 圖片超過大小上限
+
+    Returns:
+        Optional[bytes]: 若網址無法連線則回傳 None
+    """
+    try:
+        async with get_http_client().stream('GET', img_src) as img_res:
+            if img_res.status_code != 200:
+                return None
+            if int(img_res.headers.get('content-length') or 0) > MAX_IMAGE_BYTE_N:
+                raise InvalidImageError(f'圖片過大: {img_res.headers["content-length"]} bytes')
+            chunk_list = []
+            byte_n = 0
+            async for chunk in img_res.aiter_bytes():
+                byte_n += len(chunk)
+                if byte_n > MAX_IMAGE_BYTE_N:
+                    raise InvalidImageError(f'圖片過大: 超過 {MAX_IMAGE_BYTE_N} bytes')
+                chunk_list.append(chunk)
+            return b''.join(chunk_list)
+    except (httpx.HTTPError, httpx.InvalidURL):
+        return None
+
+
+async def get_average_hash_str(img_src: str) -> Optional[str]:
     """ 根據圖片網址獲取平均哈希值
 
     Args:
         img_src (str): 圖片網址
 
+    Raises:
+        InvalidImageError: 內容不是可解碼的圖片，或超過大小上限
+
+    Returns:
+        Optional[str]: 若網址無法連線則回傳 None
+    """
+    image_bytes = await download_image_bytes(img_src)
+    if image_bytes is None:
+        return None
+    return await asyncio.get_running_loop().run_in_executor(
+        image_hash_executor, image_bytes_2_average_hash_str, image_bytes)
+
+
+def encode_cursor(created_at: datetime.datetime, emoji_id: UUID) -> str:
+    """ 將 (建立時間, 表符 ID) 編碼為不透明的分頁游標
+
+    Args:
+        created_at (datetime.datetime): 當頁最後一個表符的建立時間
+        emoji_id (UUID): 當頁最後一個表符的 ID
+
     Returns:
         str
     """
-    img_res = requests.get(img_src)
-    image = Image.open(BytesIO(img_res.content))
-    return str(imagehash.average_hash(image))
+    return base64.urlsafe_b64encode(
+        f'{created_at.isoformat()}|{emoji_id}'.encode()
+    ).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime.datetime, UUID]:
+    """ 將分頁游標解碼為 (建立時間, 表符 ID)
+
+    Args:
+        cursor (str): 分頁游標
+
+    Raises:
+        ValueError: 游標格式錯誤 (含建立時間不帶時區: 無法與表符的建立時間比較)
+
+    Returns:
+        Tuple[datetime.datetime, UUID]
+    """
+    try:
+        created_at_str, emoji_id_str = base64.urlsafe_b64decode(
+            (cursor + '=' * (-len(cursor) % 4)).encode()
+        ).decode().split('|')
+        created_at = datetime.datetime.fromisoformat(created_at_str)
+        if created_at.utcoffset() is None:
+            raise ValueError('建立時間不帶時區')
+        return created_at, UUID(emoji_id_str)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise ValueError(f'分頁游標格式錯誤: {cursor}') from e
+
+
+def combind_url_2_url_row_list(combind_url: str) -> List[List[str]]:
+    """ 將組合表符字串解析為各列的表符網址列表
+
+    組合表符字串以 * 包住每個表符網址，並以 | 分隔每一列，
+    例如 "*url1**url2*|*url3*" → [[url1, url2], [url3]]
+
+    Args:
+        combind_url (str): 組合表符字串
+
+    Returns:
+        List[List[str]]: 不含空白的列
+    """
+    url_row_list = [
+        [url.strip() for url in row_str.strip().strip('*').split('**') if url.strip()]
+        for row_str in combind_url.split('|')
+    ]
+    return [url_list for url_list in url_row_list if url_list]